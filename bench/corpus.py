@@ -0,0 +1,36 @@
+"""
+Text corpus for benchmarks: paragraphs from .odt (content.xml) and .txt files, test/*.odt by default
+"""
+import glob
+import os
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ODT_PARAGRAPH_TAGS = ('{urn:oasis:names:tc:opendocument:xmlns:text:1.0}p',
+                      '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}h')
+
+
+def read_paragraphs(filename):
+    if filename.endswith('.odt'):
+        with zipfile.ZipFile(filename) as odt:
+            content = ElementTree.fromstring(odt.read('content.xml'))
+        return [''.join(element.itertext()) for element in content.iter() if element.tag in ODT_PARAGRAPH_TAGS]
+
+    with open(filename, encoding='utf-8') as file_h:
+        return [line.rstrip('\n') for line in file_h]
+
+
+def load(files=None, size=None):
+    """
+    :param files: files to read, test/*.odt by default
+    :param size: repeat paragraphs to get at least this many of them
+    :return: list of non-empty paragraphs
+    """
+    files = files or sorted(glob.glob(os.path.join(ROOT, 'test', '*.odt')))
+    paragraphs = [paragraph for filename in files for paragraph in read_paragraphs(filename) if paragraph.strip()]
+
+    if size and paragraphs:
+        paragraphs = (paragraphs * (size // len(paragraphs) + 1))[:size]
+
+    return paragraphs
@@ -0,0 +1,73 @@
+"""
+De-hyphenation benchmark on a hyphen-dense corpus: corpus words are split with 'X- Y', 'X-\\nY'
+and soft hyphens, then dehyphenate has to restore them
+
+python bench/dehyphenate.py [--size N] [--rate FRACTION] [corpus files...]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+from parsers.cut_soft_hyphen import cut_soft_hyphen  # noqa: E402
+from parsers.dehyphenate import dehyphenate, get_trie  # noqa: E402
+from parsers.tokenizer import tokenize  # noqa: E402
+
+BREAKS = ['- ', '-\n', '\u00AD', '\u00AD ']
+
+
+def split_words(paragraphs, rate, seed=0):
+    """
+    :return: list of paragraphs with words split at random
+    """
+    rnd = random.Random(seed)
+    result = []
+
+    for paragraph in paragraphs:
+        parts = []
+        last = 0
+        for token, start, end in tokenize(paragraph):
+            if len(token) < 4 or not token.isalpha() or rnd.random() >= rate:
+                continue
+            cut = rnd.randint(2, len(token) - 2)
+            parts.append(paragraph[last:start] + token[:cut] + rnd.choice(BREAKS) + token[cut:])
+            last = end
+        result.append(''.join(parts) + paragraph[last:])
+
+    return result
+
+
+def _timeit(func, paragraphs):
+    started = time.perf_counter()
+    output = [func(paragraph) for paragraph in paragraphs]
+    return time.perf_counter() - started, output
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('files', nargs='*')
+    arg_parser.add_argument('--size', type=int, default=20000, help="paragraphs in corpus")
+    arg_parser.add_argument('--rate', type=float, default=0.3, help="share of split words")
+    args = arg_parser.parse_args()
+
+    original = corpus.load(args.files, args.size)
+    paragraphs = split_words(original, args.rate)
+    print("%s paragraphs, %s chars, %s hyphens" % (len(paragraphs), sum(map(len, paragraphs)),
+                                                   sum(x.count('-') + x.count('\u00AD') for x in paragraphs)))
+
+    started = time.perf_counter()
+    get_trie()
+    print("%-20s %8.3f s" % ('trie load', time.perf_counter() - started))
+
+    for name, func in (('cut_soft_hyphen', cut_soft_hyphen), ('dehyphenate', dehyphenate)):
+        elapsed, output = _timeit(func, paragraphs)
+        restored = sum(1 for x, y in zip(output, original) if x == y)
+        print("%-20s %8.3f s, %s of %s paragraphs restored" % (name, elapsed, restored, len(original)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Exporters benchmark: time and peak memory of plain text, Markdown and EPUB export for growing documents,
+both should grow linearly and not at all respectively
+
+python bench/exporters.py [--paragraphs N] [--steps N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+import exporters  # noqa: E402
+from elements import Document, Footnote, Paragraph  # noqa: E402
+
+
+def make_document(texts, size):
+    document = Document()
+
+    for index in range(size):
+        text = texts[index % len(texts)]
+        words = text.split(' ')
+        if index % 3 == 0 and len(words) > 2:  # some emphasis
+            text = ' '.join(words[:1] + ['{{b}}' + words[1] + '{{/b}}', '{{i}}' + words[2] + '{{/i}}'] + words[3:])
+        if index % 20 == 0:
+            document.footnotes.append(Footnote(index, '* сноска %s' % index, '* сноска %s' % index, '*', 0))
+            text += '{{%s}}' % len(document.footnotes)
+        document.paragraphs.append(Paragraph(index, text, text, None))
+
+    return document
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark exporters")
+    arg_parser.add_argument('--paragraphs', type=int, default=20000)
+    arg_parser.add_argument('--steps', type=int, default=3, help="sizes: paragraphs, 2x, 4x...")
+    args = arg_parser.parse_args()
+
+    texts = corpus.load()
+    workdir = tempfile.mkdtemp()
+    for step in range(args.steps):
+        size = args.paragraphs * 2 ** step
+        document = make_document(texts, size)
+        for extension in ('.txt', '.md', '.epub'):
+            filename = os.path.join(workdir, 'book' + extension)
+            tracemalloc.start()
+            started = time.perf_counter()
+            exporters.export(document, filename)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("%-5s %8s paragraphs %8.3f s %8.2f us/paragraph  peak %7.1f KiB  %8.1f KiB written" % (
+                extension, size, elapsed, elapsed / size * 1e6, peak / 1024, os.path.getsize(filename) / 1024))
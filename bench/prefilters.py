@@ -0,0 +1,115 @@
+"""
+Prefilter benchmark on corpus paragraphs, their sentences and words, damaged with OCR confusions, split
+with hyphens and mutated with characters parsers react to (Latin lookalikes, dashes, digits, soft hyphens,
+old letters). tests/test_prefilters.py checks on the same texts that parsers leave every text their prefilter
+rejects unchanged, and old_spell gives what a run of all its rules without required literal checks does.
+
+python bench/prefilters.py [--size N] [--mutations N] [corpus files...]
+
+Prints skip rate and time with and without prefilter for every parser.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+import parsers  # noqa: E402
+from dehyphenate import split_words  # noqa: E402
+from parsers import old_spell, registry  # noqa: E402
+from stages import PARSERS, damage  # noqa: E402
+
+MUTATION_CHARS = 'aceopxyHKMTI-—–0123456789 \u00ADѣѳѵіъёе.,'
+SENTENCE_RE = re.compile(r'(?<=[.!?;])\s+')
+
+
+def texts(paragraphs, mutations, seed=0):
+    """
+    :return: list of distinct texts to check
+    """
+    rnd = random.Random(seed)
+    result = set(paragraphs)
+    result.update(damage(paragraphs, 0.2, seed)[0])
+    result.update(split_words(paragraphs, 0.2, seed))
+
+    pieces = set()
+    for paragraph in list(result):
+        for sentence in SENTENCE_RE.split(paragraph):
+            pieces.add(sentence)
+            pieces.update(sentence.split())
+    result.update(pieces)
+
+    pieces = sorted(result)
+    for _ in range(mutations):
+        text = list(rnd.choice(pieces))
+        for _ in range(rnd.randint(1, 3)):
+            text.insert(rnd.randint(0, len(text)), rnd.choice(MUTATION_CHARS))
+        result.add(''.join(text))
+
+    return sorted(result)
+
+
+def _call(func, text):
+    """
+    :return: output of parser, None if it fails (such text counts as changed)
+    """
+    try:
+        return func(text)
+    except Exception:
+        return None
+
+
+def _timeit(func, texts):
+    started = time.perf_counter()
+    for text in texts:
+        _call(func, text)
+    return time.perf_counter() - started
+
+
+def old_spell_reference(text):
+    for pattern, replacement, literal in old_spell.get_rules():
+        if pattern is None:
+            text = text.translate(replacement)
+        else:
+            text = pattern.sub(partial(old_spell._replacer, replacement=replacement), text)
+
+    return text
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('files', nargs='*')
+    arg_parser.add_argument('--size', type=int, default=0, help="paragraphs in corpus, 0 for distinct only")
+    arg_parser.add_argument('--mutations', type=int, default=20000, help="mutated texts to add")
+    args = arg_parser.parse_args()
+
+    checked = texts(corpus.load(args.files, args.size), args.mutations)
+    print("%s texts, %s chars" % (len(checked), sum(map(len, checked))))
+    parsers.warm_up()
+
+    for name in PARSERS:
+        func = parsers.get(name)
+        prefilter = registry.properties(func).prefilter
+        if prefilter is None:
+            print("%-28s no prefilter" % name)
+            continue
+
+        _timeit(func, checked)  # warm up caches parser may have
+        unfiltered = _timeit(func, checked)
+        started = time.perf_counter()
+        passed = [text for text in checked if prefilter(text)]
+        filtered = time.perf_counter() - started + _timeit(func, passed)
+
+        print("%-28s skipped %5.1f%%  %7.3f s -> %7.3f s" % (
+            name, 100.0 * (len(checked) - len(passed)) / len(checked), unfiltered, filtered))
+
+    print("%-28s %7.3f s" % ('old_spell without literals', _timeit(old_spell_reference, checked)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Parser benchmark: time of every text parser over the same corpus, to see which stage is the slowest
+
+python bench/stages.py [--size N] [--errors FRACTION] [corpus files...]
+
+Corpus words are damaged with OCR confusions (parsers.ocr_fix.CONFUSIONS) at the given rate,
+and ocr_fix precision and recall on them is printed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+import parsers  # noqa: E402
+from parsers import ocr_fix  # noqa: E402
+from parsers.tokenizer import tokenize  # noqa: E402
+
+PARSERS = ['homoglyphs', 'middle_dash_between_digits', 'old_spell', 'dehyphenate', 'ocr_fix', 'yoficator',
+           'cut_soft_hyphen', 'canonic_links']
+
+
+def damage(paragraphs, rate, seed=0):
+    """
+    :return: damaged paragraphs, list of (damaged word, original word)
+    """
+    rnd = random.Random(seed)
+    pairs = [(a, b) for a, b in ocr_fix.CONFUSIONS] + [(b, a) for a, b in ocr_fix.CONFUSIONS]
+    damaged = []
+    errors = []
+
+    for paragraph in paragraphs:
+        parts = []
+        last = 0
+        for token, start, end in tokenize(paragraph):
+            if not token.isalpha() or len(token) < ocr_fix.MIN_LENGTH or rnd.random() >= rate:
+                continue
+            options = [(source, target) for source, target in pairs if source in token]
+            if not options:
+                continue
+            source, target = rnd.choice(options)
+            wrong = token.replace(source, target, 1)
+            parts.append(paragraph[last:start] + wrong)
+            last = end
+            errors.append((wrong, token))
+        damaged.append(''.join(parts) + paragraph[last:])
+
+    return damaged, errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('files', nargs='*')
+    arg_parser.add_argument('--size', type=int, default=20000, help="paragraphs in corpus")
+    arg_parser.add_argument('--errors', type=float, default=0.02, help="share of damaged words")
+    args = arg_parser.parse_args()
+
+    paragraphs, errors = damage(corpus.load(args.files, args.size), args.errors)
+    print("%s paragraphs, %s chars, %s damaged words" % (len(paragraphs), sum(map(len, paragraphs)), len(errors)))
+
+    started = time.perf_counter()
+    parsers.warm_up()
+    print("%-28s %8.3f s" % ('warm-up', time.perf_counter() - started))
+
+    for name in PARSERS:
+        func = parsers.get(name)
+        started = time.perf_counter()
+        for paragraph in paragraphs:
+            func(paragraph)
+        print("%-28s %8.3f s" % (name, time.perf_counter() - started))
+
+    fixed = wrong = 0
+    for damaged, original in set(errors):
+        correction, confidence = ocr_fix.correct(damaged.lower())
+        if correction is None or confidence < ocr_fix.THRESHOLD:
+            continue
+        if correction == original.lower():
+            fixed += 1
+        else:
+            wrong += 1
+    print("ocr_fix on %s distinct damaged words: %s fixed, %s fixed wrong" % (len(set(errors)), fixed, wrong))
+
+
+if __name__ == "__main__":
+    main()
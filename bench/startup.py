@@ -0,0 +1,71 @@
+"""
+Startup benchmark: cold (empty artifact cache) and warm start of script.py and parsers
+
+python bench/startup.py [--runs N]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+CASES = [
+    ('import script', 'import script'),
+    ('import parsers', 'import parsers.middle_dash_between_digits, parsers.old_spell, parsers.yoficator, '
+                       'parsers.cut_soft_hyphen, parsers.canonic_links'),
+    ('parsers warm-up', 'import parsers; parsers.warm_up()'),
+]
+
+
+def _run(code, cache_dir):
+    env = dict(os.environ, POSTOCR_CACHE_DIR=cache_dir, PYTHONPATH=ROOT)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - started
+
+    if proc.returncode:
+        return None, proc.stderr.decode(errors='replace').strip().splitlines()[-1]
+
+    return elapsed, None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print("%-20s %10s %10s" % ('case', 'cold, s', 'warm, s'))
+
+    for name, code in CASES:
+        cold = []
+        warm = []
+        error = None
+
+        for i in range(args.runs):
+            cache_dir = tempfile.mkdtemp(prefix='postocr-bench-')
+            try:
+                elapsed, error = _run(code, cache_dir)
+                if error:
+                    break
+                cold.append(elapsed)
+
+                elapsed, error = _run(code, cache_dir)
+                if error:
+                    break
+                warm.append(elapsed)
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        if error:
+            print("%-20s failed: %s" % (name, error))
+        else:
+            print("%-20s %10.3f %10.3f" % (name, min(cold), min(warm)))
+
+
+if __name__ == "__main__":
+    main()
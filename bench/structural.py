@@ -0,0 +1,78 @@
+"""
+Structural operations benchmark: strip_empty, strip_footnotes, check and merge_paragraphs over a book
+of synthetic pages, with columns predicates and with plain functions doing the same per paragraph
+
+python bench/structural.py [--pages N] [--per-page N]
+
+Pages are made of corpus paragraphs, some lowercased (continuations to merge), some empty,
+every tenth page has a footnote.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import columns  # noqa: E402
+import corpus  # noqa: E402
+from elements import Document, Paragraph  # noqa: E402
+from generators import star_footnotes  # noqa: E402
+
+
+def make_document(texts, pages, per_page, seed=0):
+    rnd = random.Random(seed)
+    document = Document()
+
+    for page in range(pages):
+        for _ in range(per_page):
+            text = rnd.choice(texts)
+            chance = rnd.random()
+            if chance < 0.2:
+                text = text[0].lower() + text[1:]
+            elif chance < 0.25:
+                text = ''
+            document.paragraphs.append(Paragraph(page, text, text, None))
+        if page % 10 == 0:
+            document.paragraphs.append(Paragraph(page, '* сноска', '* сноска', None))
+
+    return document
+
+
+def run(document, columnar):
+    """
+    :return: [(operation, seconds, paragraphs left)]
+    """
+    operations = [
+        ('strip_empty', lambda: document.strip_custom(columns.not_empty() if columnar else lambda x: x,
+                                                      use_tagged=False)),
+        ('strip_footnotes', lambda: document.strip_footnotes(star_footnotes())),
+        ('check', lambda: document.check(columns.longer_than(60) if columnar else lambda x: len(x) > 60, "short")),
+        ('merge_paragraphs', lambda: document.merge_paragraphs()),
+    ]
+    result = []
+    for name, call in operations:
+        started = time.perf_counter()
+        call()
+        result.append((name, time.perf_counter() - started, len(document.paragraphs)))
+
+    return result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark structural operations of Document")
+    arg_parser.add_argument('--pages', type=int, default=10000)
+    arg_parser.add_argument('--per-page', type=int, default=20)
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    texts = [text for text in corpus.load() if not text.startswith('*')]  # footnotes are added per page
+    for columnar in (False, True):
+        document = make_document(texts, args.pages, args.per_page)
+        timings = run(document, columnar)
+        print("%s predicates, %s paragraphs" % ('columns' if columnar else 'plain', args.pages * args.per_page))
+        for name, elapsed, left in timings:
+            print("  %-18s %8.3f s  %8s left" % (name, elapsed, left))
+        print("  %-18s %8.3f s" % ('total', sum(x[1] for x in timings)))
@@ -0,0 +1,54 @@
+"""
+Tokenizer benchmark against nltk.word_tokenize (outputs of parsers with both are compared in tests/test_tokenizer.py)
+
+python bench/tokenizer.py [--size N] [corpus files...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+from parsers.tokenizer import tokenize, words  # noqa: E402
+
+
+def _timeit(func, paragraphs):
+    started = time.perf_counter()
+    for paragraph in paragraphs:
+        func(paragraph)
+    return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('files', nargs='*')
+    arg_parser.add_argument('--size', type=int, default=20000, help="paragraphs in corpus")
+    args = arg_parser.parse_args()
+
+    paragraphs = corpus.load(args.files, args.size)
+    print("%s paragraphs, %s chars" % (len(paragraphs), sum(map(len, paragraphs))))
+
+    print("%-28s %8.3f s" % ('parsers.tokenizer.tokenize', _timeit(lambda x: list(tokenize(x)), paragraphs)))
+    print("%-28s %8.3f s" % ('parsers.tokenizer.words', _timeit(words, paragraphs)))
+    print("%-28s %8.3f s" % ('tokenize(dotted=True)', _timeit(lambda x: list(tokenize(x, True)), paragraphs)))
+
+    try:
+        import nltk
+    except ImportError:
+        print("nltk is not installed, nothing to compare with")
+        return
+
+    try:
+        nltk.word_tokenize(paragraphs[0])
+        nltk_tokenize = nltk.word_tokenize
+    except LookupError:  # no punkt models
+        print("nltk punkt models are not installed, comparing with preserve_line=True")
+        nltk_tokenize = lambda x: nltk.word_tokenize(x, preserve_line=True)  # noqa: E731
+
+    print("%-28s %8.3f s" % ('nltk.word_tokenize', _timeit(nltk_tokenize, paragraphs)))
+
+
+if __name__ == "__main__":
+    main()
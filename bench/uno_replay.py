@@ -0,0 +1,46 @@
+"""
+Replay recorded UNO session (script.py --record-uno FILE) through reading and writing code
+
+python bench/uno_replay.py FILE [--scale X] [--runs N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import office  # noqa: E402
+import unoreplay  # noqa: E402
+from elements import Document  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('trace')
+    arg_parser.add_argument('--scale', type=float, default=1.0, help="multiplier of recorded latencies")
+    arg_parser.add_argument('--runs', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    output = os.path.join(tempfile.mkdtemp(prefix='postocr-bench-'), 'out.odt')
+
+    for i in range(args.runs):
+        replayer = unoreplay.Replayer(args.trace, args.scale)
+        office.use(replayer.root())
+
+        started = time.perf_counter()
+        document = Document().from_model(office.get_desktop().getCurrentComponent())
+        read = time.perf_counter() - started
+        read_calls = replayer.calls
+
+        started = time.perf_counter()
+        document.write(output)
+        written = time.perf_counter() - started
+
+        print("run %s: from_model %8.3f s %8s calls, write %8.3f s %8s calls (%s not in recording)" % (
+            i + 1, read, read_calls, written, replayer.calls - read_calls, replayer.missing))
+
+
+if __name__ == "__main__":
+    main()
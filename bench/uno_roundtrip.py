@@ -0,0 +1,71 @@
+"""
+Reading and writing benchmark against in-process fake office (fakeuno) with simulated bridge latency
+
+python bench/uno_roundtrip.py [--paragraphs N] [--latency SECONDS] [--changed FRACTION]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import office  # noqa: E402
+from elements import Document  # noqa: E402
+from fakeuno import FakeDesktop, FakeDocument  # noqa: E402
+
+WORDS = "Надписи находятся при изображении какихъ-то свитыхъ изъ коихъ одинъ слыветъ за Іакова".split()
+
+
+def synthetic_paragraphs(count, seed=0):
+    """
+    :return: list of (page_num, runs) with random formatting, 10 paragraphs per page
+    """
+    rnd = random.Random(seed)
+    paragraphs = []
+
+    for i in range(count):
+        runs = []
+        for k in range(rnd.randint(1, 8)):
+            fmt = dict(bold=rnd.random() < 0.2, italic=rnd.random() < 0.2, underlined=False)
+            runs.append((' '.join(rnd.choice(WORDS) for j in range(rnd.randint(1, 12))) + ' ', fmt))
+        paragraphs.append((i // 10 + 1, runs))
+
+    return paragraphs
+
+
+def _measure(name, desktop, func):
+    desktop.bridge.reset()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print("%-16s %10s calls %10.3f s" % (name, desktop.bridge.calls, elapsed))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--paragraphs', type=int, default=1000)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="seconds per bridge call")
+    arg_parser.add_argument('--changed', type=float, default=0.01, help="fraction of paragraphs to change")
+    args = arg_parser.parse_args()
+
+    desktop = FakeDesktop(FakeDocument(synthetic_paragraphs(args.paragraphs)), latency=args.latency)
+    office.use(desktop)
+    document = Document()
+    output = os.path.join(tempfile.mkdtemp(prefix='postocr-bench-'), 'out.json')
+
+    _measure('from_model', desktop, lambda: document.from_model(desktop.getCurrentComponent()))
+    _measure('write', desktop, lambda: document.write(output))
+
+    rnd = random.Random(1)
+    for paragraph in rnd.sample(document.paragraphs, int(len(document.paragraphs) * args.changed)):
+        paragraph.text_untagged = paragraph.text_untagged.replace('ъ ', ' ')
+        paragraph.dirty = True
+
+    _measure('write_in_place', desktop, lambda: document.write_in_place(output))
+
+
+if __name__ == "__main__":
+    main()
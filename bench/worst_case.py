@@ -0,0 +1,119 @@
+"""
+Worst-case latency of every parser on pathological inputs: long words without spaces, digit runs before
+dashes, thousands of tag braces, repeated link keywords, hyphen chains, mixed scripts and mutated corpus
+
+python bench/worst_case.py [--sizes 1000 10000 50000] [--mutations N] [--limit SECONDS] [corpus files...]
+
+A call is interrupted after --limit seconds and reported as such. Parsers raising on an input are
+reported with the exception. Inputs making parsers slow are what watchdog.py budgets are for.
+"""
+import argparse
+import os
+import random
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import corpus  # noqa: E402
+import parsers  # noqa: E402
+import watchdog  # noqa: E402
+from stages import PARSERS  # noqa: E402
+
+CYRILLIC = 'абвгдежзийклмнопрстуфхцчшщъыьэюяѣі'
+
+
+def _repeat(piece, size):
+    return (piece * (size // len(piece) + 1))[:size]
+
+
+def inputs(size, rnd):
+    """
+    :return: list of (kind, text) about size chars long
+    """
+    return [
+        ('long word', ''.join(rnd.choice(CYRILLIC) for _ in range(size))),
+        ('word before ъ', 'а' * size + 'ъ'),
+        ('digits before dash', '1' * size + ' - x'),
+        ('digit, space, dash', _repeat('1 -', size) + ' x'),
+        ('braces', '{{' * (size // 2)),
+        ('tags', _repeat('{{b}}{{/b}}', size)),
+        ('link keywords', _repeat('Быт. ', size)),
+        ('link numbers', 'Быт. ' + _repeat('1, ', size)),
+        ('hyphen chain', _repeat('сло- ', size)),
+        ('dashes', '-' * size),
+        ('soft hyphens', _repeat('а\u00AD', size)),
+        ('mixed scripts', _repeat('aаcсeеoо', size)),
+        ('spaces', ' ' * size),
+    ]
+
+
+def mutated(paragraphs, count, rnd):
+    result = []
+    for _ in range(count):
+        text = list(rnd.choice(paragraphs) * rnd.randint(1, 20))
+        for _ in range(rnd.randint(1, 50)):
+            position = rnd.randint(0, len(text))
+            text[position:position] = rnd.choice(['{{', '}}', '-', ' ', 'ъ', '1', 'Быт.', '\u00AD', 'a']) * \
+                rnd.randint(1, 200)
+        result.append(('mutated corpus', ''.join(text)))
+
+    return result
+
+
+def _interrupt(signum, frame):
+    raise watchdog.Timeout()
+
+
+def measure(func, text, limit):
+    """
+    :return: (seconds, error or None)
+    """
+    started = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        func(text)
+        error = None
+    except watchdog.Timeout:
+        error = 'over %s s' % limit
+    except Exception as exc:
+        error = '%s: %s' % (type(exc).__name__, exc)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return time.perf_counter() - started, error
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('files', nargs='*')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    arg_parser.add_argument('--mutations', type=int, default=200, help="mutated corpus paragraphs")
+    arg_parser.add_argument('--limit', type=float, default=10.0, help="seconds before a call is interrupted")
+    args = arg_parser.parse_args()
+
+    rnd = random.Random(0)
+    cases = [('%s %s' % (kind, size), text) for size in args.sizes for kind, text in inputs(size, rnd)]
+    cases.extend(mutated(corpus.load(args.files), args.mutations, rnd))
+    parsers.warm_up()
+    signal.signal(signal.SIGALRM, _interrupt)
+
+    print("%-28s %10s %12s  %-24s %s" % ('parser', 'worst, s', 'chars/s', 'input', 'errors'))
+    for name in PARSERS:
+        func = parsers.get(name)
+        worst = (0, '', 0)
+        errors = {}
+        for kind, text in cases:
+            elapsed, error = measure(func, text, args.limit)
+            if error:
+                errors.setdefault(error.split(':')[0], kind)
+            if elapsed > worst[0]:
+                worst = (elapsed, kind, len(text))
+
+        print("%-28s %10.3f %12.0f  %-24s %s" % (name, worst[0], worst[2] / worst[0] if worst[0] else 0, worst[1],
+                                                 ', '.join('%s on %s' % x for x in errors.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Serialized Document: JSON lines, gzipped when file name ends with .gz
+
+First line is a header {"format": "postocr", "version": 1, "meta": {...}, "state": {...}},
+then one line per paragraph {"p": [page_num, text, text_untagged, id]},
+per paragraph dropped by strip_* stages {"d": [page_num, text, text_untagged, id]}
+and per footnote {"f": [page_num, num_on_page, text, text_untagged, id]}
+(id and state are optional, files without them are read too). State keeps footnote_links and headers_report,
+ids of elements created after loading continue after the saved ones.
+Links to source office document (Paragraph.origin) and validation_report are not saved.
+"""
+import gzip
+import json
+import os
+
+import elements
+from elements import Document, Paragraph, Footnote
+
+FORMAT = 'postocr'
+VERSION = 1
+
+
+def _open(filename, mode):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, mode + 't', encoding='utf-8')
+
+    return open(filename, mode, encoding='utf-8')
+
+
+def dump(document, filename, meta=None):
+    """
+    Save document, file is replaced atomically
+
+    :param document: Document
+    :param filename: file to write
+    :param meta: json-serializable dict saved in header
+    """
+    tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+    if filename.endswith('.gz'):
+        tmp_filename += '.gz'
+
+    with _open(tmp_filename, 'w') as file_h:
+        state = dict(footnote_links=document.footnote_links, headers_report=document.headers_report)
+        file_h.write(json.dumps(dict(format=FORMAT, version=VERSION, meta=meta or {}, state=state),
+                                ensure_ascii=False) + '\n')
+
+        for key, paragraphs in (('p', document.paragraphs), ('d', document.discarded)):
+            for paragraph in paragraphs:
+                file_h.write(json.dumps({key: [paragraph.page_num, paragraph.text, paragraph.text_untagged,
+                                               paragraph.id]}, ensure_ascii=False) + '\n')
+
+        for footnote in document.footnotes:
+            file_h.write(json.dumps(dict(f=[footnote.page_num, footnote.num_on_page, footnote.text,
+                                            footnote.text_untagged, footnote.id]), ensure_ascii=False) + '\n')
+
+    os.replace(tmp_filename, filename)
+
+
+def _read_header(file_h, filename):
+    header = json.loads(file_h.readline() or 'null')
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise Exception("Not a document checkpoint: %s" % filename)
+    if header.get('version') != VERSION:
+        raise Exception("Unsupported checkpoint version %s: %s" % (header.get('version'), filename))
+
+    return header
+
+
+def read_meta(filename):
+    """
+    Read only header meta of saved document
+    """
+    with _open(filename, 'r') as file_h:
+        return _read_header(file_h, filename)['meta']
+
+
+def load(filename):
+    """
+    Load saved document
+
+    :param filename: file written by dump()
+    :return: Document
+    """
+    document = Document()
+    last_id = 0
+
+    with _open(filename, 'r') as file_h:
+        state = _read_header(file_h, filename).get('state', {})
+        document.footnote_links = state.get('footnote_links', 0)
+        document.headers_report = state.get('headers_report', {})
+
+        for line in file_h:
+            record = json.loads(line)
+
+            if 'p' in record or 'd' in record:
+                key = 'p' if 'p' in record else 'd'
+                page_num, text, text_untagged = record[key][:3]
+                element = Paragraph(page_num, text, text_untagged, None)
+                (document.paragraphs if key == 'p' else document.discarded).append(element)
+                saved = record[key][3:]
+            elif 'f' in record:
+                page_num, num_on_page, text, text_untagged = record['f'][:4]
+                element = Footnote(page_num, text, text_untagged, None, num_on_page)
+                element.text, element.text_untagged = text, text_untagged  # as saved, constructor strips them
+                document.footnotes.append(element)
+                saved = record['f'][4:]
+            else:
+                continue
+
+            if saved:
+                element.id = saved[0]
+                last_id = max(last_id, element.id)
+
+    elements.reserve_ids(last_id)
+    return document
@@ -0,0 +1,249 @@
+"""
+Columnar table of paragraphs for bulk structural operations (strip, check, merge, footnotes)
+
+Page numbers, lengths and first character codes and classes of paragraphs are NumPy arrays, untagged texts
+are one buffer with an offsets array, so operations compute masks over all paragraphs at once instead
+of fetching attributes paragraph by paragraph. Paragraph objects stay the API: a table is a view over
+a list of them, select() returns those a mask keeps. Columns are read from paragraphs when first needed,
+tables of results are derived from tables of inputs (take, merge) by indexing columns read so far,
+so a chain of structural operations reads every column at most once.
+
+Predicates for Document.strip_custom and check are plain functions of text, those made here
+(not_empty, longer_than) also know their mask over the table and are applied in bulk.
+
+NumPy is optional: without it available() is false and Document does the same operations paragraph by paragraph.
+"""
+from operator import attrgetter, itemgetter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EMPTY, LOWER, UPPER, DIGIT, OTHER = range(5)
+
+
+def available():
+    """
+    :return: whether tables can be made (NumPy is installed)
+    """
+    return numpy is not None
+
+
+def char_class(char):
+    if char.islower():
+        return LOWER
+    if char.isupper():
+        return UPPER
+    if char.isdecimal():
+        return DIGIT
+
+    return OTHER
+
+
+def _classes(codes):
+    """
+    :return: classes of char codes (-1 for empty), computed for distinct codes only
+    """
+    if not len(codes):
+        return numpy.zeros(0, dtype=numpy.int8)
+
+    distinct, inverse = numpy.unique(codes, return_inverse=True)
+    classes = numpy.array([EMPTY if code < 0 else char_class(chr(code)) for code in distinct.tolist()],
+                          dtype=numpy.int8)
+    return classes[inverse]
+
+
+class ParagraphTable:
+    def __init__(self, paragraphs, **columns):
+        """
+        :param paragraphs: list of Paragraph, rows of table in the same order
+        :param columns: columns already known (derived tables), others are read from paragraphs on first use
+        """
+        self.paragraphs = paragraphs
+        self.columns = columns
+        self._buffer = None
+        self._offsets = None
+
+    def __len__(self):
+        return len(self.paragraphs)
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns[name] = getattr(self, '_read_' + name)()
+
+        return self.columns[name]
+
+    def _read_length(self):
+        return numpy.fromiter(map(len, map(attrgetter('text_untagged'), self.paragraphs)), dtype=numpy.int64,
+                              count=len(self))
+
+    def _read_tagged_length(self):
+        return numpy.fromiter(map(len, map(attrgetter('text'), self.paragraphs)), dtype=numpy.int64, count=len(self))
+
+    def _read_page(self):
+        return numpy.fromiter(map(attrgetter('page_num'), self.paragraphs), dtype=numpy.int64, count=len(self))
+
+    def _read_first(self):
+        # first chars of non-empty paragraphs joined and decoded to code points at once
+        firsts = ''.join(map(itemgetter(slice(0, 1)), map(attrgetter('text_untagged'), self.paragraphs)))
+        first = numpy.full(len(self), -1, dtype=numpy.int64)
+        first[self.length > 0] = numpy.frombuffer(firsts.encode('utf-32-le'), dtype=numpy.uint32)
+        return first
+
+    def _read_first_class(self):
+        return _classes(self.first)
+
+    @property
+    def length(self):
+        """
+        Lengths of untagged texts
+        """
+        return self._column('length')
+
+    @property
+    def tagged_length(self):
+        return self._column('tagged_length')
+
+    @property
+    def page(self):
+        return self._column('page')
+
+    @property
+    def first(self):
+        """
+        Codes of first untagged chars, -1 for empty paragraphs
+        """
+        return self._column('first')
+
+    @property
+    def first_class(self):
+        return self._column('first_class')
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = numpy.zeros(len(self) + 1, dtype=numpy.int64)
+            numpy.cumsum(self.length, out=self._offsets[1:])
+
+        return self._offsets
+
+    @property
+    def buffer(self):
+        """
+        Untagged texts of all paragraphs, paragraph i is buffer[offsets[i]:offsets[i + 1]]
+        """
+        if self._buffer is None:  # joined on first use, most operations need only columns
+            self._buffer = ''.join(map(attrgetter('text_untagged'), self.paragraphs))
+
+        return self._buffer
+
+    def untagged(self, index):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def lengths(self, tagged=False):
+        return self.tagged_length if tagged else self.length
+
+    def startswith(self, prefix):
+        """
+        :return: mask of paragraphs whose untagged text starts with prefix (footnote marks)
+        """
+        if not prefix:
+            return numpy.ones(len(self), dtype=bool)
+
+        mask = self.first == ord(prefix[0])
+        if len(prefix) > 1:
+            for index in numpy.flatnonzero(mask).tolist():
+                mask[index] = self.paragraphs[index].text_untagged.startswith(prefix)
+
+        return mask
+
+    def on_pages_with(self, mask):
+        """
+        :return: mask of paragraphs on pages having a paragraph where mask is true
+        """
+        return numpy.isin(self.page, self.page[mask])
+
+    def indices(self, mask):
+        """
+        :return: list of rows where mask is true
+        """
+        return numpy.flatnonzero(mask).tolist()
+
+    def select(self, mask):
+        """
+        :return: list of paragraphs where mask is true
+        """
+        return [self.paragraphs[index] for index in self.indices(mask)]
+
+    def take(self, mask):
+        """
+        :return: table of rows where mask is true, with columns read so far
+        """
+        return ParagraphTable(self.select(mask), **{name: column[mask] for name, column in self.columns.items()})
+
+    def merge_groups(self):
+        """
+        Paragraphs starting with a lowercase letter continue the previous one
+
+        :return: array of first row of every group, groups run up to the next first row
+        """
+        starts = self.first_class != LOWER
+        if len(starts):
+            starts[0] = True
+
+        return numpy.flatnonzero(starts)
+
+    def joined(self, starts):
+        """
+        :param starts: from merge_groups()
+        :return: list of (first, end) rows of groups having more than one paragraph
+        """
+        ends = numpy.append(starts[1:], len(self))
+        joined = ends - starts > 1
+        return list(zip(starts[joined].tolist(), ends[joined].tolist()))
+
+    def merge(self, starts):
+        """
+        Table of paragraphs after groups were joined with spaces into their first paragraphs
+
+        :param starts: from merge_groups()
+        """
+        if not len(starts):
+            return self
+
+        joints = numpy.diff(numpy.append(starts, len(self))) - 1
+        columns = {name: numpy.add.reduceat(self.columns[name], starts) + joints
+                   for name in ('length', 'tagged_length') if name in self.columns}
+        if 'page' in self.columns:
+            columns['page'] = self.page[starts]
+        if 'first' in self.columns:
+            first = columns['first'] = self.first[starts]
+            first[(self.length[starts] == 0) & (joints > 0)] = ord(' ')  # empty paragraph got a space and more
+            columns['first_class'] = _classes(first)
+
+        return ParagraphTable([self.paragraphs[index] for index in starts.tolist()], **columns)
+
+
+class Predicate:
+    def __init__(self, name, func, mask):
+        """
+        :param name: name for stage names
+        :param func: function(text) -> keep, as strip_custom and check take it
+        :param mask: function(table, tagged) -> bool array, the same for all rows of table
+        """
+        self.__name__ = name
+        self.func = func
+        self.mask = mask
+
+    def __call__(self, text):
+        return self.func(text)
+
+
+def not_empty():
+    return Predicate('not_empty', lambda text: text, lambda table, tagged: table.lengths(tagged) > 0)
+
+
+def longer_than(length):
+    return Predicate('longer_than_%s' % length, lambda text: len(text) > length,
+                     lambda table, tagged: table.lengths(tagged) > length)
@@ -0,0 +1,335 @@
+"""
+Post-processing daemon: keeps parsers, dictionaries and office connections warm and takes jobs over a Unix socket
+
+    python daemon.py serve [--socket PATH] [--workers N] [--queue N] [--optimize]
+    python daemon.py submit book.odt -o out.odt [--pipeline prepare_paragraphs:old_spell ...] [--priority N] [--wait]
+                                                [--optimize]
+    python daemon.py status [JOB_ID]
+    python daemon.py reload
+
+Protocol is one JSON object per line in both directions, e.g.
+{"cmd": "submit", "input": "book.odt", "output": "out.odt", "pipeline": [...], "priority": 0, "wait": true}
+"optimize": true plans the job pipeline like script.py --optimize (serve --optimize makes it the default).
+Rules and dictionaries are reloaded with "reload" command or SIGHUP, without restart.
+
+Each job runs in one worker thread, word index (index_words stage) and prefilter counts are kept per thread
+and dropped when the job ends, so a job never corrects against the index of a previous one.
+Journal, watchdog and progress are one for the process, a daemon with them enabled has only one worker.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+import exporters
+import journal
+import office
+import parsers
+import progress
+import watchdog
+import wordindex
+from elements import Document
+from parsers import registry
+from pipeline import Pipeline
+
+SOCKET = os.path.join(tempfile.gettempdir(), 'postocr.sock')
+HOCR_EXTENSIONS = ('.hocr', '.html', '.htm', '.xhtml')
+ALTO_EXTENSIONS = ('.xml', '.alto')
+KEEP_JOBS = 1000  # finished jobs kept for status
+JOB_TTL = 24 * 3600  # seconds finished jobs are kept for status
+
+DEFAULT_PIPELINE = [
+    'strip_empty',
+    'merge_paragraphs',
+    'prepare_paragraphs:homoglyphs',
+    'prepare_paragraphs:middle_dash_between_digits',
+    'prepare_footnotes:middle_dash_between_digits',
+    'prepare_paragraphs:old_spell',
+    'prepare_paragraphs:ocr_fix',
+    'prepare_paragraphs:yoficator',
+    'prepare_paragraphs:cut_soft_hyphen',
+]
+
+
+class Job:
+    def __init__(self, job_id, request, optimize=False):
+        """
+        :param optimize: whether to optimize pipeline if request doesn't tell
+        """
+        self.id = job_id
+        self.input = request['input']
+        self.output = request['output']
+        self.spec = request.get('pipeline') or DEFAULT_PIPELINE
+        self.priority = int(request.get('priority', 0))
+        self.optimize = bool(request['optimize']) if request.get('optimize') is not None else optimize
+        self.state = 'queued'
+        self.error = None
+        self.elapsed = None
+        self.finished = None  # time.time() of job end
+        self.done = threading.Event()
+
+    def needs_office(self):
+        """
+        :return: whether input is read or output is written through office
+        """
+        extension = os.path.splitext(self.input)[1].lower()
+        return extension not in HOCR_EXTENSIONS + ALTO_EXTENSIONS or not exporters.supports(self.output)
+
+    def to_dict(self):
+        return dict(id=self.id, input=self.input, output=self.output, priority=self.priority, optimize=self.optimize,
+                    state=self.state, error=self.error, elapsed=self.elapsed)
+
+
+class Daemon:
+    def __init__(self, workers=1, queue_size=16, optimize=False, keep_jobs=KEEP_JOBS, job_ttl=JOB_TTL):
+        """
+        :param workers: jobs processed at the same time, each worker keeps its own office connection,
+            made on its first job reading or writing through office
+        :param queue_size: jobs waiting, submits are rejected when queue is full
+        :param optimize: plan pipelines of jobs by parser properties (Pipeline optimize), unless job tells otherwise
+        :param keep_jobs: finished jobs kept for status, older ones are forgotten
+        :param job_ttl: seconds finished jobs are kept for status
+        """
+        if workers > 1 and any(x is not None for x in (journal.JOURNAL, watchdog.WATCHDOG, progress.PROGRESS)):
+            raise Exception("Journal, watchdog and progress would be shared by jobs, use one worker with them")
+
+        self.workers = workers
+        self.optimize = optimize
+        self.queue = queue.PriorityQueue(queue_size)
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        self.keep_jobs = keep_jobs
+        self.job_ttl = job_ttl
+        self.counter = itertools.count(1)
+        self.condition = threading.Condition()  # guards reloading against running jobs
+        self.running = 0
+        self.reloading = False
+
+        parsers.warm_up()
+
+    def submit(self, request):
+        """
+        :raise queue.Full: when queue is full
+        """
+        job = Job(next(self.counter), request, self.optimize)
+        self.queue.put_nowait((-job.priority, job.id, job))
+        with self.jobs_lock:
+            self._prune()
+            self.jobs[job.id] = job
+        logging.info("[DAEMON] Queued job %s: %s", job.id, job.input)
+        return job
+
+    def _prune(self):
+        """
+        Forget finished jobs older than job_ttl and the oldest of them over keep_jobs
+        """
+        finished = sorted((job for job in self.jobs.values() if job.finished is not None), key=lambda x: x.finished)
+        expired = time.time() - self.job_ttl
+        for index, job in enumerate(finished):
+            if job.finished < expired or index < len(finished) - self.keep_jobs:
+                del self.jobs[job.id]
+
+    def reload(self):
+        """
+        Reload parsers after running jobs are done, new jobs wait for it
+        """
+        with self.condition:
+            self.reloading = True
+            while self.running:
+                self.condition.wait()
+        try:
+            parsers.reload()
+            logging.info("[DAEMON] Parsers reloaded")
+        finally:
+            with self.condition:
+                self.reloading = False
+                self.condition.notify_all()
+
+    def _read(self, job, desktop):
+        extension = os.path.splitext(job.input)[1].lower()
+        if extension in HOCR_EXTENSIONS:
+            return Document().from_hocr(job.input)
+        if extension in ALTO_EXTENSIONS:
+            return Document().from_alto(job.input)
+
+        model = office.load(desktop, job.input)
+        try:
+            return Document().from_model(model)
+        finally:
+            model.close(True)
+
+    def process(self, job, desktop):
+        with self.condition:
+            while self.reloading:
+                self.condition.wait()
+            self.running += 1
+
+        wordindex.use(None)
+        registry.reset_usage()
+        try:
+            started = time.perf_counter()
+            job.state = 'running'
+            document = self._read(job, desktop)
+            Pipeline.from_spec(job.spec, optimize=job.optimize).run(document)
+            if exporters.supports(job.output):
+                exporters.export(document, job.output)
+            else:
+                document.write(job.output, desktop=desktop)
+            job.elapsed = round(time.perf_counter() - started, 3)
+            job.state = 'done'
+            logging.info("[DAEMON] Job %s done in %s s", job.id, job.elapsed)
+        finally:
+            wordindex.use(None)
+            registry.reset_usage()
+            with self.condition:
+                self.running -= 1
+                self.condition.notify_all()
+
+    def worker(self):
+        desktop = None
+
+        while True:
+            priority, job_id, job = self.queue.get()
+            if job is None:
+                break
+
+            try:
+                if desktop is None and job.needs_office():
+                    desktop = office.get_desktop()
+                self.process(job, desktop)
+            except Exception as e:
+                logging.exception("[DAEMON] Job %s failed", job.id)
+                job.state = 'failed'
+                job.error = str(e)
+                if job.needs_office():
+                    desktop = None  # connection may be broken, reconnect for next job
+            finally:
+                job.finished = time.time()
+                job.done.set()
+
+    def handle(self, request):
+        """
+        :param request: dict with 'cmd'
+        :return: response dict
+        """
+        cmd = request.get('cmd')
+
+        if cmd == 'submit':
+            try:
+                job = self.submit(request)
+            except queue.Full:
+                return dict(error="Queue is full")
+            if request.get('wait'):
+                job.done.wait()
+            return job.to_dict()
+        elif cmd == 'status':
+            with self.jobs_lock:
+                if request.get('id') is not None:
+                    job = self.jobs.get(int(request['id']))
+                    return job.to_dict() if job else dict(error="No job %s (or it's forgotten)" % request['id'])
+                return dict(queued=self.queue.qsize(), running=self.running,
+                            jobs=[job.to_dict() for job in self.jobs.values()])
+        elif cmd == 'reload':
+            self.reload()
+            return dict(reloaded=True)
+
+        return dict(error="Unknown command %s" % cmd)
+
+    def serve(self, socket_path=SOCKET):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        logging.exception("[DAEMON] Bad request")
+                        response = dict(error=str(e))
+                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        workers = [threading.Thread(target=self.worker, daemon=True) for i in range(self.workers)]
+        for worker in workers:
+            worker.start()
+
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        server.daemon_threads = True
+
+        def stop(signum, frame):
+            threading.Thread(target=server.shutdown).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(target=self.reload).start())
+
+        logging.info("[DAEMON] Listening on %s with %s workers", socket_path, self.workers)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(socket_path)
+            for i, worker in enumerate(workers):
+                self.queue.put((float('inf'), -i, None))
+
+
+def request(message, socket_path=SOCKET):
+    """
+    Send one request to running daemon
+
+    :return: response dict
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as file_h:
+            return json.loads(file_h.readline())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Post-processing daemon")
+    arg_parser.add_argument('--socket', default=SOCKET)
+    commands = arg_parser.add_subparsers(dest='cmd', required=True)
+
+    serve_parser = commands.add_parser('serve')
+    serve_parser.add_argument('--workers', type=int, default=1)
+    serve_parser.add_argument('--queue', type=int, default=16)
+    serve_parser.add_argument('--optimize', action='store_true', help="optimize pipelines of jobs by default")
+
+    submit_parser = commands.add_parser('submit')
+    submit_parser.add_argument('input')
+    submit_parser.add_argument('-o', '--output', required=True)
+    submit_parser.add_argument('--pipeline', nargs='+', help="stages like prepare_paragraphs:old_spell")
+    submit_parser.add_argument('--priority', type=int, default=0, help="bigger goes first")
+    submit_parser.add_argument('--wait', action='store_true')
+    submit_parser.add_argument('--optimize', action='store_true', default=None,
+                               help="optimize pipeline (daemon default if not given)")
+
+    status_parser = commands.add_parser('status')
+    status_parser.add_argument('id', nargs='?')
+
+    commands.add_parser('reload')
+
+    args = arg_parser.parse_args()
+
+    if args.cmd == 'serve':
+        logging.basicConfig(level=logging.INFO)
+        Daemon(args.workers, args.queue, args.optimize).serve(args.socket)
+    elif args.cmd == 'submit':
+        print(json.dumps(request(dict(cmd='submit', input=os.path.realpath(args.input),
+                                      output=os.path.realpath(args.output), pipeline=args.pipeline,
+                                      priority=args.priority, wait=args.wait, optimize=args.optimize), args.socket),
+                         ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(request(dict(cmd=args.cmd, id=getattr(args, 'id', None)), args.socket),
+                         ensure_ascii=False, indent=2))
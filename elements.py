@@ -1,9 +1,24 @@
+import bisect
+import itertools
 import logging
 import textwrap
-import uno
 import re
+from difflib import SequenceMatcher
+from operator import attrgetter, itemgetter
 from os import path
 
+import columns
+import headers
+import journal
+import office
+import progress
+import readers
+import unotrace
+import validation
+import watchdog
+import wordindex
+from parsers import registry
+
 TAG_RE = re.compile(r'{{(\S*?)}}')
 TAGS = dict(
     open_bold='{{b}}',
@@ -13,12 +28,29 @@ TAGS = dict(
     open_underline='{{u}}',
     close_underline='{{/u}}'
 )
+IDS = itertools.count(1)  # ids of paragraphs and footnotes, for journal
+STAMPS = itertools.count(1)  # stamps of paragraph text assignments, later assignment has greater stamp
+
+
+def reserve_ids(last_id):
+    """
+    Make ids of paragraphs and footnotes created from now on greater than last_id (of loaded ones)
+    """
+    global IDS
+    IDS = itertools.count(max(next(IDS), last_id + 1))
 
 
 class Document:
     def __init__(self):
         self.paragraphs = []
         self.footnotes = []
+        self.discarded = []
+        self.model = None
+        self.headers_report = {}
+        self.footnote_links = 0  # links numbered by replace_footnotes
+        self.validation_report = None
+        self._table = None
+        self._table_stamp = 0  # greatest stamp of paragraphs table accounts for
 
     def _decide_tag(self, word, old_fmt_dict, new_fmt_dict):
         """
@@ -100,12 +132,44 @@ class Document:
 
         return {'warnings': warnings, 'put_footnote': None, 'style': style}
 
-    def from_model(self, model):
+    @staticmethod
+    def _whole_paragraphs(text, start, end):
+        """
+        Cursor selecting paragraphs from one containing start to one containing end
+        """
+        cursor = text.createTextCursorByRange(start)
+        cursor.gotoStartOfParagraph(False)
+        cursor.gotoRange(end, True)
+        cursor.gotoEndOfParagraph(True)
+        return cursor
+
+    def from_model(self, model, selection=False, pages=None):
+        """
+        Read paragraphs from office document
+
+        :param model: document model
+        :param selection: read only paragraphs touched by current selection
+        :param pages: (first, last) - read only paragraphs on these pages
+        """
+        model = unotrace.wrap(model)
+        self.model = model
         ctrl = model.getCurrentController()
         text = model.Text
         cursor = text.createTextCursor()
         view_cursor = ctrl.getViewCursor()
-        enum = text.createEnumeration()
+
+        if selection:
+            selected = ctrl.getSelection().getByIndex(0)
+            enum = self._whole_paragraphs(text, selected.getStart(), selected.getEnd()).createEnumeration()
+        elif pages:
+            view_cursor.jumpToPage(pages[0])
+            view_cursor.jumpToStartOfPage()
+            start = view_cursor.getStart()
+            view_cursor.jumpToPage(pages[1])
+            view_cursor.jumpToEndOfPage()
+            enum = self._whole_paragraphs(text, start, view_cursor.getEnd()).createEnumeration()
+        else:
+            enum = text.createEnumeration()
 
         while enum.hasMoreElements():
             # iterate over all paragraphs
@@ -136,6 +200,87 @@ class Document:
                 text += self._decide_tag('', format_dict, dict(bold=False, italic=False, underlined=False))
 
             self.paragraphs.append(Paragraph(view_cursor.getPage(), text, text_untagged, paragraph))
+            progress.advance()
+
+        return self
+
+    def _from_runs(self, runs_iter):
+        for page_num, runs in runs_iter:
+            text = ""
+            text_untagged = ""
+            format_dict = dict(bold=False, italic=False, underlined=False)
+
+            for string, new_fmt_dict in runs:
+                text += self._decide_tag(string, format_dict, new_fmt_dict)
+                text_untagged += string
+                format_dict = new_fmt_dict
+
+            text += self._decide_tag('', format_dict, dict(bold=False, italic=False, underlined=False))
+
+            self.paragraphs.append(Paragraph(page_num, text, text_untagged, None))
+            progress.advance()
+
+        return self
+
+    def from_hocr(self, filename):
+        """
+        Read paragraphs from hOCR file, no office needed
+
+        :param filename: hOCR file
+        """
+        return self._from_runs(readers.read_hocr(filename))
+
+    def from_alto(self, filename):
+        """
+        Read paragraphs from ALTO XML file, no office needed
+
+        :param filename: ALTO file
+        """
+        return self._from_runs(readers.read_alto(filename))
+
+    def table(self):
+        """
+        Columnar view of paragraphs (columns.ParagraphTable). Structural operations derive the table
+        of their result from it, it's read again when paragraphs change or texts of some of them are assigned
+
+        :return: ParagraphTable, None without NumPy
+        """
+        if not columns.available():
+            return None
+
+        stamp = self._stamp()
+        if self._table is None or self._table.paragraphs is not self.paragraphs or stamp > self._table_stamp:
+            self._table = columns.ParagraphTable(self.paragraphs)
+            self._table_stamp = stamp
+
+        return self._table
+
+    def _set_table(self, table):
+        """
+        Keep table derived by a structural operation, it accounts for texts the operation changed
+        """
+        self._table = table
+        self.paragraphs = table.paragraphs
+        self._table_stamp = self._stamp()
+
+    def _stamp(self):
+        return max(map(attrgetter('stamp'), self.paragraphs), default=0)
+
+    def index_words(self, save=None, merge=()):
+        """
+        Count words of the whole document for parsers correcting by consistency (parsers.consistency)
+        and make the index the one they query
+
+        :param save: file to save index of this document to
+        :param merge: saved indexes of other volumes to add to it
+        """
+        index = wordindex.index_document(self)
+        if save:
+            index.save(save)
+        for filename in merge:
+            index.merge(wordindex.load(filename))
+        wordindex.use(index)
+        logging.info("[INFO] Word index: %s forms, %s words", len(index), sum(index.counts.values()))
 
         return self
 
@@ -143,27 +288,66 @@ class Document:
         """
         Iterate over paragraphs and check whether func is true
 
-        :param func: custom func to check
+        :param func: custom func to check, columns predicates are checked on all paragraphs at once
         :param message: message to display
         :param fail: exception or warning
         """
-        for paragraph in self.paragraphs:
+        paragraphs = self.paragraphs
+        table = self.table() if isinstance(func, columns.Predicate) else None
+        if table is not None:  # only failing ones go to the loop
+            paragraphs = table.select(~func.mask(table, True))
+
+        for paragraph in paragraphs:
             if not func(paragraph.text):
                 if fail:
                     raise Exception("%s (para %s)" % (message, paragraph))
                 else:
                     logging.warning("%s (para %s)" % (message, paragraph))
 
+    def validate(self, rules, examples=5):
+        """
+        Check a set of rules (validation.py) in one pass over paragraphs and footnotes, log findings
+        per rule and keep them in validation_report
+
+        :param rules: list of validation.Rule
+        :param examples: findings kept per rule as examples
+        :raise validation.ValidationError: a rule has more findings than its limit
+        """
+        try:
+            report = validation.Validator(rules, examples).run(self)
+        except validation.ValidationError as exc:
+            self.validation_report = exc.report
+            logging.warning("[WARNING] %s", exc.report.summary())
+            raise
+
+        self.validation_report = report
+        if report:
+            logging.info("[INFO] %s texts passed %s rules", report.checked, len(rules))
+        else:
+            for line in report.summary().splitlines():
+                logging.warning("[WARNING] %s", line)
+
+        return self
+
     def strip_empty(self):
-        return self.strip_custom(lambda x: x, use_tagged=False)
+        return self.strip_custom(columns.not_empty(), use_tagged=False)
 
     def strip_custom(self, func, use_tagged=True):
         """
         Strip paragraphs matching to a custom function(text) -> true if keep, falsy if get rid of
 
-        :param func: custom function
+        :param func: custom function, columns predicates are applied on all paragraphs at once
         :param use_tagged: use tagged or untagged version of paragraph's text
         """
+        table = self.table() if isinstance(func, columns.Predicate) else None
+        if table is not None:
+            keep = func.mask(table, use_tagged)
+            for paragraph in table.select(~keep):
+                logging.info("[INFO] Discarding paragraph %s" % paragraph)
+                self.discarded.append(paragraph)
+            self._set_table(table.take(keep))
+            return self
+
         new_pars = []
 
         for paragraph in self.paragraphs:
@@ -177,10 +361,36 @@ class Document:
                 new_pars.append(paragraph)
             else:
                 logging.info("[INFO] Discarding paragraph %s" % paragraph)
+                self.discarded.append(paragraph)
 
         self.paragraphs = new_pars
         return self
 
+    def strip_running_headers(self, depth=1, min_pages=3, min_ratio=0.4, max_gap=5, max_length=80):
+        """
+        Strip running headers, footers and page numbers found by recurrence on top or bottom of pages
+
+        :param depth: how many paragraphs at top and bottom of page may be headers/footers
+        :param min_pages: minimal number of pages of a run of pages header should be found on
+        :param min_ratio: minimal share of pages of the run header should be found on
+        :param max_gap: most pages between recurrences of header in one run
+        :param max_length: longer paragraphs are never headers
+        :return: self, report of removed headers (key -> dict(position, pages, example)) is in self.headers_report
+        """
+        remove, report = headers.detect(self.paragraphs, depth=depth, min_pages=min_pages, min_ratio=min_ratio,
+                                        max_gap=max_gap, max_length=max_length)
+
+        for key, found in report.items():
+            logging.info("[INFO] Running %s '%s' found on %s pages, e.g. %s", found['position'], key, found['pages'],
+                         found['example'])
+
+        self.discarded.extend(paragraph for i, paragraph in enumerate(self.paragraphs) if i in remove)
+        self.paragraphs = [paragraph for i, paragraph in enumerate(self.paragraphs) if i not in remove]
+        logging.info("[INFO] Stripped %s running headers and page numbers", len(remove))
+        self.headers_report = report
+
+        return self
+
     def strip_footnotes(self, generator, max_gen=20):
         """
         Decide which paragraphs are footnotes and split them into other array
@@ -190,21 +400,30 @@ class Document:
         """
         gen_arr = [next(generator) for i in range(max_gen)]
 
-        new_pars = []
+        table = self.table()
+        if table is not None:  # only pages with a paragraph starting with the first mark may have footnotes
+            keep = ~table.on_pages_with(table.startswith(gen_arr[0]))
+            candidates = table.indices(~keep)
+        else:
+            keep = [False] * len(self.paragraphs)
+            candidates = range(len(self.paragraphs))
         footnote_num = 0
         cur_page = 1
+        previous = -1
 
-        for paragraph in self.paragraphs:
-            if paragraph.page_num != cur_page:
+        for i in candidates:
+            paragraph = self.paragraphs[i]
+            if paragraph.page_num != cur_page or i != previous + 1:
                 # new page
                 footnote_num = 0
                 cur_page = paragraph.page_num
+            previous = i
 
             if not str(paragraph.text_untagged).startswith(gen_arr[footnote_num]):
                 if footnote_num == 0:
                     # ordinary paragraph
 
-                    new_pars.append(paragraph)
+                    keep[i] = True
 
                 else:
                     # continuation of previous paragraph
@@ -223,7 +442,10 @@ class Document:
                                                footnote_num))
                 footnote_num += 1
 
-        self.paragraphs = new_pars
+        if table is not None:
+            self._set_table(table.take(keep))
+        else:
+            self.paragraphs = [paragraph for paragraph, kept in zip(self.paragraphs, keep) if kept]
         return self
 
     def replace_footnotes(self, generator, max_gen=20):
@@ -275,24 +497,39 @@ class Document:
                                                                                                            self.footnotes)))
         else:
             logging.info("There are %s footnotes for now" % total_count)
+        self.footnote_links = total_count
 
         return self
 
     def merge_paragraphs(self):
         """
-        Iterate over paragraphs and compile those which were split
+        Compile paragraphs which were split: runs of paragraphs starting with a lowercase letter are found
+        over the whole table at once and joined to the paragraph before them
         Do only when you don't care about original page ordering anymore!
         """
-        new_pars = []
-
-        for paragraph in self.paragraphs:
-            if str(paragraph.text_untagged[0]).islower() and len(new_pars) > 0:
-                logging.info("[CHANGED] Merging paragraphs %s and %s", new_pars[-1:][0], paragraph)
-                new_pars[-1:][0] += paragraph
-            else:
-                new_pars.append(paragraph)
-
-        self.paragraphs = new_pars
+        table = self.table()
+        if table is not None:
+            starts = table.merge_groups()
+            joined = table.joined(starts)
+        else:
+            starts = [i for i, paragraph in enumerate(self.paragraphs)
+                      if not i or not paragraph.text_untagged[:1].islower()]
+            joined = [(first, last) for first, last in zip(starts, starts[1:] + [len(self.paragraphs)])
+                      if last - first > 1]
+
+        for first, last in joined:
+            paragraph = self.paragraphs[first]
+            offset = len(paragraph.text_untagged)
+            for other in self.paragraphs[first + 1:last]:
+                journal.record('merge_paragraphs', paragraph.id, paragraph.page_num, offset, '\n', ' ',
+                               "[CHANGED] Merging paragraphs %s and %s", paragraph, other)
+                offset += 1 + len(other.text_untagged)
+            paragraph.join(self.paragraphs[first + 1:last])
+
+        if table is not None:
+            self._set_table(table.merge(starts))
+        else:
+            self.paragraphs = [self.paragraphs[i] for i in starts]
 
         return self
 
@@ -304,16 +541,54 @@ class Document:
         :param apply_on_untagged: apply also on untagged version
         :return:
         """
-        for i, paragraph in enumerate(self.paragraphs):
-            logging.info("[START] Apply %s on paragraph %s (tagged version)", func.__name__, paragraph)
-            self.paragraphs[i].text = func(paragraph.text)
-
+        for paragraph in self.paragraphs:
             if apply_on_untagged:
-                logging.info("[START] Apply %s on paragraph %s (untagged version)", func.__name__, paragraph)
-                self.paragraphs[i].text_untagged = func(paragraph.text_untagged)
+                paragraph.text = self.apply_parser(func, paragraph, paragraph.text, journaled=False)
+                text_untagged = self.apply_parser(func, paragraph, paragraph.text_untagged)
+                if text_untagged != paragraph.text_untagged:
+                    paragraph.text_untagged = text_untagged
+                    paragraph.dirty = True
+            else:
+                paragraph.text = self.apply_parser(func, paragraph, paragraph.text)
+            progress.advance()
 
         return self
 
+    @staticmethod
+    def apply_parser(func, element, text, journaled=True):
+        """
+        Apply func on text of paragraph or footnote, changes go to journal.
+        Texts rejected by prefilter of parser are returned as they are without calling it,
+        with enabled watchdog the call is limited by time budgets
+
+        :param journaled: False for the pass which would report the same changes twice
+        :return: new text
+        """
+        if not registry.applies(func, text):
+            return text
+
+        if watchdog.WATCHDOG is not None:
+            return watchdog.WATCHDOG.call(func, element, text,
+                                          lambda: Document._journaled_call(func, element, text, journaled))
+
+        return Document._journaled_call(func, element, text, journaled)
+
+    @staticmethod
+    def _journaled_call(func, element, text, journaled):
+        if journal.JOURNAL is None:
+            return func(text)
+
+        if not journaled:
+            with journal.context(func.__name__):
+                return func(text)
+
+        with journal.context(func.__name__, element.id, element.page_num) as changes:
+            new_text = func(text)
+        if not changes[0] and new_text != text:  # parser doesn't report its changes itself
+            journal.JOURNAL.record(func.__name__, element.id, element.page_num, *journal.trimmed_diff(text, new_text))
+
+        return new_text
+
     def prepare_footnotes(self, func, apply_on_untagged=True):
         """
         Replace output of given func as text to all footnotes
@@ -322,12 +597,11 @@ class Document:
         :param apply_on_untagged: apply also on untagged version
         :return:
         """
-        for i, footnote in enumerate(self.footnotes):
-            logging.info("[START] Apply %s on footnote %s (tagged version)", func.__name__, footnote)
-            self.footnotes[i].text = func(footnote.text)
+        for footnote in self.footnotes:
+            footnote.text = self.apply_parser(func, footnote, footnote.text, journaled=not apply_on_untagged)
             if apply_on_untagged:
-                logging.info("[START] Apply %s on footnote %s (untagged version)", func.__name__, footnote)
-                self.footnotes[i].text_untagged = func(footnote.text_untagged)
+                footnote.text_untagged = self.apply_parser(func, footnote, footnote.text_untagged)
+            progress.advance()
 
     def _write_paragraph(self, paragraph, document, cursor):
         tag = ""
@@ -411,18 +685,16 @@ class Document:
 
         return styling
 
-    def write(self, filename):
+    def write(self, filename, desktop=None):
         """
         Write content to file
 
         :param filename: file to write
+        :param desktop: office desktop to use, connect to office if None
         :return:
         """
 
-        local = uno.getComponentContext()
-        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
-        context = resolver.resolve("uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext")
-        desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        desktop = unotrace.wrap(desktop) if desktop is not None else office.get_desktop()
 
         url = "private:factory/swriter"
 
@@ -430,37 +702,215 @@ class Document:
         text = document.Text
 
         cursor = text.createTextCursor()
-        for paragraph in self.paragraphs:
-            text.insertString(cursor, '\t', 0)
-            self._write_paragraph(paragraph, document, cursor)
-            text.insertString(cursor, '\r', 0)
+        try:
+            for paragraph in self.paragraphs:
+                text.insertString(cursor, '\t', 0)
+                self._write_paragraph(paragraph, document, cursor)
+                text.insertString(cursor, '\r', 0)
+                progress.advance()
 
-        document.storeAsURL('file://' + path.realpath(filename), ())
-        document.dispose()
+            document.storeAsURL('file://' + path.realpath(filename), ())
+        finally:
+            document.dispose()  # cancelled or failed half-built document doesn't stay in office
+
+        return self
+
+    @staticmethod
+    def _go_right(cursor, count, expand):
+        while count > 0:  # goRight takes a short
+            step = min(count, 32767)
+            cursor.goRight(step, expand)
+            count -= step
+
+    def write_in_place(self, filename=None, remove_discarded=True):
+        """
+        Apply changes back to the source document instead of building a new one.
+        Only changed (dirty) paragraphs are touched, so formatting, images and layout elsewhere stay as they were.
+        Changes are taken from untagged text, so transforms should be applied with apply_on_untagged=True
+
+        :param filename: file to save to, or None to store the source document itself
+        :param remove_discarded: also remove paragraphs dropped with strip_* from the document
+        :return:
+        """
+        if self.model is None:
+            raise Exception("Document was not read from model, nothing to write in place")
+
+        if self.footnotes:
+            raise Exception("Footnotes can't be written in place, use write()")
+
+        text = self.model.Text
+        changed = 0
+        joints = []  # (id of origin before joint, id of origin after it), paragraphs between are removed with joint
+
+        for paragraph in self.paragraphs:
+            progress.advance()  # cancelled run leaves the source document changed but not stored
+            if not paragraph.dirty:
+                continue
+
+            for kind, k, start, end, replacement in reversed(paragraph.write_operations()):
+                if kind == 'text':
+                    cursor = text.createTextCursorByRange(paragraph.origin[k].getStart())
+                    self._go_right(cursor, start, False)
+                    self._go_right(cursor, end - start, True)
+                else:  # joint between merged paragraphs k and k + 1, stripped ones may lie between them
+                    cursor = text.createTextCursorByRange(paragraph.origin[k].getEnd())
+                    cursor.gotoRange(paragraph.origin[k + 1].getStart(), True)
+                    joints.append((paragraph.origin_ids[k], paragraph.origin_ids[k + 1]))
+
+                cursor.setString(replacement)
+
+            paragraph.commit()
+            changed += 1
+
+        if remove_discarded:
+            joints.sort()
+            origins = sorted(((origin_id, origin) for paragraph in self.discarded
+                              for origin_id, origin in zip(paragraph.origin_ids, paragraph.origin)),
+                             key=itemgetter(0), reverse=True)
+
+            # from the end of document, removing a paragraph with its break takes the node of the next one
+            for origin_id, origin in origins:
+                joint = bisect.bisect(joints, (origin_id,)) - 1
+                if joint >= 0 and joints[joint][1] > origin_id:
+                    continue  # already removed with joint
+
+                cursor = text.createTextCursorByRange(origin.getStart())
+                cursor.gotoEndOfParagraph(True)
+                cursor.goRight(1, True)
+                cursor.setString('')
+
+            logging.info("[INFO] Removed %s discarded paragraphs", len(self.discarded))
+            self.discarded = []
+
+        logging.info("[INFO] Written %s changed paragraphs in place", changed)
+
+        if filename:
+            self.model.storeAsURL('file://' + path.realpath(filename), ())
+        else:
+            self.model.store()
 
         return self
 
 
 class Paragraph:
     def __init__(self, page_num, text, text_untagged, origin):
+        self.id = next(IDS)
         self.page_num = page_num
         self.text = text
         self.text_untagged = text_untagged
         self.origin = [origin]
+        self.origin_ids = [self.id]  # ids of paragraphs origin was read as, they grow in source document order
+        self.original = [text_untagged]  # untagged texts of origin as they are in source document
+        self.dirty = False
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self.stamp = next(STAMPS)  # Document.table() is read again when it's greater than stamps table has seen
+
+    @property
+    def text_untagged(self):
+        return self._text_untagged
+
+    @text_untagged.setter
+    def text_untagged(self, value):
+        self._text_untagged = value
+        self.stamp = next(STAMPS)
 
     def __repr__(self):
         return "<Paragraph page:%s text: %s>" % (self.page_num,
                                                  textwrap.shorten(self.text_untagged, width=30))
 
     def __iadd__(self, other):
-        self.text += " " + other.text
-        self.text_untagged += " " + other.text_untagged
-        self.origin.extend(other.origin)
+        return self.join([other])
+
+    def join(self, others):
+        """
+        Append texts of others separated with spaces, in one go for a run of split paragraphs
+        """
+        self.text = " ".join([self.text] + [other.text for other in others])
+        self.text_untagged = " ".join([self.text_untagged] + [other.text_untagged for other in others])
+        for other in others:
+            self.origin.extend(other.origin)
+            self.origin_ids.extend(other.origin_ids)
+            self.original.extend(other.original)
+        self.dirty = True
         return self
 
+    def edits(self):
+        """
+        Spans of source text changed by transforms
+
+        :return: list of (start, end, replacement) in coordinates of origins joined with spaces
+        """
+        matcher = SequenceMatcher(None, " ".join(self.original), self.text_untagged, autojunk=False)
+
+        return [(i1, i2, self.text_untagged[j1:j2])
+                for op, i1, i2, j1, j2 in matcher.get_opcodes() if op != 'equal']
+
+    def write_operations(self):
+        """
+        Split edits into operations on separate origin paragraphs and joints between them (paragraph breaks)
+
+        :return: list of (kind, origin index, start, end, replacement) ordered by position,
+                 start and end are local to origin for 'text' kind
+        """
+        segments = []
+        position = 0
+        for k, original in enumerate(self.original):
+            if k:
+                segments.append(['joint', k - 1, position, position + 1, " "])
+                position += 1
+            segments.append(['text', k, position, position + len(original), None])
+            position += len(original)
+
+        operations = []
+        for start, end, replacement in self.edits():
+            for segment in segments:
+                kind, k, seg_start, seg_end = segment[:4]
+
+                if start == end:  # insertion goes to the first text segment it touches
+                    if kind == 'text' and seg_start <= start <= seg_end:
+                        operations.append(('text', k, start - seg_start, start - seg_start, replacement))
+                        break
+                elif start < seg_end and end > seg_start:
+                    if kind == 'joint':
+                        segment[4] = replacement
+                    else:
+                        operations.append(('text', k, max(start, seg_start) - seg_start,
+                                           min(end, seg_end) - seg_start, replacement))
+                    replacement = ""  # the rest of span is removed
+
+        operations.extend((kind, k, 0, 0, joint) for kind, k, seg_start, seg_end, joint in segments
+                          if kind == 'joint')
+        operations.sort(key=lambda x: (self._position(segments, x), x[0] == 'joint'))
+
+        return operations
+
+    @staticmethod
+    def _position(segments, operation):
+        kind, k = operation[:2]
+        for segment in segments:
+            if segment[0] == kind and segment[1] == k:
+                return segment[2] + operation[2]
+
+    def commit(self):
+        """
+        Mark current state as written to source document
+        """
+        self.origin = self.origin[:1]
+        self.origin_ids = self.origin_ids[:1]
+        self.original = [self.text_untagged]
+        self.dirty = False
+
 
 class Footnote:
     def __init__(self, page_num, text, text_untagged, starts_with, num_on_page):
+        self.id = next(IDS)
         self.page_num = page_num
         self.num_on_page = num_on_page
         self.text = self._cut_startswith(str(text).strip(), starts_with)
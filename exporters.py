@@ -0,0 +1,317 @@
+"""
+Streaming exporters of Document to UTF-8 plain text, Markdown and EPUB, without office
+
+Paragraphs are rendered and written one by one, footnotes ({{N}} links placed by replace_footnotes point
+to document.footnotes[N - 1]) are written after them, so export time is linear and memory doesn't grow
+with the document. EPUB is written straight into the zip archive, paragraphs split into chapter files.
+
+    script.py book.hocr -o book.md
+    script.py --resume out.jsonl.gz -o book.epub --title "..."
+"""
+import io
+import logging
+import os
+import re
+import time
+import uuid
+import zipfile
+from os import path
+from xml.sax.saxutils import escape
+
+import progress
+from elements import TAG_RE, TAGS
+
+STYLES = ('bold', 'italic', 'underlined')
+STYLE_TAGS = {
+    TAGS['open_bold']: ('bold', True),
+    TAGS['close_bold']: ('bold', False),
+    TAGS['open_italic']: ('italic', True),
+    TAGS['close_italic']: ('italic', False),
+    TAGS['open_underline']: ('underlined', True),
+    TAGS['close_underline']: ('underlined', False),
+}
+
+MARKDOWN_MARKS = dict(bold=('**', '**'), italic=('_', '_'), underlined=('<u>', '</u>'))
+MARKDOWN_ESCAPE_RE = re.compile(r'([\\`*_\[\]<>&])')
+MARKDOWN_BLOCK_RE = re.compile(r'^([#>+=|-])|^(\d+)([.)])')  # would start a heading, quote, list...
+
+XHTML_TAGS = dict(bold='b', italic='i', underlined='u')
+CHAPTER_PARAGRAPHS = 500  # paragraphs per EPUB chapter file, readers are slow on big ones
+
+EPUB_CONTAINER = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+XHTML_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="%(language)s" \
+xml:lang="%(language)s">
+<head><title>%(title)s</title></head>
+<body>
+"""
+XHTML_TAIL = "</body>\n</html>\n"
+
+
+def runs(text):
+    """
+    Split tagged text into runs of the same style
+
+    :param text: tagged text of paragraph or footnote
+    :return: iterator of (string, style, footnote): style is a tuple of STYLES applied to string,
+        footnote is the number of footnote linked right after string or None
+    """
+    style = dict.fromkeys(STYLES, False)
+    last = 0
+
+    for match in TAG_RE.finditer(text):
+        string = text[last:match.start()]
+        last = match.end()
+        tag = match.group(1)
+
+        if tag.isdecimal():
+            yield string, tuple(x for x in STYLES if style[x]), int(tag)
+            continue
+
+        if string:
+            yield string, tuple(x for x in STYLES if style[x]), None
+        if match.group() in STYLE_TAGS:
+            key, value = STYLE_TAGS[match.group()]
+            style[key] = value
+        else:
+            logging.warning("[WARNING] Unknown tag %s", tag)
+
+    if last < len(text):
+        yield text[last:], tuple(x for x in STYLES if style[x]), None
+
+
+def _joined(text):
+    """
+    Runs of text with whitespace-only strings given to neighbours and same style runs joined,
+    so emphasis marks always wrap words
+
+    :return: list of [string, style, footnotes]
+    """
+    result = []
+
+    for string, style, footnote in runs(text):
+        if result and (result[-1][1] == style or not string.strip()) and not result[-1][2]:
+            result[-1][0] += string
+        elif result and not result[-1][0].strip() and not result[-1][2]:
+            result[-1] = [result[-1][0] + string, style, []]
+        else:
+            result.append([string, style, []])
+        if footnote is not None:
+            result[-1][2].append(footnote)
+
+    return result
+
+
+def plain(text):
+    """
+    :return: text without tags, footnote links as [N]
+    """
+    return ''.join(string + ('[%s]' % footnote if footnote is not None else '') for string, style, footnote
+                   in runs(text))
+
+
+def write_text(document, file_h):
+    """
+    Write paragraphs one per line, then footnotes as [N] text
+
+    :param file_h: text file to write to
+    """
+    for paragraph in document.paragraphs:
+        file_h.write(plain(paragraph.text).strip() + '\n')
+        progress.advance()
+
+    if document.footnotes:
+        file_h.write('\n')
+    for number, footnote in enumerate(document.footnotes, 1):
+        file_h.write('[%s] %s\n' % (number, plain(footnote.text).strip()))
+
+
+def markdown(text):
+    """
+    :return: text as Markdown: bold **...**, italic _..._, underlined <u>...</u>, footnote links [^N]
+    """
+    parts = []
+
+    for string, style, footnotes in _joined(text):
+        string = MARKDOWN_ESCAPE_RE.sub(r'\\\1', string)
+        core = string.strip()
+        refs = ''.join('[^%s]' % footnote for footnote in footnotes)
+        if not core or not style:
+            parts.append(string + refs)
+            continue
+
+        lead = string[:len(string) - len(string.lstrip())]
+        trail = string[len(string.rstrip()):]
+        parts.append(lead + ''.join(MARKDOWN_MARKS[x][0] for x in style) + core +
+                     ''.join(MARKDOWN_MARKS[x][1] for x in reversed(style)) + refs + trail)
+
+    return MARKDOWN_BLOCK_RE.sub(lambda m: '\\' + m.group(1) if m.group(1) else m.group(2) + '\\' + m.group(3),
+                                 ''.join(parts).strip().replace('\n', ' '))
+
+
+def write_markdown(document, file_h):
+    """
+    Write paragraphs separated with empty lines, then footnote definitions [^N]: text
+
+    :param file_h: text file to write to
+    """
+    for paragraph in document.paragraphs:
+        file_h.write(markdown(paragraph.text) + '\n\n')
+        progress.advance()
+
+    for number, footnote in enumerate(document.footnotes, 1):
+        file_h.write('[^%s]: %s\n' % (number, markdown(footnote.text)))
+
+
+def xhtml(text, link=None):
+    """
+    :param link: function(footnote number) -> markup of footnote link, <sup>N</sup> if None
+    :return: text as XHTML fragment: <b>, <i>, <u> and footnote links
+    """
+    parts = []
+
+    for string, style, footnote in runs(text):
+        string = escape(string)
+        if string and style:
+            string = ''.join('<%s>' % XHTML_TAGS[x] for x in style) + string + \
+                ''.join('</%s>' % XHTML_TAGS[x] for x in reversed(style))
+        parts.append(string)
+        if footnote is not None:
+            parts.append(link(footnote) if link else '<sup>%s</sup>' % footnote)
+
+    return ''.join(parts)
+
+
+def write_epub(document, filename, title=None, language='ru', chapter_paragraphs=CHAPTER_PARAGRAPHS):
+    """
+    Write EPUB 3 book: paragraphs go to chapter files as they come, footnotes to a notes file
+    with links both ways
+
+    :param filename: file or binary file object to write to
+    :param title: book title, file name by default
+    :param language: book language
+    :param chapter_paragraphs: paragraphs per chapter file
+    """
+    if title is None:
+        title = path.splitext(path.basename(filename))[0] if isinstance(filename, str) else 'Untitled'
+    head = XHTML_HEAD % dict(language=language, title=escape(title))
+    chapters = []
+    referenced = {}  # footnote number -> chapter file with its first link
+
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as epub:
+        epub.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        epub.writestr('META-INF/container.xml', EPUB_CONTAINER)
+
+        def link(number):
+            anchor = ''
+            if number not in referenced:
+                referenced[number] = chapters[-1]
+                anchor = ' id="ref%s"' % number
+            return '<sup><a epub:type="noteref"%s href="notes.xhtml#fn%s">%s</a></sup>' % (anchor, number, number)
+
+        file_h = None
+        try:
+            for index, paragraph in enumerate(document.paragraphs):
+                if index % chapter_paragraphs == 0:
+                    if file_h is not None:
+                        file_h.write(XHTML_TAIL)
+                        file_h.close()
+                    chapters.append('text-%04d.xhtml' % len(chapters))
+                    file_h = io.TextIOWrapper(epub.open('OEBPS/' + chapters[-1], 'w'), encoding='utf-8')
+                    file_h.write(head)
+                file_h.write('<p>%s</p>\n' % xhtml(paragraph.text, link))
+                progress.advance()
+        except BaseException:
+            if file_h is not None:
+                file_h.close()  # zip can't be closed with entry open
+            raise
+
+        if file_h is None:  # spine can't be empty
+            chapters.append('text-0000.xhtml')
+            epub.writestr('OEBPS/' + chapters[-1], head + XHTML_TAIL)
+        else:
+            file_h.write(XHTML_TAIL)
+            file_h.close()
+
+        if document.footnotes:
+            with io.TextIOWrapper(epub.open('OEBPS/notes.xhtml', 'w'), encoding='utf-8') as file_h:
+                file_h.write(head)
+                for number, footnote in enumerate(document.footnotes, 1):
+                    back = str(number)
+                    if number in referenced:
+                        back = '<a href="%s#ref%s">%s</a>' % (referenced[number], number, number)
+                    file_h.write('<aside epub:type="footnote" id="fn%s"><p>%s. %s</p></aside>\n' % (
+                        number, back, xhtml(footnote.text.strip())))
+                file_h.write(XHTML_TAIL)
+
+        documents = chapters + (['notes.xhtml'] if document.footnotes else [])
+        epub.writestr('OEBPS/nav.xhtml', head + '<nav epub:type="toc" id="toc"><ol>\n' + ''.join(
+            '<li><a href="%s">%s</a></li>\n' % (name, index) for index, name in enumerate(documents, 1)) +
+            '</ol></nav>\n' + XHTML_TAIL)
+        epub.writestr('OEBPS/content.opf', _package(title, language, documents))
+
+    return filename
+
+
+def _package(title, language, documents):
+    items = ['<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>']
+    items.extend('<item id="d%s" href="%s" media-type="application/xhtml+xml"/>' % (index, name)
+                 for index, name in enumerate(documents))
+    spine = ''.join('<itemref idref="d%s"/>' % index for index in range(len(documents)))
+
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="id">urn:uuid:%s</dc:identifier>
+    <dc:title>%s</dc:title>
+    <dc:language>%s</dc:language>
+    <meta property="dcterms:modified">%s</meta>
+  </metadata>
+  <manifest>
+    %s
+  </manifest>
+  <spine>%s</spine>
+</package>
+""" % (uuid.uuid5(uuid.NAMESPACE_URL, title), escape(title), escape(language),
+       time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), '\n    '.join(items), spine)
+
+
+TEXT_EXPORTERS = {'.txt': write_text, '.md': write_markdown, '.markdown': write_markdown}
+EXTENSIONS = tuple(TEXT_EXPORTERS) + ('.epub',)
+
+
+def supports(filename):
+    return path.splitext(filename)[1].lower() in EXTENSIONS
+
+
+def export(document, filename, title=None):
+    """
+    Write document to file of format given by extension: .txt, .md, .epub
+
+    :param title: book title for EPUB
+    """
+    extension = path.splitext(filename)[1].lower()
+    if extension not in EXTENSIONS:
+        raise Exception("Unknown export format: %s" % filename)
+
+    try:
+        if extension == '.epub':
+            write_epub(document, filename, title=title)
+        else:
+            with open(filename, 'w', encoding='utf-8', newline='\n') as file_h:
+                TEXT_EXPORTERS[extension](document, file_h)
+    except BaseException:
+        if path.exists(filename):  # cancelled or failed export leaves no half-written file
+            os.remove(filename)
+        raise
+
+    logging.info("[INFO] Exported %s paragraphs and %s footnotes to %s", len(document.paragraphs),
+                 len(document.footnotes), filename)
+    return document
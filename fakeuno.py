@@ -0,0 +1,554 @@
+"""
+In-process stand-in for the part of UNO text API used by this project, for benchmarks and offline runs
+
+    desktop = FakeDesktop(FakeDocument(readers.read_hocr('book.hocr')), latency=0.0002)
+    office.use(desktop)
+    document = Document().from_model(desktop.getCurrentComponent())
+
+Every public method call and property get/set goes through Bridge, which counts it
+and waits for `latency` seconds to simulate the socket bridge.
+"""
+import json
+import time
+from urllib.parse import unquote, urlparse
+
+DEFAULT_PROPS = dict(CharWeight=100.0, CharPosture='NONE', CharUnderline=0)
+
+
+class Bridge:
+    def __init__(self, latency=0.0):
+        """
+        :param latency: seconds added to every call
+        """
+        self.latency = latency
+        self.calls = 0
+        self.per_name = {}
+
+    def call(self, name):
+        self.calls += 1
+        self.per_name[name] = self.per_name.get(name, 0) + 1
+
+        if self.latency:
+            if self.latency >= 0.001:
+                time.sleep(self.latency)
+            else:  # sleep() is too coarse for microseconds
+                deadline = time.perf_counter() + self.latency
+                while time.perf_counter() < deadline:
+                    pass
+
+    def reset(self):
+        self.calls = 0
+        self.per_name = {}
+
+
+class FakeObject:
+    __uno_remote__ = True
+    _local_names = ()  # public names which are not part of UNO API
+
+    def __init__(self, bridge):
+        object.__setattr__(self, '_bridge', bridge)
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if name[:1] == '_' or name in object.__getattribute__(self, '_local_names'):
+            return value
+
+        bridge = object.__getattribute__(self, '_bridge')
+        if callable(value):
+            def call(*args, **kwargs):
+                bridge.call(name)
+                return value(*args, **kwargs)
+
+            return call
+
+        bridge.call(name)
+        return value
+
+    def __setattr__(self, name, value):
+        if name[:1] != '_':
+            object.__getattribute__(self, '_bridge').call(name)
+        object.__setattr__(self, name, value)
+
+
+class FakeEnum:
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return "<FakeEnum %s>" % self.value
+
+
+def _enum_value(value):
+    return getattr(value, 'value', value)
+
+
+class _Run:
+    __slots__ = ('string', 'props', 'footnote')
+
+    def __init__(self, string, props, footnote=None):
+        self.string = string
+        self.props = props
+        self.footnote = footnote
+
+
+class FakeEnumeration(FakeObject):
+    def __init__(self, bridge, elements):
+        super().__init__(bridge)
+        self._elements = list(elements)
+        self._index = 0
+
+    def hasMoreElements(self):
+        return self._index < len(self._elements)
+
+    def nextElement(self):
+        self._index += 1
+        return self._elements[self._index - 1]
+
+
+class FakePortion(FakeObject):
+    def __init__(self, bridge, run):
+        super().__init__(bridge)
+        self._run = run
+
+    @property
+    def String(self):
+        return self._run.string
+
+    @property
+    def CharWeight(self):
+        return self._run.props['CharWeight']
+
+    @property
+    def CharPosture(self):
+        return FakeEnum(self._run.props['CharPosture'])
+
+    @property
+    def CharUnderline(self):
+        return self._run.props['CharUnderline']
+
+    @property
+    def TextPortionType(self):
+        return 'Footnote' if self._run.footnote else 'Text'
+
+
+class FakeRange(FakeObject):
+    def __init__(self, text, start, end=None):
+        super().__init__(text._bridge)
+        self._text = text
+        self._start = start
+        self._end = end or start
+
+    def getStart(self):
+        return FakeRange(self._text, self._start)
+
+    def getEnd(self):
+        return FakeRange(self._text, self._end)
+
+    def getText(self):
+        return self._text
+
+    def createEnumeration(self):
+        start, end = self._text._ordered(self._start, self._end)
+        paragraphs = self._text._paragraphs
+        return FakeEnumeration(self._bridge, paragraphs[paragraphs.index(start[0]):paragraphs.index(end[0]) + 1])
+
+    @property
+    def String(self):
+        return self._text._string(self._start, self._end)
+
+
+class FakeParagraph(FakeObject):
+    def __init__(self, text, page, runs=None):
+        super().__init__(text._bridge)
+        self._text = text
+        self._page = page
+        self._runs = runs or []
+
+    def _length(self):
+        return sum(len(run.string) for run in self._runs)
+
+    def _split(self, offset):
+        """
+        Make run boundary at offset
+
+        :return: index of run starting at offset
+        """
+        position = 0
+        for i, run in enumerate(self._runs):
+            if position == offset:
+                return i
+            if position < offset < position + len(run.string):
+                cut = offset - position
+                self._runs[i:i + 1] = [_Run(run.string[:cut], run.props, run.footnote),
+                                       _Run(run.string[cut:], run.props)]
+                return i + 1
+            position += len(run.string)
+
+        return len(self._runs)
+
+    def _props_at(self, offset):
+        """
+        Formatting of character at offset, of the last one if offset is at the end
+        """
+        position = 0
+        props = DEFAULT_PROPS
+        for run in self._runs:
+            if position + len(run.string) > offset:
+                return run.props
+            props = run.props
+            position += len(run.string)
+
+        return props
+
+    def getStart(self):
+        return FakeRange(self._text, (self, 0))
+
+    def getEnd(self):
+        return FakeRange(self._text, (self, self._length()))
+
+    def _value(self):
+        return ''.join(run.string for run in self._runs)
+
+    def createEnumeration(self):
+        return FakeEnumeration(self._bridge, [FakePortion(self._bridge, run) for run in self._runs])
+
+    @property
+    def String(self):
+        return self._value()
+
+
+class FakeCursor(FakeRange):
+    def __init__(self, text, start, end=None):
+        super().__init__(text, start, end)
+        object.__setattr__(self, '_props', dict(DEFAULT_PROPS))
+
+    def __setattr__(self, name, value):
+        if name in DEFAULT_PROPS:
+            object.__getattribute__(self, '_bridge').call(name)
+            self._props[name] = _enum_value(value)
+        else:
+            super().__setattr__(name, value)
+
+    def gotoRange(self, text_range, expand):
+        if expand:
+            self._end = text_range._end
+        else:
+            self._start, self._end = text_range._start, text_range._end
+
+    def _move(self, count):
+        paragraph, offset = self._end
+        paragraphs = self._text._paragraphs
+        index = paragraphs.index(paragraph)
+        moved = True
+
+        while count > 0:
+            left = paragraph._length() - offset
+            if count <= left:
+                offset += count
+                break
+            elif index + 1 < len(paragraphs):  # paragraph break is one character
+                count -= left + 1
+                index += 1
+                paragraph, offset = paragraphs[index], 0
+            else:
+                offset = paragraph._length()
+                moved = False
+                break
+
+        return (paragraph, offset), moved
+
+    def goRight(self, count, expand):
+        self._end, moved = self._move(count)
+        if not expand:
+            self._start = self._end
+        return moved
+
+    def gotoStartOfParagraph(self, expand):
+        self._end = (self._end[0], 0)
+        if not expand:
+            self._start = self._end
+        return True
+
+    def gotoEndOfParagraph(self, expand):
+        paragraph = self._end[0]
+        self._end = (paragraph, paragraph._length())
+        if not expand:
+            self._start = self._end
+        return True
+
+    def collapseToEnd(self):
+        self._start = self._end
+
+    def setString(self, string):
+        start, end = self._text._ordered(self._start, self._end)
+        # replacement takes formatting of the first replaced character, insertion - of the previous one
+        props = start[0]._props_at(start[1] if start != end else max(start[1] - 1, 0))
+        self._text._delete(start, end)
+        self._start = start
+        self._end = self._text._insert(start, string, props)
+
+
+class FakeViewCursor(FakeCursor):
+    def getPage(self):
+        return self._end[0]._page
+
+    def _page_paragraphs(self, page):
+        return [paragraph for paragraph in self._text._paragraphs if paragraph._page == page]
+
+    def jumpToPage(self, page):
+        paragraphs = self._text._paragraphs
+        paragraph = next((x for x in paragraphs if x._page >= page), paragraphs[-1])
+        self._start = self._end = (paragraph, 0)
+        return True
+
+    def jumpToStartOfPage(self):
+        self._start = self._end = (self._page_paragraphs(self._end[0]._page)[0], 0)
+        return True
+
+    def jumpToEndOfPage(self):
+        paragraph = self._page_paragraphs(self._end[0]._page)[-1]
+        self._start = self._end = (paragraph, paragraph._length())
+        return True
+
+
+class FakeText(FakeObject):
+    def __init__(self, bridge, document, paragraphs=None):
+        """
+        :param paragraphs: iterable of (page_num, runs), runs are (string, fmt_dict) like readers.py yields
+        """
+        super().__init__(bridge)
+        self._document = document
+        self._paragraphs = []
+
+        for page_num, runs in paragraphs or [(1, [])]:
+            paragraph = FakeParagraph(self, page_num)
+            for string, fmt in runs:
+                paragraph._runs.append(_Run(string, dict(CharWeight=150.0 if fmt.get('bold') else 100.0,
+                                                         CharPosture='ITALIC' if fmt.get('italic') else 'NONE',
+                                                         CharUnderline=1 if fmt.get('underlined') else 0)))
+            self._paragraphs.append(paragraph)
+
+        if not self._paragraphs:
+            self._paragraphs.append(FakeParagraph(self, 1))
+
+    def _ordered(self, first, second):
+        key = lambda x: (self._paragraphs.index(x[0]), x[1])  # noqa: E731
+        return (first, second) if key(first) <= key(second) else (second, first)
+
+    def _string(self, start, end):
+        start, end = self._ordered(start, end)
+        first = self._paragraphs.index(start[0])
+        last = self._paragraphs.index(end[0])
+        if first == last:
+            return start[0]._value()[start[1]:end[1]]
+
+        strings = [start[0]._value()[start[1]:]]
+        strings += [paragraph._value() for paragraph in self._paragraphs[first + 1:last]]
+        strings.append(end[0]._value()[:end[1]])
+        return '\r'.join(strings)
+
+    def _delete(self, start, end):
+        paragraph, offset = start
+        last, last_offset = end
+
+        if paragraph is last:
+            i = paragraph._split(offset)
+            j = paragraph._split(last_offset)
+            del paragraph._runs[i:j]
+            return
+
+        i = paragraph._split(offset)
+        j = last._split(last_offset)
+        paragraph._runs[i:] = last._runs[j:]
+        first = self._paragraphs.index(paragraph)
+        del self._paragraphs[first + 1:self._paragraphs.index(last) + 1]
+
+    def _insert(self, position, string, props, footnote=None):
+        """
+        :return: position after inserted text
+        """
+        paragraph, offset = position
+        pieces = string.replace('\n', '\r').split('\r')
+
+        for k, piece in enumerate(pieces):
+            if k:  # paragraph break
+                i = paragraph._split(offset)
+                new_paragraph = FakeParagraph(self, paragraph._page, paragraph._runs[i:])
+                del paragraph._runs[i:]
+                self._paragraphs.insert(self._paragraphs.index(paragraph) + 1, new_paragraph)
+                paragraph, offset = new_paragraph, 0
+
+            if piece:
+                paragraph._runs.insert(paragraph._split(offset), _Run(piece, dict(props), footnote))
+                offset += len(piece)
+
+        return paragraph, offset
+
+    def createTextCursor(self):
+        return FakeCursor(self, (self._paragraphs[0], 0))
+
+    def createTextCursorByRange(self, text_range):
+        return FakeCursor(self, text_range._start, text_range._end)
+
+    def createEnumeration(self):
+        return FakeEnumeration(self._bridge, list(self._paragraphs))
+
+    def getStart(self):
+        return FakeRange(self, (self._paragraphs[0], 0))
+
+    def getEnd(self):
+        return FakeRange(self, (self._paragraphs[-1], self._paragraphs[-1]._length()))
+
+    def insertString(self, cursor, string, absorb):
+        if absorb:
+            start, end = self._ordered(cursor._start, cursor._end)
+            self._delete(start, end)
+            cursor._start = cursor._end = start
+
+        cursor._end = self._insert(cursor._end, string, cursor._props)
+        cursor._start = cursor._end
+
+    def insertTextContent(self, cursor, content, absorb):
+        if absorb:
+            cursor.setString('')
+
+        self._document._footnotes.append(content)
+        content._label = str(len(self._document._footnotes))
+        cursor._end = self._insert(cursor._end, content._label, cursor._props, footnote=content)
+        cursor._start = cursor._end
+
+    @property
+    def String(self):
+        return '\r'.join(paragraph._value() for paragraph in self._paragraphs)
+
+    def _dump(self):
+        return [[paragraph._page, [[run.string, run.props['CharWeight'] > 100, run.props['CharPosture'] == 'ITALIC',
+                                    run.props['CharUnderline'] > 0] + ([run.footnote._text._dump()]
+                                                                       if run.footnote else [])
+                                   for run in paragraph._runs]]
+                for paragraph in self._paragraphs]
+
+
+class FakeFootnote(FakeObject):
+    def __init__(self, bridge, document):
+        super().__init__(bridge)
+        self._label = ''
+        self._text = FakeText(bridge, document)
+
+    @property
+    def Text(self):
+        return self._text
+
+
+class FakeSelection(FakeObject):
+    def __init__(self, bridge, ranges):
+        super().__init__(bridge)
+        self._ranges = ranges
+
+    def getCount(self):
+        return len(self._ranges)
+
+    def getByIndex(self, index):
+        return self._ranges[index]
+
+
+class FakeController(FakeObject):
+    def __init__(self, document):
+        super().__init__(document._bridge)
+        self._document = document
+        self._view_cursor = None
+        self._selection = None
+
+    def select(self, text_range):
+        self._selection = FakeRange(self._document._text, text_range._start, text_range._end)
+        return True
+
+    def _get_view_cursor(self):
+        if self._view_cursor is None:
+            self._view_cursor = FakeViewCursor(self._document._text, (self._document._text._paragraphs[0], 0))
+        return self._view_cursor
+
+    def getSelection(self):
+        if self._selection is None:  # nothing selected, text cursor is where view cursor is
+            view_cursor = self._get_view_cursor()
+            self._selection = FakeRange(self._document._text, view_cursor._start, view_cursor._end)
+        return FakeSelection(self._bridge, [self._selection])
+
+    def getViewCursor(self):
+        return self._get_view_cursor()
+
+
+class FakeDocument(FakeObject):
+    def __init__(self, paragraphs=None, bridge=None):
+        """
+        :param paragraphs: iterable of (page_num, runs), see FakeText
+        :param bridge: Bridge shared with desktop, set by FakeDesktop
+        """
+        super().__init__(bridge or Bridge())
+        self._footnotes = []
+        self._text = FakeText(self._bridge, self, paragraphs)
+        self._controller = FakeController(self)
+        self._url = None
+        self._disposed = False
+
+    def _set_bridge(self, bridge):
+        for obj in [self, self._text, self._controller] + self._text._paragraphs:
+            object.__setattr__(obj, '_bridge', bridge)
+
+    @property
+    def Text(self):
+        return self._text
+
+    def getCurrentController(self):
+        return self._controller
+
+    def createInstance(self, service):
+        if service != "com.sun.star.text.Footnote":
+            raise Exception("Unsupported service %s" % service)
+
+        return FakeFootnote(self._bridge, self)
+
+    def storeAsURL(self, url, properties):
+        self._url = url
+        self.store()
+
+    def store(self):
+        if self._url is None:
+            raise Exception("Document has no location")
+
+        with open(unquote(urlparse(self._url).path), 'w', encoding='utf-8') as file_h:
+            json.dump(dict(paragraphs=self._text._dump()), file_h, ensure_ascii=False)
+
+    def dispose(self):
+        self._disposed = True
+
+
+class FakeDesktop(FakeObject):
+    _local_names = ('bridge',)
+
+    def __init__(self, current=None, latency=0.0):
+        """
+        :param current: FakeDocument to return as current component
+        :param latency: seconds added to every call
+        """
+        super().__init__(Bridge(latency))
+        self._current = current
+        self._documents = []
+
+        if current is not None:
+            current._set_bridge(self._bridge)
+
+    @property
+    def bridge(self):
+        return object.__getattribute__(self, '_bridge')
+
+    def getCurrentComponent(self):
+        return self._current
+
+    def loadComponentFromURL(self, url, target, flags, properties):
+        if url != "private:factory/swriter":
+            raise Exception("Only new documents are supported, got %s" % url)
+
+        document = FakeDocument(bridge=self._bridge)
+        self._documents.append(document)
+        return document
@@ -0,0 +1,106 @@
+"""
+Detection of running headers, footers and folios (page numbers) by their recurrence across pages
+
+First and last paragraphs of each page are normalized into keys (case, punctuation and numbers masked).
+A key is a header on a run of pages it recurs on (at most max_gap pages apart: running heads alternate
+between left and right pages, skip chapter openings and illustrations) if it's found on min_pages of them
+and on min_ratio share of all pages of the run. Besides page numbers, paragraphs shaped as text (a dialogue line, a sentence ending with . ! ?)
+are never headers, so '— Да.' on top of a few pages stays. One pass over paragraphs, linear in document size.
+"""
+import re
+from collections import defaultdict
+
+NUMBER_RE = re.compile(r'\d+|\b[ivxlcdm]+\b', re.IGNORECASE)  # arabic and roman numbers
+NON_WORD_RE = re.compile(r'[\W_]+')
+TEXT_SHAPE_RE = re.compile(r'^\W*?[—–-]\s*[^\W\d_]|[^\W\d_]\s*[.!?…]+[\W]*$')  # dialogue line, sentence
+
+
+def header_key(text):
+    """
+    Normalize paragraph text, so headers of different pages get the same key
+
+    :param text: untagged paragraph text
+    :return: key like 'глава 0 о вере' or '0' for a folio
+    """
+    text = NUMBER_RE.sub('0', text.lower())
+    return NON_WORD_RE.sub(' ', text).strip()
+
+
+def is_folio(key):
+    return set(key) <= set('0 ')
+
+
+def header_shaped(text, key):
+    """
+    :return: False if paragraph looks like running text (dialogue line, sentence), folios always pass
+    """
+    return is_folio(key) or TEXT_SHAPE_RE.search(text) is None
+
+
+def runs(pages, max_gap):
+    """
+    :param pages: sorted page numbers
+    :return: lists of pages at most max_gap apart
+    """
+    result = []
+    for page in pages:
+        if result and page - result[-1][-1] <= max_gap:
+            result[-1].append(page)
+        else:
+            result.append([page])
+
+    return result
+
+
+def detect(paragraphs, depth=1, min_pages=3, min_ratio=0.4, max_gap=5, max_length=80):
+    """
+    Find running headers and footers
+
+    :param paragraphs: list of Paragraph
+    :param depth: how many paragraphs at top and bottom of page may be headers/footers
+    :param min_pages: minimal number of pages of a run key should be found on
+    :param min_ratio: minimal share of pages of a run key should be found on (chapter titles as running heads
+                      recur only within chapter, so runs are counted, not all pages)
+    :param max_gap: most pages between recurrences of one run
+    :param max_length: longer paragraphs are never headers
+    :return: (indexes of paragraphs to remove, report dict: key -> dict(position, pages, example))
+    """
+    pages = {}  # page_num -> indexes of paragraphs on page, in order
+    for i, paragraph in enumerate(paragraphs):
+        pages.setdefault(paragraph.page_num, []).append(i)
+
+    candidates = []  # (position, key, index)
+    for indexes in pages.values():
+        edge = set()
+        for position, selected in (('top', indexes[:depth]), ('bottom', indexes[-depth:])):
+            for i in selected:
+                text = paragraphs[i].text_untagged
+                if i in edge or len(text) > max_length:
+                    continue
+                key = header_key(text)
+                if key and header_shaped(text, key):
+                    edge.add(i)
+                    candidates.append((position, key, i))
+
+    on_pages = defaultdict(set)  # (position, key) -> pages
+    for position, key, i in candidates:
+        on_pages[(position, key)].add(paragraphs[i].page_num)
+
+    header_pages = {}  # (position, key) -> pages of runs key is a header on
+    for found, key_pages in on_pages.items():
+        selected = set()
+        for run in runs(sorted(key_pages), max_gap):
+            if len(run) >= min_pages and len(run) >= min_ratio * (run[-1] - run[0] + 1):
+                selected.update(run)
+        if selected:
+            header_pages[found] = selected
+
+    remove = set()
+    report = {}
+    for position, key, i in candidates:
+        if paragraphs[i].page_num in header_pages.get((position, key), ()):
+            remove.add(i)
+            report.setdefault(key, dict(position=position, pages=len(header_pages[(position, key)]),
+                                        example=paragraphs[i].text_untagged))
+
+    return remove, report
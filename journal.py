@@ -0,0 +1,221 @@
+"""
+Journal of changes made by stages: (stage, paragraph id, page, offset, old, new) events
+
+Recording is an append to in-memory ring buffer, a background thread flushes events to JSON lines,
+so transforms never wait for disk. Without enabled journal changes go to logging as before.
+Offsets are positions in text as the stage got it.
+
+    python journal.py FILE [--stage old_spell] [--page 40] [--paragraph ID]
+"""
+import argparse
+import gzip
+import json
+import logging
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+JOURNAL = None
+
+Event = namedtuple('Event', 'stage paragraph page offset old new')
+
+
+class Journal:
+    def __init__(self, filename=None, capacity=100000, flush_interval=0.5):
+        """
+        :param filename: JSON lines file to flush events to (gzipped if name ends with .gz), None to keep in memory
+        :param capacity: events kept in memory, older are dropped from memory (but not from file)
+        :param flush_interval: seconds between flushes
+        """
+        self.filename = filename
+        self.events = deque(maxlen=capacity)
+        self.pending = deque()  # not flushed yet, appends and pops from different threads are atomic
+        self.local = threading.local()  # stage, paragraph and page being processed in this thread
+        self.recorded = 0
+
+        self.file_h = None
+        self.flush_lock = threading.Lock()
+        self.flusher = None
+        self.stopped = threading.Event()
+        if filename:
+            self.file_h = (gzip.open(filename, 'wt', encoding='utf-8') if filename.endswith('.gz')
+                           else open(filename, 'w', encoding='utf-8'))
+            self.flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+            self.flusher.start()
+
+    def _flush_loop(self, interval):
+        while not self.stopped.wait(interval):
+            self.flush()
+
+    def flush(self):
+        if self.file_h is None:
+            return
+
+        with self.flush_lock:
+            lines = []
+            while self.pending:
+                lines.append(json.dumps(self.pending.popleft(), ensure_ascii=False, separators=(',', ':')))
+            if lines:
+                self.file_h.write('\n'.join(lines) + '\n')
+                self.file_h.flush()
+
+    def record(self, stage, paragraph, page, offset, old, new):
+        event = Event(stage, paragraph, page, offset, old, new)
+        self.events.append(event)
+        if self.file_h is not None:
+            self.pending.append(event)
+        self.recorded += 1
+
+    @contextmanager
+    def context(self, stage, paragraph=None, page=None):
+        """
+        Changes reported with change() inside are attributed to stage, paragraph (id) and page.
+        Paragraph None mutes change(), for passes which would report the same changes twice
+
+        :return: list with number of changes reported inside
+        """
+        local = self.local
+        previous = getattr(local, 'current', None)
+        counter = [0]
+        local.current = (stage, paragraph, page, counter)
+        try:
+            yield counter
+        finally:
+            local.current = previous
+
+    def change(self, offset, old, new):
+        current = getattr(self.local, 'current', None)
+        if current is not None and current[1] is not None:
+            self.record(current[0], current[1], current[2], offset, old, new)
+            current[3][0] += 1
+
+    def query(self, stage=None, page=None, paragraph=None):
+        """
+        :return: list of Event, from file when memory doesn't hold all of them
+        """
+        if self.filename and self.recorded > len(self.events):
+            self.flush()
+            events = read(self.filename)
+        else:
+            events = list(self.events)
+
+        return query(events, stage, page, paragraph)
+
+    def close(self):
+        if self.flusher is not None:
+            self.stopped.set()
+            self.flusher.join()
+            self.flusher = None
+        if self.file_h is not None:
+            self.flush()
+            self.file_h.close()
+            self.file_h = None
+
+
+def read(filename):
+    """
+    :return: list of Event from journal file, which may be still written to
+    """
+    opener = gzip.open if filename.endswith('.gz') else open
+    events = []
+
+    with opener(filename, 'rt', encoding='utf-8') as file_h:
+        try:
+            for line in file_h:
+                if line.endswith('\n'):
+                    events.append(Event(*json.loads(line)))
+        except EOFError:  # gzip stream is not finished yet
+            pass
+
+    return events
+
+
+def query(events, stage=None, page=None, paragraph=None):
+    """
+    :param events: iterable of Event
+    :return: list of Event matching all given fields
+    """
+    return [event for event in events
+            if (stage is None or event.stage == stage) and (page is None or event.page == page)
+            and (paragraph is None or event.paragraph == paragraph)]
+
+
+def enable(filename=None, capacity=100000):
+    global JOURNAL
+    JOURNAL = Journal(filename, capacity)
+    return JOURNAL
+
+
+def disable():
+    """
+    :return: closed journal, still queryable
+    """
+    global JOURNAL
+    journal, JOURNAL = JOURNAL, None
+    if journal is not None:
+        journal.close()
+
+    return journal
+
+
+@contextmanager
+def context(stage, paragraph=None, page=None):
+    """
+    Attribute changes inside to stage and paragraph
+
+    :return: list with number of changes reported inside, None if journal is disabled
+    """
+    if JOURNAL is None:
+        yield None
+    else:
+        with JOURNAL.context(stage, paragraph, page) as counter:
+            yield counter
+
+
+def change(offset, old, new):
+    """
+    Report change made by parser: old text at offset replaced with new
+    """
+    if JOURNAL is None:
+        logging.info('[CHANGED] %s -> %s', old, new)
+    else:
+        JOURNAL.change(offset, old, new)
+
+
+def record(stage, paragraph, page, offset, old, new, message=None, *args):
+    """
+    Report change made outside of parsers, message with args is logged instead when journal is disabled
+    """
+    if JOURNAL is None:
+        if message:
+            logging.info(message, *args)
+    else:
+        JOURNAL.record(stage, paragraph, page, offset, old, new)
+
+
+def trimmed_diff(old, new):
+    """
+    :return: (offset, old middle, new middle) with common prefix and suffix cut off
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+
+    return start, old[start:len(old) - end], new[start:len(new) - end]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Query journal of changes")
+    arg_parser.add_argument('file')
+    arg_parser.add_argument('--stage')
+    arg_parser.add_argument('--page', type=int)
+    arg_parser.add_argument('--paragraph', type=int)
+    args = arg_parser.parse_args()
+
+    for event in query(read(args.file), args.stage, args.page, args.paragraph):
+        print("%s\tparagraph %s\tpage %s\t@%s\t%r -> %r" % event)
@@ -0,0 +1,60 @@
+"""
+Connection to running office (soffice --accept="socket,host=localhost,port=2002;urp;")
+"""
+import unotrace
+
+UNO_URL = "uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext"
+
+DESKTOP = None  # desktop to use instead of connecting, see use()
+
+
+def use(desktop):
+    """
+    Use given desktop (e.g. fakeuno.FakeDesktop) instead of connecting to office, None to connect again
+    """
+    global DESKTOP
+    DESKTOP = desktop
+
+
+def load(desktop, filename, hidden=True):
+    """
+    Open document in office
+
+    :param desktop: desktop from get_desktop()
+    :param filename: file to open
+    :param hidden: don't show window
+    :return: model of opened document
+    """
+    import uno
+    from os import path
+
+    hidden_property = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    hidden_property.Name = "Hidden"
+    hidden_property.Value = hidden
+
+    return desktop.loadComponentFromURL(uno.systemPathToFileUrl(path.realpath(filename)), "_blank", 0,
+                                        (hidden_property,))
+
+
+def get_desktop(url=UNO_URL):
+    """
+    Connect to running office
+
+    :param url: uno url of office
+    :return: central desktop object
+    """
+    if DESKTOP is not None:
+        return unotrace.wrap(DESKTOP)
+
+    import uno
+
+    # get the uno component context from the PyUNO runtime
+    local = uno.getComponentContext()
+
+    # create the UnoUrlResolver
+    resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+
+    # connect to the running office
+    context = resolver.resolve(url)
+
+    return unotrace.wrap(context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context))
@@ -0,0 +1,43 @@
+"""
+Parser modules are cheap to import: heavy artifacts (dictionaries, compiled rules)
+are loaded on first call
+"""
+import importlib
+import sys
+
+# modules other parsers import from go first when reloading
+BASE_MODULES = ['parsers.registry', 'parsers.cache', 'parsers.tokenizer', 'parsers.deletion_index', 'parsers.trie',
+                'parsers.lexicon']
+
+
+def get(name):
+    """
+    Parser function by name
+
+    :param name: e.g. 'old_spell' for parsers.old_spell.old_spell
+    """
+    return getattr(importlib.import_module('parsers.' + name), name)
+
+
+def warm_up():
+    """
+    Load everything parsers need before the first paragraph comes
+    """
+    from parsers import dehyphenate, ocr_fix, old_spell, yoficator
+
+    old_spell.get_rules()
+    old_spell.get_prefilter()
+    yoficator.get_dict()
+    ocr_fix.get_index()
+    dehyphenate.get_trie()
+
+
+def reload():
+    """
+    Reload parser modules (rule tables, dictionaries) without restarting process
+    """
+    loaded = [name for name in sys.modules if name.startswith('parsers.')]
+    for name in [x for x in BASE_MODULES if x in loaded] + sorted(set(loaded) - set(BASE_MODULES)):
+        importlib.reload(sys.modules[name])
+
+    warm_up()
@@ -0,0 +1,94 @@
+"""
+On-disk cache for prebuilt parser artifacts (dictionaries, indexes)
+
+Artifacts are pickled into POSTOCR_CACHE_DIR (~/.cache/postocr by default) and rebuilt
+whenever one of their source files changes. Binary artifacts meant to be memory-mapped
+are written by their own builders (cached_file), with the source key kept next to them.
+"""
+import json
+import logging
+import os
+import pickle
+import sys
+
+CACHE_DIR = os.environ.get('POSTOCR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'postocr'))
+
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, '%s.pickle' % name)
+
+
+def _source_key(sources):
+    key = [sys.version_info[:2]]
+
+    for source in sources:
+        stat = os.stat(source)
+        key.append((os.path.realpath(source), stat.st_mtime_ns, stat.st_size))
+
+    return key
+
+
+def cached(name, sources, build):
+    """
+    Load artifact from disk cache or build and save it
+
+    :param name: artifact name, used as file name
+    :param sources: files artifact depends on
+    :param build: function() -> artifact, called on cache miss
+    :return: artifact
+    """
+    key = _source_key(sources)
+    filename = cache_path(name)
+
+    try:
+        with open(filename, 'rb') as file_h:
+            saved_key, artifact = pickle.load(file_h)
+        if saved_key == key:
+            return artifact
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        pass
+
+    artifact = build()
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+        with open(tmp_filename, 'wb') as file_h:
+            pickle.dump((key, artifact), file_h, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, filename)
+    except OSError as e:
+        logging.warning("[WARNING] Can't save cache %s: %s", filename, e)
+
+    return artifact
+
+
+def cached_file(name, sources, build):
+    """
+    Path to binary artifact in disk cache, built if missing or out of date
+
+    :param name: artifact file name
+    :param sources: files artifact depends on
+    :param build: function(filename), writes artifact to filename, called on cache miss
+    :return: artifact file name
+    """
+    key = json.dumps(_source_key(sources))
+    filename = os.path.join(CACHE_DIR, name)
+    key_filename = filename + '.key'
+
+    try:
+        with open(key_filename) as file_h:
+            if file_h.read() == key and os.path.exists(filename):
+                return filename
+    except OSError:
+        pass
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+    build(tmp_filename)
+    os.replace(tmp_filename, filename)  # mapped old file stays valid for those who use it
+
+    with open(tmp_filename + '.key', 'w') as file_h:
+        file_h.write(key)
+    os.replace(tmp_filename + '.key', key_filename)
+
+    return filename
@@ -1,7 +1,9 @@
 import re
 import logging
-import nltk
-import string
+
+import journal
+from parsers.registry import register
+from parsers.tokenizer import tokenize
 
 CANONIC_DICT = {
     'Быт': 'Быт',
@@ -82,7 +84,15 @@ CANONIC_DICT = {
     'Откр': 'Откр',
     'Сирах': 'Сир'}
 
+KEYWORDS = frozenset(CANONIC_DICT) | frozenset(CANONIC_DICT.values())
+KEYWORDS_RE = re.compile(r'\b(?:%s)\b' % '|'.join(sorted(KEYWORDS, key=len, reverse=True)))
+
+
+def has_keyword(text):
+    return KEYWORDS_RE.search(text) is not None
 
+
+@register(token_based=True, prefilter=has_keyword)
 def canonic_links(text):
     '''
     Silly descent parser for canonic licks
@@ -93,7 +103,7 @@ def canonic_links(text):
     def format(token_list, index):
         result = {'result': '', 'context': token_list, 'start_index': index}
 
-        if not token_list[index+1] == '.':  # dot should always be
+        if index + 1 >= len(token_list) or not token_list[index+1] == '.':  # dot should always be
             logging.warning('[WARN] Undotted: %s', token_list[index:index + 5])
             return
 
@@ -108,7 +118,7 @@ def canonic_links(text):
 
         result['result'] += CANONIC_DICT[token_list[index]]
 
-        while index < len(token_list):
+        while index + 1 < len(token_list):
             index += 1
             token = token_list[index]
 
@@ -140,6 +150,8 @@ def canonic_links(text):
                 break
 
             # -- here it ends
+        else:  # context is over, its last token is in the link
+            index = len(token_list)
 
         result['final_index'] = index - 3
         for symbol in '.,:':
@@ -147,28 +159,21 @@ def canonic_links(text):
 
         return result
 
-    keywords = set(CANONIC_DICT.keys())
-    keywords.update(CANONIC_DICT.values())
-
-    offset = 0
-    word_spans = []
-    for token in nltk.word_tokenize(text):
-        offset = text.find(token, offset)
-        word_spans.append((token, offset, offset + len(token)))
-        offset += len(token)
+    word_spans = list(tokenize(text, dotted=True))
 
     changes = []
     for i, word_span in enumerate(word_spans):
-        if word_span[0] in keywords:
-            st_in = i - 2
+        if word_span[0] in KEYWORDS:
+            st_in = max(i - 2, 0)
             end_in = i + 30
 
-            result = format([x[0] for x in word_spans[st_in:end_in]], 2)
+            # keyword is always at index 2 of context, padded at the start of text
+            result = format([''] * (st_in - i + 2) + [x[0] for x in word_spans[st_in:end_in]], 2)
 
             if result:
                 st_offset = word_spans[i + result['start_index'] - 3][1]  # offsets are positions in text
                 end_offset = word_spans[i + result['final_index']][2]  # indexes are numbers of tokens
-                logging.info('[CHANGED] %s -> %s', text[st_offset:end_offset], result['result'])
+                journal.change(st_offset, text[st_offset:end_offset], result['result'])
                 logging.debug('[DEBUG] %s ', result)
                 changes.append((st_offset, end_offset, result['result']))
 
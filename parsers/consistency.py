@@ -0,0 +1,100 @@
+"""
+Corrections by consistency of the whole book, against word index of Document.index_words (wordindex.py)
+
+    yofication      a word written with е where the book mostly writes it with ё (ёлка 40 times, елка twice)
+                    gets the ё form
+    OCR misreads    a word seen at most RARE times and missing from lexicon, which becomes a word seen
+                    at least RATIO times as often (and MIN_COUNT times) by one of ocr_fix.CONFUSIONS,
+                    is replaced with that word
+
+Without index (index_words stage didn't run) text is left as it is.
+"""
+import logging
+
+import journal
+import wordindex
+from parsers import ocr_fix
+from parsers.registry import register
+from parsers.tokenizer import tokenize
+
+MIN_COUNT = 5  # occurrences of form a word is replaced with
+MIN_SHARE = 0.9  # share of ё form among all forms of word
+RARE = 1
+RATIO = 10
+MIN_LENGTH = ocr_fix.MIN_LENGTH
+
+_SUBSTITUTIONS = {}  # first char -> [(source, target)]
+for _a, _b in ocr_fix.CONFUSIONS:
+    _SUBSTITUTIONS.setdefault(_a[0], []).append((_a, _b))
+    _SUBSTITUTIONS.setdefault(_b[0], []).append((_b, _a))
+
+_warned = False
+
+
+def substitutions(word):
+    """
+    :return: generator of words made from word by one of CONFUSIONS
+    """
+    for i, char in enumerate(word):
+        for source, target in _SUBSTITUTIONS.get(char, ()):
+            if word.startswith(source, i):
+                yield word[:i] + target + word[i + len(source):]
+
+
+def correct(index, word):
+    """
+    :param word: lower-cased word
+    :return: correction or None
+    """
+    if 'е' in word:
+        form, count = index.dominant(word)
+        if form is not None and form.count('ё') > word.count('ё') and count >= MIN_COUNT and \
+                count >= MIN_SHARE * index.total(word):
+            return form
+
+    count = index.count(word)
+    if count > RARE:
+        return None
+
+    best, best_count = None, max(MIN_COUNT, RATIO * count) - 1
+    for candidate in substitutions(word):
+        candidate_count = index.count(candidate)
+        if candidate_count > best_count:
+            best, best_count = candidate, candidate_count
+
+    if best is not None and word in ocr_fix.get_index():  # a rare word, but a real one
+        return None
+
+    return best
+
+
+@register(pure=False, tag_safe=True, token_based=True, boundary_safe=True)
+def consistency(text):
+    global _warned
+
+    index = wordindex.get_index()
+    if index is None:
+        if not _warned:
+            logging.warning("[WARNING] consistency: no word index, run index_words stage first")
+            _warned = True
+        return text
+
+    parts = []
+    last = 0
+    for token, start, end in tokenize(text):
+        if len(token) < MIN_LENGTH or not token.isalpha():
+            continue
+
+        correction = correct(index, token.lower())
+        if correction is not None:
+            correction = ocr_fix.restore_case(token, correction)
+            journal.change(start, token, correction)
+            parts.append(text[last:start])
+            parts.append(correction)
+            last = end
+
+    if not parts:
+        return text
+
+    parts.append(text[last:])
+    return ''.join(parts)
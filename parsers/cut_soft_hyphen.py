@@ -1,2 +1,6 @@
+from parsers.registry import register
+
+
+@register(idempotent=True, tag_safe=True, boundary_safe=True, triggers='\u00AD', outputs='')
 def cut_soft_hyphen(text):
     return text.replace('\u00AD', '')
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Join words split across lines: 'сло- во', 'сло-\\nво' and soft hyphens (U+00AD)
+
+One regex pass per paragraph. Soft hyphens are always joined, each 'X- Y' is decided by lexicon
+(parsers.trie over parsers.lexicon):
+    Y is a conjunction (suspended hyphen 'двух- и трёхэтажные') -> as is
+    X+Y is a word                                               -> 'XY'
+    X-Y is a word, X is кое/кой, or X of PARTICLE_WORDS + particle -> 'X-Y'
+    X+Y goes deeper in trie than X does alone                   -> 'XY'
+    otherwise                                                   -> 'XY' if JOIN_UNKNOWN, else as is
+Default lexicon (yoficator dictionary) knows few words, so unknown pairs are left as they are.
+Tags between halves ({{b}}, {{/i}}) are kept after the joint, so tagged and untagged texts agree.
+"""
+import re
+
+from parsers import lexicon
+from parsers.cache import cached_file
+from parsers.registry import register
+from parsers.trie import VERSION, Trie, build
+
+WORD = r'[^\W\d_]+'
+TAGS = r'(?:\{\{[^{}]*\}\})*'
+HYPHEN_RE = re.compile(r'(%s)(-[ \t]*\n\s*|-[ \t]+|\u00AD\s*)(%s)(?=(%s))' % (WORD, TAGS, WORD))
+
+CONJUNCTIONS = {'и', 'или', 'а'}
+PARTICLES = {'то', 'либо', 'нибудь', 'таки'}
+PARTICLE_WORDS = {  # words taking particles above: что-то, где-нибудь, всё-таки
+    'кто', 'кого', 'кому', 'кем', 'ком', 'что', 'чего', 'чему', 'чем', 'чём',
+    'какой', 'какая', 'какое', 'какие', 'какого', 'какому', 'каким', 'каком', 'какую', 'какими', 'каких',
+    'чей', 'чья', 'чьё', 'чье', 'чьи', 'чьего', 'чьей', 'чьему', 'чьим', 'чьих',
+    'где', 'куда', 'откуда', 'когда', 'как', 'почему', 'зачем', 'отчего', 'сколько',
+    'всё', 'все', 'так', 'опять', 'довольно', 'наконец',
+}
+PREFIXES = {'кое', 'кой'}
+JOIN_UNKNOWN = False
+
+_trie = None
+
+
+def get_trie():
+    """
+    Trie is built on first use and then memory-mapped from disk cache
+    """
+    global _trie
+
+    if _trie is None:
+        filename = cached_file('dehyphenate.v%s.trie' % VERSION, lexicon.sources(),
+                               lambda tmp_filename: build(lexicon.get_words(), tmp_filename))
+        _trie = Trie(filename)
+
+    return _trie
+
+
+def decide(first, second):
+    """
+    :param first: part before hyphen
+    :param second: part after line break
+    :return: True to join, False to keep hyphen, None to leave as is
+    """
+    if second[0].isupper() or second in CONJUNCTIONS:
+        return None
+
+    trie = get_trie()
+    first_lower = first.lower()
+    joined = first_lower + second
+
+    if joined in trie:
+        return True
+    if (first_lower + '-' + second in trie or first_lower in PREFIXES
+            or (second in PARTICLES and first_lower in PARTICLE_WORDS)):
+        return False
+    if trie.prefix_length(joined) >= len(first) + min(2, len(second)):
+        return True
+
+    return True if JOIN_UNKNOWN else None
+
+
+def _replace(match):
+    first, hyphen, tags, second = match.groups()
+    join = True if hyphen[0] == '\u00AD' else decide(first, second)
+
+    if join is None:
+        return match.group()
+
+    return first + ('' if join else '-') + tags
+
+
+@register(idempotent=True, tag_safe=True, triggers='-\u00AD', outputs='-', sources=lexicon.sources)
+def dehyphenate(text):
+    if '-' not in text and '\u00AD' not in text:
+        return text
+
+    return HYPHEN_RE.sub(_replace, text)
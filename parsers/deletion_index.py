@@ -0,0 +1,226 @@
+"""
+Precomputed deletion index (SymSpell) over a lexicon, stored in one file and memory-mapped
+
+Every word is indexed under all strings made by deleting up to max_distance characters of its prefix.
+A misspelled word is looked up by its own deletions, so candidates come from a few hash buckets
+whatever the size of lexicon, and only those are checked with real edit distance.
+
+File layout, all numbers are native uint32:
+    header          MAGIC, version, max_distance, prefix_length, words, buckets, postings, words bytes
+    bucket_starts   [buckets + 1], postings of bucket b are bucket_starts[b]:bucket_starts[b + 1]
+    hashes          [postings], crc32 of deletion
+    word_ids        [postings]
+    frequencies     [words]
+    word_lengths    [words], in characters
+    word_starts     [words + 1], offsets in words blob
+    words           utf-8 blob
+"""
+import mmap
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+
+MAGIC = 0x58444f50  # 'PODX'
+VERSION = 1
+HEADER = struct.Struct('8I')
+
+Suggestion = namedtuple('Suggestion', 'word distance frequency')
+
+
+def deletes_by_distance(word, max_distance):
+    """
+    :return: generator of lists of strings made by deleting 0, 1... max_distance characters
+    """
+    seen = {word}
+    edge = [word]
+    yield edge
+
+    for distance in range(max_distance):
+        next_edge = []
+        for item in edge:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                deleted = item[:i] + item[i + 1:]
+                if deleted not in seen:
+                    seen.add(deleted)
+                    next_edge.append(deleted)
+        edge = next_edge
+        yield edge
+
+
+def deletes(word, max_distance):
+    """
+    :return: set of strings made by deleting up to max_distance characters, word included
+    """
+    return set(item for edge in deletes_by_distance(word, max_distance) for item in edge)
+
+
+def _hash(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def distance(a, b, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein with transpositions)
+
+    :return: distance or max_distance + 1 if it's bigger than max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+
+    return min(previous[-1], max_distance + 1)
+
+
+def build(frequencies, filename, max_distance=2, prefix_length=7):
+    """
+    Write index file
+
+    :param frequencies: dict word -> frequency
+    :param filename: index file to write
+    :param max_distance: maximal edit distance of suggestions
+    :param prefix_length: only prefix of this length is indexed, keeps index size linear in lexicon size
+    """
+    word_list = sorted(frequencies)
+    hashes = array('I')
+    word_ids = array('I')
+
+    for word_id, word in enumerate(word_list):
+        for deleted in deletes(word[:prefix_length], max_distance):
+            hashes.append(_hash(deleted))
+            word_ids.append(word_id)
+
+    buckets = 1
+    while buckets < len(hashes):
+        buckets *= 2
+    mask = buckets - 1
+
+    # counting sort of postings by bucket
+    bucket_starts = array('I', [0]) * (buckets + 1)
+    for h in hashes:
+        bucket_starts[(h & mask) + 1] += 1
+    for b in range(buckets):
+        bucket_starts[b + 1] += bucket_starts[b]
+
+    positions = array('I', bucket_starts)
+    sorted_hashes = array('I', [0]) * len(hashes)
+    sorted_ids = array('I', [0]) * len(hashes)
+    for h, word_id in zip(hashes, word_ids):
+        position = positions[h & mask]
+        sorted_hashes[position] = h
+        sorted_ids[position] = word_id
+        positions[h & mask] = position + 1
+
+    encoded = [word.encode('utf-8') for word in word_list]
+    word_starts = array('I', [0])
+    for item in encoded:
+        word_starts.append(word_starts[-1] + len(item))
+    blob = b''.join(encoded)
+
+    with open(filename, 'wb') as file_h:
+        file_h.write(HEADER.pack(MAGIC, VERSION, max_distance, prefix_length, len(word_list), buckets,
+                                 len(hashes), len(blob)))
+        for part in (bucket_starts, sorted_hashes, sorted_ids, array('I', [frequencies[x] for x in word_list]),
+                     array('I', [len(x) for x in word_list]), word_starts):
+            part.tofile(file_h)
+        file_h.write(blob)
+
+
+class DeletionIndex:
+    def __init__(self, filename):
+        """
+        :param filename: index file written by build()
+        """
+        with open(filename, 'rb') as file_h:
+            self._map = mmap.mmap(file_h.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.max_distance, self.prefix_length, words, buckets, postings,
+         blob_size) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("%s is not a deletion index of version %s" % (filename, VERSION))
+
+        self._mask = buckets - 1
+        view = memoryview(self._map)
+        offset = HEADER.size
+        parts = []
+        for size in (buckets + 1, postings, postings, words, words, words + 1):
+            parts.append(view[offset:offset + size * 4].cast('I'))
+            offset += size * 4
+        (self._bucket_starts, self._hashes, self._word_ids, self._frequencies, self._word_lengths,
+         self._word_starts) = parts
+        self._blob = view[offset:offset + blob_size]
+
+    def __len__(self):
+        return len(self._frequencies)
+
+    def _word(self, word_id):
+        return str(self._blob[self._word_starts[word_id]:self._word_starts[word_id + 1]], 'utf-8')
+
+    def _postings(self, text):
+        h = _hash(text)
+        bucket = h & self._mask
+        for k in range(self._bucket_starts[bucket], self._bucket_starts[bucket + 1]):
+            if self._hashes[k] == h:
+                yield self._word_ids[k]
+
+    def frequency(self, word):
+        """
+        :return: frequency of word, 0 if it's not in lexicon
+        """
+        for word_id in self._postings(word[:self.prefix_length]):
+            if self._word(word_id) == word:
+                return self._frequencies[word_id]
+
+        return 0
+
+    def __contains__(self, word):
+        return self.frequency(word) > 0
+
+    def lookup(self, word, max_distance=None, closest=True):
+        """
+        Words of lexicon close to word
+
+        :param word: lower-cased word
+        :param max_distance: up to index max_distance
+        :param closest: only suggestions of the smallest distance found, saves checking farther candidates
+        :return: list of Suggestion sorted by distance, then by frequency descending
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        seen = set()
+        suggestions = []
+
+        for deleted_count, edge in enumerate(deletes_by_distance(word[:self.prefix_length], max_distance)):
+            if deleted_count > max_distance:
+                break
+            for deleted in edge:
+                for word_id in self._postings(deleted):
+                    if word_id in seen:
+                        continue
+                    seen.add(word_id)
+                    if abs(self._word_lengths[word_id] - len(word)) > max_distance:
+                        continue
+                    candidate = self._word(word_id)
+                    candidate_distance = distance(word, candidate, max_distance)
+                    if candidate_distance > max_distance:
+                        continue
+                    if closest and candidate_distance < max_distance:
+                        max_distance = candidate_distance
+                        suggestions = [x for x in suggestions if x.distance <= max_distance]
+                    suggestions.append(Suggestion(candidate, candidate_distance, self._frequencies[word_id]))
+
+        suggestions.sort(key=lambda x: (x.distance, -x.frequency))
+        return suggestions
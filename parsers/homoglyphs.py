@@ -0,0 +1,52 @@
+"""
+Replace Latin lookalikes (a/а, o/о, p/р, c/с, e/е...) inside Cyrillic words
+
+OCR mixes them into Cyrillic words, which then miss yoficator dictionary, canonic links and old_spell rules.
+Only words with Latin letters are looked at (one regex pass), and those mostly Cyrillic are translated
+with one precomputed str.translate table. Lookalike letters don't count as evidence of script when
+there are others: 'мaйop' is Cyrillic because of м and й, 'Cаxap' is not (one Cyrillic of five).
+"""
+import re
+import string
+
+import journal
+from parsers.registry import register
+
+LATIN = 'aABcCeEHKkMoOpPTxXyYiI'
+CYRILLIC = 'аАВсСеЕНКкМоОрРТхХуУіІ'  # і is pre-reform, old_spell takes care of it
+TO_CYRILLIC = str.maketrans(LATIN, CYRILLIC)
+CYRILLIC_ONLY = frozenset(chr(x) for x in range(0x400, 0x500)) - set(CYRILLIC)
+
+LATIN_LETTERS = string.ascii_letters
+LATIN_RE = re.compile(r'[a-zA-Z]')
+MIXED_RE = re.compile(r'[^\W\d_]*[a-zA-Z][^\W\d_]*')
+
+
+def _mostly_cyrillic(word):
+    cyrillic = sum(1 for char in word if '\u0400' <= char <= '\u04FF')
+    cyrillic_only = sum(1 for char in word if char in CYRILLIC_ONLY)
+    latin_only = sum(1 for char in word if char not in LATIN and not '\u0400' <= char <= '\u04FF')
+
+    if latin_only or cyrillic_only:
+        return cyrillic_only > latin_only
+
+    return cyrillic * 2 > len(word)
+
+
+def _replace(match):
+    word = match.group()
+    if not _mostly_cyrillic(word):
+        return word
+
+    fixed = word.translate(TO_CYRILLIC)
+    journal.change(match.start(), word, fixed)
+    return fixed
+
+
+@register(idempotent=True, tag_safe=True, token_based=True, boundary_safe=True,
+          triggers=LATIN_LETTERS, outputs=CYRILLIC)
+def homoglyphs(text):
+    if not LATIN_RE.search(text):
+        return text
+
+    return MIXED_RE.sub(_replace, text)
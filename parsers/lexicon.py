@@ -0,0 +1,53 @@
+"""
+Word lists for dictionary-based parsers
+
+Words of yoficator dictionary (both 'е' and 'ё' forms) plus word lists from POSTOCR_WORDLISTS
+(paths separated with os.pathsep). Word list line is a word, optionally followed by its frequency:
+    слово
+    слово 1520
+"""
+import os
+
+from parsers.yoficator import DICT_FILE
+
+WORDLISTS = [path for path in os.environ.get('POSTOCR_WORDLISTS', '').split(os.pathsep) if path]
+
+
+def sources():
+    """
+    :return: files lexicon is built from, to key caches with
+    """
+    return [DICT_FILE] + WORDLISTS
+
+
+def _read_wordlist(filename):
+    with open(filename, encoding='utf-8') as file_h:
+        for line in file_h:
+            parts = line.split()
+            if not parts:
+                continue
+            yield parts[0], int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+
+
+def _read_yoficator_dict(filename):
+    with open(filename, encoding='utf-8') as file_h:
+        for line in file_h:
+            k, _, v = line.strip().partition(':')
+            yield k, 1
+            if v:
+                yield v, 1
+
+
+def get_words():
+    """
+    :return: dict lower-cased word -> frequency, frequencies of the same word from several lists are summed
+    """
+    frequencies = {}
+
+    for filename in sources():
+        reader = _read_yoficator_dict if filename == DICT_FILE else _read_wordlist
+        for word, frequency in reader(filename):
+            word = word.lower()
+            frequencies[word] = frequencies.get(word, 0) + frequency
+
+    return frequencies
@@ -1,11 +1,17 @@
 import re
-import logging
-import nltk
-import string
+
+from parsers.registry import register
 
 MIDDLE_DASH_BETWEEN_DIGITS_REGEXP = re.compile(r'(\d+)\s*[-—–]\s*(\d+)', re.MULTILINE)
+DASH_RE = re.compile(r'[-—–]')
+DIGIT_RE = re.compile(r'\d')
+
+
+def has_dash_and_digit(text):
+    return DASH_RE.search(text) is not None and DIGIT_RE.search(text) is not None
 
 
+@register(idempotent=True, tag_safe=True, triggers='-—–', outputs='–', prefilter=has_dash_and_digit)
 def middle_dash_between_digits(text):
     def replacer(matchobj):
         return '%s–%s' % (matchobj.group(1), matchobj.group(2))
@@ -0,0 +1,127 @@
+"""
+Fix common OCR misreads (ш/щ, и/н, rn/m...) against lexicon
+
+Candidates come from precomputed deletion index (parsers.deletion_index) built over parsers.lexicon
+and kept in disk cache. A word is replaced only when it's not in lexicon, the best suggestion is explained
+by CONFUSIONS alone and its confidence (share of frequency among suggestions as close) passes THRESHOLD.
+"""
+import functools
+
+import journal
+from parsers import lexicon
+from parsers.cache import cached_file
+from parsers.deletion_index import VERSION, DeletionIndex, build
+from parsers.registry import register
+from parsers.tokenizer import tokenize
+
+# characters OCR mixes up, both directions are tried
+CONFUSIONS = [
+    ('ш', 'щ'), ('и', 'н'), ('и', 'й'), ('п', 'н'), ('ц', 'щ'), ('ь', 'ъ'), ('е', 'с'), ('о', 'с'),
+    ('з', 'э'), ('ы', 'ьі'), ('ы', 'ьг'), ('ю', 'іо'), ('т', 'г'), ('л', 'п'), ('в', 'з'),
+    ('rn', 'm'), ('cl', 'd'), ('li', 'h'), ('vv', 'w'), ('ii', 'u'),
+]
+MAX_CONFUSIONS = 2  # per word
+MIN_LENGTH = 4  # shorter words are too ambiguous
+THRESHOLD = 0.8
+
+_SUBSTITUTIONS = {}
+for _a, _b in CONFUSIONS:
+    _SUBSTITUTIONS.setdefault(_a, []).append(_b)
+    _SUBSTITUTIONS.setdefault(_b, []).append(_a)
+_SOURCE_CHARS = frozenset(x[0] for x in _SUBSTITUTIONS)
+_CONFUSION_CHARS = ''.join(a + b for a, b in CONFUSIONS)
+
+_index = None
+
+
+def get_index():
+    """
+    Index is built on first use and then memory-mapped from disk cache
+    """
+    global _index
+
+    if _index is None:
+        filename = cached_file('ocr_fix.v%s.index' % VERSION, lexicon.sources(),
+                               lambda tmp_filename: build(lexicon.get_words(), tmp_filename))
+        _index = DeletionIndex(filename)
+
+    return _index
+
+
+def explained(word, candidate, budget=MAX_CONFUSIONS):
+    """
+    :return: True if candidate is word with up to budget CONFUSIONS substituted
+    """
+    i = 0
+    while i < len(word) and i < len(candidate) and word[i] == candidate[i]:
+        i += 1
+    if i == len(word) == len(candidate):
+        return True
+    if budget == 0:
+        return False
+
+    for source, targets in _SUBSTITUTIONS.items():
+        if word.startswith(source, i):
+            for target in targets:
+                if candidate.startswith(target, i) and explained(word[i + len(source):], candidate[i + len(target):],
+                                                                 budget - 1):
+                    return True
+
+    return False
+
+
+@functools.lru_cache(maxsize=65536)
+def correct(word):
+    """
+    :param word: lower-cased word
+    :return: (correction or None, confidence)
+    """
+    index = get_index()
+    if word in index:
+        return None, 1.0
+
+    suggestions = index.lookup(word)
+    best = next((x for x in suggestions if explained(word, x.word)), None)
+    if best is None or best.distance > suggestions[0].distance:
+        return None, 0.0
+
+    rivals = sum(x.frequency for x in suggestions if x.distance <= best.distance)
+    return best.word, best.frequency / rivals
+
+
+def restore_case(word, correction):
+    if word.isupper():
+        return correction.upper()
+    if word[0].isupper():
+        return correction[0].upper() + correction[1:]
+
+    return correction
+
+
+@register(idempotent=True, tag_safe=True, token_based=True, boundary_safe=True,
+          triggers=''.join(_SOURCE_CHARS) + ''.join(_SOURCE_CHARS).upper(),
+          outputs=_CONFUSION_CHARS + _CONFUSION_CHARS.upper(), sources=lexicon.sources)
+def ocr_fix(text):
+    parts = []
+    last = 0
+
+    for token, start, end in tokenize(text):
+        if len(token) < MIN_LENGTH or not token.isalpha():
+            continue
+        lower = token.lower()
+        if _SOURCE_CHARS.isdisjoint(lower):
+            continue
+
+        correction, confidence = correct(lower)
+        if correction is not None and confidence >= THRESHOLD:
+            correction = restore_case(token, correction)
+            journal.change(start, token, correction)
+            parts.append(text[last:start])
+            parts.append(correction)
+            last = end
+
+    if not parts:
+        return text
+
+    parts.append(text[last:])
+    return ''.join(parts)
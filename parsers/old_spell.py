@@ -5,6 +5,8 @@ Convert old (before Russian language reform) spelling to new
 import re
 from functools import partial
 
+from parsers.registry import register
+
 rules = [
     # based on 'oldrus' rules replace set by charoplet (ver. 1.01)
     (r'\bвсе\b', 'всё'),
@@ -482,23 +484,111 @@ rules = [
     (r'ею\b', 'ей'),
     (r'\bцерквах\b', 'церквях'),
 ]
-rules_compiled = list((re.compile(elem[0]), elem[1]) for elem in rules)
+_rules_compiled = None
+_prefilter_re = None
+
+PATTERN_TOKEN_RE = re.compile(r'\\.|\[(?:\\.|[^\]])*\]|\((?:\\.|[^)])*\)|\{\d*,?\d*\}|.', re.DOTALL)
+SPECIAL = '.^$*+?{}[]()|'
+
+
+def _is_char_swap(rule):
+    pattern, replacement = rule
+    return len(pattern) == 1 and re.escape(pattern) == pattern and '{' not in replacement
+
+
+def required_literal(pattern):
+    """
+    Longest literal every match of pattern contains, rule can't match text without it
+
+    :return: literal, '' if there is none (alternation, inline flags...)
+    """
+    best = run = ''
+    tokens = PATTERN_TOKEN_RE.findall(pattern)
+
+    for i, token in enumerate(tokens):
+        following = tokens[i + 1] if i + 1 < len(tokens) else ''
+        if token == '|' or token.startswith('(?') and not token.startswith(('(?:', '(?=', '(?!', '(?<')):
+            return ''
+
+        if len(token) == 1 and token not in SPECIAL or len(token) == 2 and token[0] == '\\' and not token[1].isalnum():
+            if following in ('*', '?') or following.startswith('{'):  # optional char
+                run = ''
+                continue
+            run += token[-1]
+            best = max(best, run, key=len)
+            if following == '+':
+                run = ''
+        else:
+            run = ''
+
+    return best
+
+
+def get_rules():
+    """
+    Rules are compiled on first use. Consecutive single character swaps (Ѣ -> Е, ѳ -> ф...)
+    are collapsed into one str.translate table at their place in the order of rules
+
+    :return: list of (compiled pattern, replacement format, required literal) or (None, translate table, None)
+    """
+    global _rules_compiled
+
+    if _rules_compiled is None:
+        compiled = []
+        for rule in rules:
+            if _is_char_swap(rule):
+                if not compiled or compiled[-1][0] is not None:
+                    compiled.append((None, {}, None))
+                compiled[-1][1][ord(rule[0])] = rule[1]
+            else:
+                compiled.append((re.compile(rule[0]), rule[1], required_literal(rule[0])))
+        _rules_compiled = compiled
+
+    return _rules_compiled
+
+
+def get_prefilter():
+    """
+    :return: compiled alternation of all required literals and swapped chars, None if some rule has no literal
+    """
+    global _prefilter_re
+
+    if _prefilter_re is None:
+        literals = set()
+        for pattern, replacement, literal in get_rules():
+            if pattern is None:
+                literals.update(map(chr, replacement))
+            elif literal:
+                literals.add(literal)
+            else:
+                return None
+        _prefilter_re = re.compile('|'.join(map(re.escape, sorted(literals, key=len, reverse=True))))
+
+    return _prefilter_re
+
+
+def prefilter(text):
+    check = get_prefilter()
+    return check is None or check.search(text) is not None
+
 
+def __getattr__(name):
+    if name == 'rules_compiled':
+        return get_rules()
 
-def _replacer(match, rule_num):
-    matches = []
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-    for i in range(1, 1000):
-        try:
-            matches.append(match.group(i))
-        except IndexError:
-            break
 
-    return rules[rule_num][1].format(*matches)
+def _replacer(match, replacement):
+    return replacement.format(*match.groups())
 
 
+@register(tag_safe=True, boundary_safe=True, prefilter=prefilter)
 def old_spell(text):
-    for i, rule in enumerate(rules_compiled):
-        text = re.sub(rule[0], partial(_replacer, rule_num=i), text)
+    for pattern, replacement, literal in get_rules():
+        if pattern is None:
+            text = text.translate(replacement)
+        elif not literal or literal in text:  # checked against current text, earlier rules may add literal
+            text = pattern.sub(partial(_replacer, replacement=replacement), text)
 
-    return text
\ No newline at end of file
+    return text
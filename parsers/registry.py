@@ -0,0 +1,183 @@
+"""
+Registry of parsers with properties the pipeline planner relies on
+
+Each parser declares itself with @register(...):
+    pure            output depends only on input text (and static dictionaries), no side effects
+    idempotent      f(f(x)) == f(x)
+    tag_safe        leaves {{...}} markup alone and doesn't depend on it
+    token_based     changes only inside words, never across them
+    boundary_safe   never creates or removes word boundaries
+    triggers        characters without which parser changes nothing, None if any text may change
+    outputs         characters parser may put into text, None if any
+    version         bump when behaviour changes, part of fingerprint
+    sources         function returning data files parser depends on, part of fingerprint
+    prefilter       cheap check text -> bool, False only if parser would return text unchanged;
+                    by default a scan for any of triggers
+
+Functions not registered (lambdas, custom functions) get UNKNOWN: nothing is assumed about them.
+Skipped and checked texts are counted per parser and thread (daemon jobs run in threads of their own),
+see applies().
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import namedtuple
+
+Properties = namedtuple('Properties', 'pure idempotent tag_safe token_based boundary_safe triggers outputs version '
+                                      'sources prefilter')
+
+UNKNOWN = Properties(False, False, False, False, False, None, None, 0, None, None)
+
+IN_WORD_RE = re.compile(r'[\w\-\u00AD]')  # characters parsers.tokenizer keeps inside words
+
+REGISTRY = {}  # name -> parser function
+_local = threading.local()  # usage of this thread: name -> [texts checked, texts skipped by prefilter]
+_fingerprints = {}
+
+
+def any_of(chars):
+    """
+    :return: prefilter passing texts with any of chars
+    """
+    search = re.compile('[%s]' % ''.join(map(re.escape, sorted(chars)))).search
+
+    def prefilter(text):
+        return search(text) is not None
+
+    return prefilter
+
+
+def register(pure=True, idempotent=False, tag_safe=False, token_based=False, boundary_safe=False, triggers=None,
+             outputs=None, version=1, sources=None, prefilter=None):
+    def decorator(func):
+        check = prefilter
+        if check is None and triggers:
+            check = any_of(triggers)
+        func.properties = Properties(pure, idempotent, tag_safe, token_based, boundary_safe,
+                                     None if triggers is None else frozenset(triggers),
+                                     None if outputs is None else frozenset(outputs), version, sources, check)
+        REGISTRY[func.__name__] = func
+        return func
+
+    return decorator
+
+
+def properties(func):
+    return getattr(func, 'properties', UNKNOWN)
+
+
+def get_usage():
+    """
+    :return: name -> [texts checked, texts skipped by prefilter] counted in this thread
+    """
+    usage = getattr(_local, 'usage', None)
+    if usage is None:
+        usage = _local.usage = {}
+
+    return usage
+
+
+def reset_usage():
+    """
+    Forget counts made in this thread (a daemon worker starting next job)
+    """
+    _local.usage = {}
+
+
+def applies(func, text):
+    """
+    Run prefilter of parser on text and count the result
+
+    :return: False if parser surely leaves text unchanged and may be skipped
+    """
+    counts = get_usage()
+    usage = counts.get(func.__name__)
+    if usage is None:
+        usage = counts[func.__name__] = [0, 0]
+    usage[0] += 1
+
+    prefilter = properties(func).prefilter
+    if prefilter is None or prefilter(text):
+        return True
+
+    usage[1] += 1
+    return False
+
+
+def usage_since(snapshot):
+    """
+    :param snapshot: snapshot() taken before, {} for all time
+    :return: {name: (texts checked, texts skipped)} for parsers used since
+    """
+    result = {}
+    for name, (texts, skipped) in list(get_usage().items()):
+        before = snapshot.get(name, (0, 0))
+        if texts > before[0]:
+            result[name] = (texts - before[0], skipped - before[1])
+
+    return result
+
+
+def snapshot():
+    return {name: tuple(usage) for name, usage in list(get_usage().items())}
+
+
+def add_usage(usage):
+    """
+    Add counts made elsewhere (in worker processes)
+
+    :param usage: {name: (texts checked, texts skipped)}
+    """
+    for name, (texts, skipped) in usage.items():
+        counts = get_usage().setdefault(name, [0, 0])
+        counts[0] += texts
+        counts[1] += skipped
+
+
+def fingerprint(func):
+    """
+    :return: hash of parser code, version and data files, changes whenever parser output may change
+    """
+    key = (func.__module__, func.__name__)
+
+    if key not in _fingerprints:
+        props = properties(func)
+        digest = hashlib.sha1(('%s:%s:%s' % (key + (props.version,))).encode('utf-8'))
+        module_file = getattr(sys.modules.get(func.__module__), '__file__', None)
+        if module_file:
+            with open(module_file, 'rb') as file_h:
+                digest.update(file_h.read())
+        for source in props.sources() if props.sources else []:
+            stat = os.stat(source)
+            digest.update(('%s:%s:%s' % (os.path.realpath(source), stat.st_mtime_ns, stat.st_size)).encode('utf-8'))
+        _fingerprints[key] = digest.hexdigest()[:16]
+
+    return _fingerprints[key]
+
+
+def _touches_words(props):
+    """
+    :return: whether parser changes or puts characters that may be inside a word
+    """
+    return any(IN_WORD_RE.match(char) for char in props.triggers | props.outputs)
+
+
+def commute(first, second):
+    """
+    Whether two parsers may swap places: both pure, tag and boundary safe, and neither produces
+    or consumes characters triggering the other. Token-based parsers depend on every character
+    allowed inside a word (a soft hyphen cut makes 'е\xadлку' a word yoficator knows)
+    """
+    a, b = properties(first), properties(second)
+
+    if not (a.pure and b.pure and a.tag_safe and b.tag_safe and a.boundary_safe and b.boundary_safe):
+        return False
+    if None in (a.triggers, b.triggers, a.outputs, b.outputs):
+        return False
+    if (a.token_based and _touches_words(b)) or (b.token_based and _touches_words(a)):
+        return False
+
+    return a.triggers.isdisjoint(b.triggers) and a.outputs.isdisjoint(b.triggers) and \
+        b.outputs.isdisjoint(a.triggers)
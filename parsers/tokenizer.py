@@ -0,0 +1,40 @@
+"""
+Offset-preserving tokenizer for Russian (including pre-reform letters ѣ ѳ ѵ і)
+
+Replaces nltk.word_tokenize: no models to load, and every token is an exact slice of text
+"""
+import re
+
+TOKEN_RE = re.compile(r"""
+    \d+(?:[–,]\d+)+(?!\w)       # ranges 5–7 and verses 28,5
+  | \w+(?:[-\u00AD]\w+)*    # words (any script, incl. ѣ ѳ ѵ і), hyphenated words, numbers
+  | [^\w\s]                     # punctuation, one symbol per token
+""", re.VERBOSE)
+
+# tokens of nltk.word_tokenize canonic_links was written for: numbers keep their separators (3,36 12:5),
+# a word keeps its dot (Паралип.) unless the dot ends the text, dashes and ellipses are tokens of their own
+DOTTED_RE = re.compile(r"""
+    \d+(?:[:,.]\d+)+(?!\w)
+  | \w+(?:[-\u00AD]\w+)*(?:\.(?!\.|[\])}>"'»”’]*\s*$))?
+  | \.{2,}
+  | [^\w\s]
+""", re.VERBOSE)
+
+
+def tokenize(text, dotted=False):
+    """
+    Split text into tokens
+
+    :param text: text to split
+    :param dotted: keep dots of abbreviations with words, as nltk.word_tokenize does
+    :return: generator of (token, start, end), text[start:end] == token
+    """
+    for match in (DOTTED_RE if dotted else TOKEN_RE).finditer(text):
+        yield match.group(), match.start(), match.end()
+
+
+def words(text):
+    """
+    Tokens only, like nltk.word_tokenize
+    """
+    return TOKEN_RE.findall(text)
@@ -0,0 +1,115 @@
+"""
+Compact prefix trie over a lexicon, stored in one file and memory-mapped
+
+Nodes are numbered breadth-first, so children of every node are a contiguous run of edges
+sorted by character, found with binary search. No per-node Python objects, lookups cost
+one bisect per character.
+
+File layout, all numbers are native uint32:
+    header          MAGIC, version, nodes, edges
+    first_edge      [nodes + 1], edges of node n are first_edge[n]:first_edge[n + 1]
+    edge_chars      [edges], code points
+    edge_targets    [edges], child node
+    frequencies     [nodes], 0 for nodes which don't end a word
+"""
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+
+MAGIC = 0x45495254  # 'TRIE'
+VERSION = 1
+HEADER = struct.Struct('4I')
+
+
+def build(frequencies, filename):
+    """
+    Write trie file
+
+    :param frequencies: dict word -> frequency
+    :param filename: trie file to write
+    """
+    root = {}
+    for word, frequency in frequencies.items():
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[None] = node.get(None, 0) + frequency  # None key holds frequency of word ending here
+
+    first_edge = array('I', [0])
+    edge_chars = array('I')
+    edge_targets = array('I')
+    node_frequencies = array('I')
+
+    queue = [root]
+    for node in queue:  # queue grows while iterating, breadth-first
+        node_frequencies.append(node.get(None, 0))
+        for char in sorted(x for x in node if x is not None):
+            edge_chars.append(ord(char))
+            edge_targets.append(len(queue))
+            queue.append(node[char])
+        first_edge.append(len(edge_chars))
+
+    with open(filename, 'wb') as file_h:
+        file_h.write(HEADER.pack(MAGIC, VERSION, len(queue), len(edge_chars)))
+        for part in (first_edge, edge_chars, edge_targets, node_frequencies):
+            part.tofile(file_h)
+
+
+class Trie:
+    def __init__(self, filename):
+        """
+        :param filename: trie file written by build()
+        """
+        with open(filename, 'rb') as file_h:
+            self._map = mmap.mmap(file_h.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, nodes, edges = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("%s is not a trie of version %s" % (filename, VERSION))
+
+        view = memoryview(self._map)
+        offset = HEADER.size
+        parts = []
+        for size in (nodes + 1, edges, edges, nodes):
+            parts.append(view[offset:offset + size * 4].cast('I'))
+            offset += size * 4
+        self._first_edge, self._edge_chars, self._edge_targets, self._frequencies = parts
+
+    def _child(self, node, char):
+        start, end = self._first_edge[node], self._first_edge[node + 1]
+        code = ord(char)
+        k = bisect_left(self._edge_chars, code, start, end)
+        if k < end and self._edge_chars[k] == code:
+            return self._edge_targets[k]
+
+        return None
+
+    def _walk(self, word):
+        """
+        :return: (length of the longest prefix of word which is a path in trie, its node)
+        """
+        node = 0
+        for i, char in enumerate(word):
+            child = self._child(node, char)
+            if child is None:
+                return i, node
+            node = child
+
+        return len(word), node
+
+    def frequency(self, word):
+        """
+        :return: frequency of word, 0 if it's not in lexicon
+        """
+        length, node = self._walk(word)
+        return self._frequencies[node] if length == len(word) else 0
+
+    def __contains__(self, word):
+        return self.frequency(word) > 0
+
+    def prefix_length(self, word):
+        """
+        :return: length of the longest prefix of word which starts some word of lexicon
+        """
+        return self._walk(word)[0]
@@ -2,9 +2,16 @@
 Simple yoficator
 Dict from https://raw.githubusercontent.com/unabashed/yoficator/master/yoficator.dic
 """
-import nltk
 import os
 
+from parsers.cache import cached
+from parsers.registry import register
+from parsers.tokenizer import words
+
+DICT_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'yoficator.dic.txt')
+
+_yo_dict = None
+
 
 def _load_dict(file):
     with open(file) as file_h:
@@ -17,11 +24,30 @@ def _load_dict(file):
     return yo_dict_loaded
 
 
-yo_dict = _load_dict(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'yoficator.dic.txt'))
+def get_dict():
+    """
+    Dictionary is loaded on first use (from disk cache if possible)
+    """
+    global _yo_dict
+
+    if _yo_dict is None:
+        _yo_dict = cached('yoficator', [DICT_FILE], lambda: _load_dict(DICT_FILE))
+
+    return _yo_dict
+
+
+def __getattr__(name):
+    if name == 'yo_dict':
+        return get_dict()
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
+@register(idempotent=True, tag_safe=True, token_based=True, boundary_safe=True, triggers='е', outputs='ё',
+          sources=lambda: [DICT_FILE])
 def yoficator(text):
-    tokens = nltk.word_tokenize(text)
+    yo_dict = get_dict()
+    tokens = words(text)
     changes = [token for token in tokens if token in yo_dict]
     for change in changes:
         text = text.replace(' ' + change + ' ', ' ' + yo_dict[change].strip() + ' ')
@@ -0,0 +1,361 @@
+"""
+Pipeline of Document stages with checkpoints after each of them
+
+With optimize=True stages are planned using properties parsers declare (parsers.registry):
+duplicate idempotent stages are dropped, commuting stages are reordered so normalizing ones go
+before token-based ones, consecutive pure parsers are fused into one pass over paragraphs
+(which reuses tagged result for paragraphs without tags, caches results and may run in processes).
+"""
+import itertools
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import checkpoint
+import journal
+import parsers
+import progress
+import unotrace
+import watchdog
+from parsers import registry
+
+PARALLEL_MIN_PARAGRAPHS = 2000  # smaller documents are not worth starting processes
+RESULTS_LIMIT = 200000
+
+_results = {}  # (parser fingerprint, text) -> output, lives as long as process (daemon keeps it between jobs)
+
+
+class Stage:
+    def __init__(self, method, *args, name=None, **kwargs):
+        """
+        A call of Document method
+
+        :param method: name of Document method, e.g. 'prepare_paragraphs'
+        :param args: its arguments
+        :param name: stage name, made of method and function names by default
+        :param kwargs: its keyword arguments
+        """
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+        if name is None:
+            funcs = [arg.__name__ for arg in args if callable(arg) and arg.__name__ != '<lambda>']
+            name = ':'.join([method] + funcs)
+        self.name = name
+        self.names = [name]  # names stage answers to, for --until
+
+    def __repr__(self):
+        return "<Stage %s>" % self.name
+
+    def __call__(self, document):
+        getattr(document, self.method)(*self.args, **self.kwargs)
+        return document
+
+    def describe(self):
+        return self.name
+
+    @property
+    def parser(self):
+        """
+        :return: registered parser function if stage is a plain prepare_paragraphs of it, else None
+        """
+        if self.method == 'prepare_paragraphs' and len(self.args) == 1 and not self.kwargs and \
+                self.args[0] is registry.REGISTRY.get(getattr(self.args[0], '__name__', None)):
+            return self.args[0]
+
+        return None
+
+
+def _cached_call(func, fingerprint, text):
+    key = (fingerprint, text)
+    result = _results.get(key)
+
+    if result is None:
+        if len(_results) >= RESULTS_LIMIT:
+            _results.clear()
+        result = _results[key] = func(text)
+
+    return result
+
+
+def _apply_chunk(names, pairs):
+    """
+    Run parsers on (text, text_untagged) pairs in worker process
+
+    :return: (list of pairs, prefilter usage in this chunk)
+    """
+    funcs = [parsers.get(name) for name in names]
+    fingerprints = [registry.fingerprint(func) for func in funcs]
+    before = registry.snapshot()
+    result = []
+
+    for text, text_untagged in pairs:
+        for func, fingerprint in zip(funcs, fingerprints):
+            same = text == text_untagged
+            if registry.applies(func, text):
+                text = _cached_call(func, fingerprint, text)
+            if same:
+                text_untagged = text
+            elif registry.applies(func, text_untagged):
+                text_untagged = _cached_call(func, fingerprint, text_untagged)
+        result.append((text, text_untagged))
+
+    return result, registry.usage_since(before)
+
+
+class FusedStage(Stage):
+    def __init__(self, stages, workers=1, cache=True):
+        """
+        prepare_paragraphs of several pure parsers in one pass over paragraphs
+
+        :param stages: list of Stage with parser
+        :param workers: processes to run in, for big documents without journal
+        :param cache: reuse results for texts seen before (without journal)
+        """
+        self.funcs = [stage.parser for stage in stages]
+        super().__init__('prepare_paragraphs', *self.funcs,
+                         name='prepare_paragraphs:' + '+'.join(func.__name__ for func in self.funcs))
+        self.names = [stage.name for stage in stages] + [self.name]
+        self.workers = workers
+        self.cache = cache
+
+    def describe(self):
+        flags = ['untagged reused']
+        if len(self.funcs) > 1:
+            flags.append('fused %s' % len(self.funcs))
+        if self.workers > 1:
+            flags.append('parallel %s (from %s paragraphs)' % (self.workers, PARALLEL_MIN_PARAGRAPHS))
+        if self.cache:
+            flags.append('cached')
+
+        return '%s [%s]' % (self.name, ', '.join(flags))
+
+    def _call(self, document, func, fingerprint, element, text, journaled):
+        if journal.JOURNAL is not None or watchdog.WATCHDOG is not None:
+            return document.apply_parser(func, element, text, journaled)
+        if not registry.applies(func, text):
+            return text
+        if self.cache:
+            return _cached_call(func, fingerprint, text)
+
+        return func(text)
+
+    def __call__(self, document):
+        paragraphs = document.paragraphs
+        names = [func.__name__ for func in self.funcs]
+        fingerprints = [registry.fingerprint(func) for func in self.funcs]
+
+        if self.workers > 1 and journal.JOURNAL is None and watchdog.WATCHDOG is None and \
+                len(paragraphs) >= PARALLEL_MIN_PARAGRAPHS:
+            pairs = [(paragraph.text, paragraph.text_untagged) for paragraph in paragraphs]
+            size = len(pairs) // (self.workers * 4) + 1
+            chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+            results = []
+            with ProcessPoolExecutor(self.workers, initializer=parsers.warm_up) as pool:
+                try:
+                    for chunk_results, usage in pool.map(_apply_chunk, itertools.repeat(names), chunks):
+                        results.extend(chunk_results)
+                        registry.add_usage(usage)
+                        progress.advance(len(chunk_results))
+                except progress.Cancelled:
+                    pool.shutdown(cancel_futures=True)
+                    raise
+        else:
+            results = []
+            for paragraph in paragraphs:
+                text, text_untagged = paragraph.text, paragraph.text_untagged
+                for func, fingerprint in zip(self.funcs, fingerprints):
+                    if text == text_untagged:  # no tags, untagged pass would give the same
+                        text = text_untagged = self._call(document, func, fingerprint, paragraph, text, True)
+                    else:
+                        text = self._call(document, func, fingerprint, paragraph, text, False)
+                        text_untagged = self._call(document, func, fingerprint, paragraph, text_untagged, True)
+                results.append((text, text_untagged))
+                progress.advance()
+
+        for paragraph, (text, text_untagged) in zip(paragraphs, results):
+            paragraph.text = text
+            if text_untagged != paragraph.text_untagged:
+                paragraph.text_untagged = text_untagged
+                paragraph.dirty = True
+
+        return document
+
+
+def plan(stages, workers=1, cache=True):
+    """
+    Optimize stages using declared parser properties
+
+    :param stages: list of Stage
+    :return: (list of Stage, list of notes on what was changed)
+    """
+    notes = []
+    planned = []
+
+    for stage in stages:
+        parser = stage.parser
+        if parser and planned and planned[-1].parser is parser and registry.properties(parser).idempotent:
+            notes.append("%s dropped: same idempotent stage before" % stage.name)
+            continue
+        planned.append(stage)
+
+    # paragraph and footnote stages touch different texts, paragraph ones are grouped together to be fused
+    grouped = []
+    prepare_methods = ('prepare_paragraphs', 'prepare_footnotes')
+    for is_prepare, run in itertools.groupby(planned, lambda x: x.method in prepare_methods):
+        run = list(run)
+        if is_prepare:
+            ordered = sorted(run, key=lambda x: x.method == 'prepare_footnotes')
+            notes.extend("%s moved after paragraph stages" % x.name
+                         for i, x in enumerate(ordered) if x.method == 'prepare_footnotes' and run[i] is not x)
+            run = ordered
+        grouped.extend(run)
+    planned = grouped
+
+    # normalizing stages go before token-based ones they commute with
+    for i in range(len(planned)):
+        parser = planned[i].parser
+        if parser is None or registry.properties(parser).token_based:
+            continue
+
+        k = i
+        while k > 0 and planned[k - 1].parser and registry.properties(planned[k - 1].parser).token_based and \
+                registry.commute(planned[k - 1].parser, parser):
+            k -= 1
+        if k < i:
+            notes.append("%s moved before %s" % (planned[i].name, ', '.join(x.name for x in planned[k:i])))
+            planned.insert(k, planned.pop(i))
+
+    # consecutive pure parsers are fused
+    result = []
+    for is_pure, group in itertools.groupby(planned, lambda x: bool(x.parser and registry.properties(x.parser).pure)):
+        group = list(group)
+        if is_pure:
+            result.append(FusedStage(group, workers=workers, cache=cache))
+        else:
+            result.extend(group)
+
+    return result, notes
+
+
+class Pipeline:
+    READ_STAGE = 'read'
+
+    def __init__(self, stages, checkpoint_dir=None, optimize=False, workers=1, cache=True):
+        """
+        :param stages: list of Stage
+        :param checkpoint_dir: directory to save document after each stage to, None to disable checkpoints
+        :param optimize: plan stages using parser properties (checkpoints are then named after planned stages)
+        :param workers: processes for pure parsers when optimizing
+        :param cache: reuse parser results for texts seen before when optimizing
+        """
+        self.notes = []
+        if optimize:
+            stages, self.notes = plan(stages, workers=workers, cache=cache)
+        self.stages = stages
+        self.checkpoint_dir = checkpoint_dir
+
+    def describe(self):
+        """
+        :return: planned execution, one stage per line
+        """
+        lines = ["%2d %s" % (index, stage.describe()) for index, stage in enumerate(self.stages, 1)]
+        return '\n'.join(lines + ['   ' + note for note in self.notes])
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """
+        Make pipeline from list of strings like ['strip_empty', 'merge_paragraphs', 'prepare_paragraphs:old_spell']
+
+        :param spec: list of 'method' or 'method:parser[,parser...]'
+        :param kwargs: Pipeline arguments
+        """
+        stages = []
+        for item in spec:
+            method, _, funcs = item.partition(':')
+            stages.append(Stage(method, *[parsers.get(func) for func in funcs.split(',') if func]))
+
+        return cls(stages, **kwargs)
+
+    def _checkpoint_name(self, index):
+        name = self.READ_STAGE if index == 0 else self.stages[index - 1].name
+        return os.path.join(self.checkpoint_dir, '%02d-%s.jsonl.gz' % (index, re.sub(r'[^\w.-]+', '-', name)))
+
+    def _save(self, document, index):
+        if self.checkpoint_dir is None:
+            return
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        name = self.READ_STAGE if index == 0 else self.stages[index - 1].name
+        checkpoint.dump(document, self._checkpoint_name(index), meta=dict(stage=name, index=index))
+
+    def _find_checkpoint(self, resume):
+        """
+        :param resume: 'last', stage name, stage number (0 is read) or checkpoint file
+        :return: (filename, index of stage saved in it)
+        """
+        if os.path.isfile(str(resume)):
+            return resume, checkpoint.read_meta(resume)['index']
+
+        if self.checkpoint_dir is None:
+            raise Exception("No checkpoint directory to resume from")
+
+        names = [self.READ_STAGE] + [stage.name for stage in self.stages]
+        if resume == 'last':
+            candidates = range(len(self.stages), -1, -1)
+        elif str(resume).isdecimal():
+            candidates = [int(resume)]
+        else:
+            candidates = [i for i in range(len(self.stages), -1, -1) if names[i] == resume]
+
+        for index in candidates:
+            filename = self._checkpoint_name(index)
+            if index < len(names) and os.path.isfile(filename) and checkpoint.read_meta(filename)['stage'] == names[index]:
+                return filename, index
+
+        raise Exception("No checkpoint for %s in %s" % (resume, self.checkpoint_dir))
+
+    def run(self, document=None, resume=None, until=None):
+        """
+        Run stages on document
+
+        :param document: freshly read Document, may be None when resuming
+        :param resume: resume from checkpoint instead ('last', stage name, stage number or checkpoint file)
+        :param until: stop after stage with this name
+        :return: Document
+        """
+        if resume is not None:
+            filename, start = self._find_checkpoint(resume)
+            logging.info("[INFO] Resuming from %s", filename)
+            document = checkpoint.load(filename)
+        else:
+            start = 0
+            self._save(document, 0)
+
+        if until == self.READ_STAGE:
+            return document
+
+        for index in range(start + 1, len(self.stages) + 1):
+            stage = self.stages[index - 1]
+            logging.info("[STAGE] %s: %s", index, stage.name)
+            usage = registry.snapshot()
+            total = len(document.footnotes if stage.method == 'prepare_footnotes' else document.paragraphs)
+            try:
+                with unotrace.stage(stage.name), watchdog.stage(stage.name), progress.stage(stage.name, total):
+                    stage(document)
+            except progress.Cancelled:
+                logging.warning("[WARNING] Run cancelled in stage %s: %s, last finished stage %s%s", index, stage.name,
+                                self.stages[index - 2].name if index > 1 else self.READ_STAGE,
+                                ", resume with --resume last" if self.checkpoint_dir else "")
+                raise
+            for name, (texts, skipped) in sorted(registry.usage_since(usage).items()):
+                logging.info("[INFO] %s: prefilter skipped %s of %s texts (%.0f%%)", name, skipped, texts,
+                             100.0 * skipped / texts)
+            self._save(document, index)
+
+            if until in stage.names:
+                break
+
+        return document
@@ -0,0 +1,203 @@
+"""
+Progress of long runs (stage, paragraphs done of total, throughput, ETA) and cooperative cancellation
+
+Paragraph loops of reading, stages and writing call advance(), which counts the paragraph, reports
+status every interval seconds (to callback and to status file, rewritten as a whole JSON object) and
+raises Cancelled once the run was cancelled. SIGINT or SIGTERM cancel the run: the loop stops at the next
+paragraph, write() disposes the document it was building and the status file tells where the run stopped.
+A second signal interrupts right away.
+
+    script.py book.hocr -o out.odt --progress status.json
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+PROGRESS = None
+
+SIGNALS = ('SIGINT', 'SIGTERM')
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Progress:
+    def __init__(self, callback=None, filename=None, interval=1.0):
+        """
+        :param callback: function(status dict), called every interval seconds and on stage changes
+        :param filename: JSON file rewritten with status every interval seconds
+        :param interval: seconds between reports
+        """
+        self.callback = callback
+        self.filename = filename
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.state = 'running'
+        self.stage = None
+        self.stage_started = self.started
+        self.done = 0
+        self.total = None
+        self.completed = []  # finished stages
+        self.cancelled = None  # reason, e.g. signal name
+        self.next_report = 0
+        self.previous_handlers = {}
+
+    def install(self):
+        """
+        Cancel on SIGINT and SIGTERM (main thread only)
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return self
+
+        for name in SIGNALS:
+            if hasattr(signal, name):
+                self.previous_handlers[name] = signal.signal(getattr(signal, name), self._signal)
+
+        return self
+
+    def uninstall(self):
+        for name, handler in self.previous_handlers.items():
+            signal.signal(getattr(signal, name), handler)
+        self.previous_handlers = {}
+
+    def _signal(self, signum, frame):
+        if self.cancelled is not None:  # second signal: don't wait for the loop
+            raise KeyboardInterrupt()
+
+        self.cancel(signal.Signals(signum).name)
+
+    def cancel(self, reason='cancelled'):
+        """
+        Ask the run to stop at the next paragraph
+        """
+        self.cancelled = reason
+        logging.warning("[WARNING] %s: stopping at the next paragraph (%s)", reason, self.stage)
+
+    def check(self):
+        """
+        :raise Cancelled: if the run was cancelled
+        """
+        if self.cancelled is not None:
+            if self.state == 'running':
+                self.state = 'cancelled'
+                self.report()
+            raise Cancelled("Cancelled (%s) in %s after %s of %s paragraphs" % (self.cancelled, self.stage,
+                                                                                self.done, self.total))
+
+    def start(self, stage, total=None):
+        self.check()
+        self.stage = stage
+        self.stage_started = time.perf_counter()
+        self.done = 0
+        self.total = total
+        self.report()
+
+    def finish(self, stage):
+        self.completed.append(stage)
+        self.done = self.total if self.total is not None else self.done
+        self.report()
+
+    def advance(self, count=1):
+        self.done += count
+        self.check()
+        if time.perf_counter() >= self.next_report:
+            self.report()
+
+    def status(self):
+        now = time.perf_counter()
+        elapsed = now - self.stage_started
+        rate = self.done / elapsed if elapsed > 0 else None
+        eta = None
+        if rate and self.total is not None:
+            eta = max(self.total - self.done, 0) / rate
+
+        return dict(state=self.state, stage=self.stage, done=self.done, total=self.total,
+                    rate=round(rate, 1) if rate else None, eta=round(eta, 1) if eta is not None else None,
+                    elapsed=round(now - self.started, 1), completed=list(self.completed), cancelled=self.cancelled,
+                    updated=time.time())
+
+    def report(self):
+        self.next_report = time.perf_counter() + self.interval
+        status = self.status()
+
+        if self.callback is not None:
+            self.callback(status)
+        if self.filename:
+            tmp_filename = self.filename + '.tmp'
+            with open(tmp_filename, 'w', encoding='utf-8') as file_h:
+                json.dump(status, file_h, ensure_ascii=False)
+            os.replace(tmp_filename, self.filename)
+
+    def close(self, state=None):
+        """
+        :param state: final state ('done', 'failed'), cancelled run stays 'cancelled'
+        """
+        self.uninstall()
+        if state and self.state == 'running':
+            self.state = state
+        self.report()
+
+
+def describe(status):
+    """
+    :return: one line of status for terminal
+    """
+    line = "[%s] %s: %s" % (status['state'], status['stage'], status['done'])
+    if status['total'] is not None:
+        line += "/%s" % status['total']
+    if status['rate']:
+        line += ", %s paragraphs/s" % status['rate']
+    if status['eta'] is not None:
+        line += ", ETA %s s" % status['eta']
+
+    return line
+
+
+def enable(callback=None, filename=None, interval=1.0, signals=True):
+    global PROGRESS
+    PROGRESS = Progress(callback, filename, interval)
+    if signals:
+        PROGRESS.install()
+    return PROGRESS
+
+
+def disable(state='done'):
+    """
+    :return: closed progress with final status
+    """
+    global PROGRESS
+    progress, PROGRESS = PROGRESS, None
+    if progress is not None:
+        progress.close(state)
+
+    return progress
+
+
+@contextmanager
+def stage(name, total=None):
+    if PROGRESS is None:
+        yield None
+    else:
+        PROGRESS.start(name, total)
+        yield PROGRESS
+        PROGRESS.finish(name)
+
+
+def advance(count=1):
+    """
+    Count done paragraphs, a cancellation checkpoint
+
+    :raise Cancelled: if the run was cancelled
+    """
+    if PROGRESS is not None:
+        PROGRESS.advance(count)
+
+
+def check():
+    if PROGRESS is not None:
+        PROGRESS.check()
@@ -0,0 +1,195 @@
+"""
+Stream readers for OCR output (hOCR, ALTO XML), so documents don't have to go through LibreOffice
+
+Both readers yield (page_num, runs) per paragraph, where runs is a list of (string, fmt_dict)
+"""
+import re
+import xml.etree.ElementTree as ElementTree
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+
+HOCR_STYLE_TAGS = dict(b='bold', strong='bold', i='italic', em='italic', u='underlined')
+HOCR_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+                  'track', 'wbr'}
+HOCR_PPAGENO_RE = re.compile(r'ppageno\s+(\d+)')
+
+
+def _empty_fmt():
+    return dict(bold=False, italic=False, underlined=False)
+
+
+def _append(runs, string, fmt):
+    if runs and runs[-1][1] == fmt:
+        runs[-1] = (runs[-1][0] + string, fmt)
+    else:
+        runs.append((string, fmt))
+
+
+class _HocrParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack = []  # (tag, classes, fmt_dict of element)
+        self.page_num = 0
+        self.runs = []
+        self.ready = []  # (page_num, runs) of finished paragraphs
+
+    def _fmt(self):
+        fmt = _empty_fmt()
+        for tag, classes, element_fmt in self.stack:
+            for k, v in element_fmt.items():
+                fmt[k] = fmt[k] or v
+
+        return fmt
+
+    def _inside(self, ocr_class):
+        return any(ocr_class in classes for tag, classes, element_fmt in self.stack)
+
+    def _flush(self):
+        if self.runs:
+            self.ready.append((self.page_num, self.runs))
+            self.runs = []
+
+    def _separate(self):
+        if self.runs and not self.runs[-1][0].endswith(' '):
+            _append(self.runs, ' ', self.runs[-1][1])
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HOCR_VOID_TAGS:
+            if tag == 'br':  # line break inside paragraph
+                self._separate()
+            return
+
+        attrs = dict(attrs)
+        classes = set((attrs.get('class') or '').split())
+        title = attrs.get('title') or ''
+        style = (attrs.get('style') or '') + ' ' + title
+
+        element_fmt = _empty_fmt()
+        if tag in HOCR_STYLE_TAGS:
+            element_fmt[HOCR_STYLE_TAGS[tag]] = True
+        if 'bold' in style.lower():
+            element_fmt['bold'] = True
+        if 'italic' in style.lower():
+            element_fmt['italic'] = True
+
+        if 'ocr_page' in classes:
+            self._flush()
+            match = HOCR_PPAGENO_RE.search(title)
+            self.page_num = int(match.group(1)) + 1 if match else self.page_num + 1
+        elif 'ocr_par' in classes:
+            self._flush()
+        elif 'ocr_line' in classes or 'ocrx_word' in classes:
+            self._separate()
+
+        self.stack.append((tag, classes, element_fmt))
+
+    def handle_endtag(self, tag):
+        if tag in HOCR_VOID_TAGS or all(opened_tag != tag for opened_tag, classes, element_fmt in self.stack):
+            return  # <br/>, stray end tag
+
+        while self.stack:
+            closed_tag, classes, element_fmt = self.stack.pop()
+
+            if 'ocr_par' in classes or ('ocr_line' in classes and not self._inside('ocr_par')):
+                self._flush()
+
+            if closed_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._inside('ocrx_word') or (self._inside('ocr_line') and data.strip()):
+            _append(self.runs, data if self._inside('ocrx_word') else data.strip(), self._fmt())
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def read_hocr(filename):
+    """
+    Stream-parse hOCR file
+
+    :param filename: hOCR (x)html file
+    :return: generator of (page_num, runs)
+    """
+    parser = _HocrParser()
+
+    with open(filename, encoding='utf-8') as file_h:
+        for chunk in iter(lambda: file_h.read(CHUNK_SIZE), ''):
+            parser.feed(chunk)
+            yield from parser.ready
+            parser.ready = []
+
+    parser.close()
+    yield from parser.ready
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _alto_fmt(font_style):
+    font_style = (font_style or '').lower().split()
+    return dict(bold='bold' in font_style,
+                italic='italics' in font_style or 'italic' in font_style,
+                underlined='underline' in font_style)
+
+
+def read_alto(filename):
+    """
+    Stream-parse ALTO XML file
+
+    :param filename: ALTO file
+    :return: generator of (page_num, runs)
+    """
+    styles = {}  # TextStyle ID -> fmt_dict
+    page_num = 0
+    runs = []
+    block_fmt = _empty_fmt()
+    line_fmt = _empty_fmt()
+
+    def referenced_fmt(element, inherited):
+        fmt = dict(inherited)
+        for ref in (element.get('STYLEREFS') or '').split():
+            for k, v in styles.get(ref, {}).items():
+                fmt[k] = fmt[k] or v
+
+        return fmt
+
+    for event, element in ElementTree.iterparse(filename, events=('start', 'end')):
+        tag = _local(element.tag)
+
+        if event == 'start':
+            if tag == 'Page':
+                physical = element.get('PHYSICAL_IMG_NR') or ''
+                page_num = int(physical) if physical.isdecimal() else page_num + 1
+            elif tag == 'TextBlock':
+                runs = []
+                block_fmt = referenced_fmt(element, _empty_fmt())
+            elif tag == 'TextLine':
+                line_fmt = referenced_fmt(element, block_fmt)
+                if runs and not runs[-1][0].endswith(' '):
+                    _append(runs, ' ', runs[-1][1])
+            continue
+
+        if tag == 'TextStyle':
+            styles[element.get('ID')] = _alto_fmt(element.get('FONTSTYLE'))
+        elif tag == 'String':
+            fmt = referenced_fmt(element, line_fmt)
+            if element.get('STYLE'):
+                for k, v in _alto_fmt(element.get('STYLE')).items():
+                    fmt[k] = fmt[k] or v
+            _append(runs, element.get('CONTENT') or '', fmt)
+        elif tag == 'SP':
+            if runs:
+                _append(runs, ' ', runs[-1][1])
+        elif tag == 'HYP':
+            _append(runs, element.get('CONTENT') or '-', runs[-1][1] if runs else _empty_fmt())
+        elif tag == 'TextBlock':
+            if runs:
+                yield page_num, runs
+            runs = []
+
+        if tag in ('Page', 'TextBlock', 'TextStyle'):
+            element.clear()
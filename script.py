@@ -1,12 +1,27 @@
-import uno
+import argparse
 import logging
+import sys
+from os import path
 
+import exporters
+import journal
+import office
+import progress
+import unoreplay
+import unotrace
+import validation
+import watchdog
 from elements import Document
+from parsers.homoglyphs import homoglyphs
 from parsers.middle_dash_between_digits import middle_dash_between_digits
 from parsers.old_spell import old_spell
 from parsers.yoficator import yoficator
+from parsers.ocr_fix import ocr_fix
+from parsers.dehyphenate import dehyphenate
 from parsers.cut_soft_hyphen import cut_soft_hyphen
+from parsers.consistency import consistency
 from generators import star_footnotes
+from pipeline import Pipeline, Stage
 
 
 def get_model():
@@ -15,18 +30,8 @@ def get_model():
 
     :return: current model
     """
-    # get the uno component context from the PyUNO runtime
-    localContext = uno.getComponentContext()
-
-    # create the UnoUrlResolver
-    resolver = localContext.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", localContext)
-
-    # connect to the running office
-    ctx = resolver.resolve("uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext")
-    smgr = ctx.ServiceManager
-
     # get the central desktop object
-    desktop = smgr.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    desktop = office.get_desktop()
 
     # access the current writer document
     model = desktop.getCurrentComponent()
@@ -34,21 +39,152 @@ def get_model():
     return model
 
 
+def read_document(filename=None, selection=False, pages=None):
+    """
+    Read document from OCR output file or from current office document
+
+    :param filename: hOCR (.hocr, .html) or ALTO (.xml) file, None for current document
+    :param selection: read only selected paragraphs of current document
+    :param pages: (first, last) - read only these pages of current document
+    :return: Document
+    """
+    if filename is None:
+        return Document().from_model(get_model(), selection=selection, pages=pages)
+
+    extension = path.splitext(filename)[1].lower()
+    if extension in ('.hocr', '.html', '.htm', '.xhtml'):
+        return Document().from_hocr(filename)
+    elif extension in ('.xml', '.alto'):
+        return Document().from_alto(filename)
+
+    raise Exception("Unknown input format: %s" % filename)
+
+
+def parse_pages(value):
+    """
+    :param value: page range like '10-20' or a single page '7'
+    :return: (first, last) or None
+    """
+    if not value:
+        return None
+
+    first, _, last = value.partition('-')
+    return int(first), int(last or first)
+
+
+PIPELINE = [
+    Stage('strip_empty'),
+    #Stage('strip_running_headers'),  # page numbers and running headers
+    #Stage('strip_custom', lambda x: not(len(x) == 3 and str(x).isdecimal()), use_tagged=False, name='strip_page_numbers'),
+    #Stage('strip_footnotes', star_footnotes()),
+    Stage('validate', [validation.min_length(60)], name='validate:min_length'),
+    #Stage('replace_footnotes', star_footnotes()),
+    Stage('merge_paragraphs'),
+    Stage('prepare_paragraphs', homoglyphs),
+    Stage('prepare_paragraphs', middle_dash_between_digits),
+    Stage('prepare_footnotes', middle_dash_between_digits),
+    Stage('prepare_paragraphs', old_spell),
+    #Stage('prepare_paragraphs', dehyphenate),  # needs a real lexicon, see parsers/lexicon.py
+    Stage('prepare_paragraphs', ocr_fix),
+    Stage('prepare_paragraphs', yoficator),
+    Stage('prepare_paragraphs', cut_soft_hyphen),
+    #Stage('index_words'),  # book-wide word counts for consistency, index_words(merge=[...]) adds other volumes
+    #Stage('prepare_paragraphs', consistency),
+    Stage('validate', validation.quality_gates(), name='validate:quality_gates'),
+    #Stage('prepare_footnotes', canonic_links),
+]
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
 
-    model = get_model()
-    document = Document().from_model(model)
-    document.strip_empty()
-    #document.strip_custom(lambda x: not(len(x) == 3 and str(x).isdecimal()), use_tagged=False)  # page numbers
-    #document.strip_footnotes(star_footnotes())
-    document.check(lambda x: len(x) > 60, "Too short paragraph ")
-    #document.replace_footnotes(star_footnotes())
-    document.merge_paragraphs()
-    document.prepare_paragraphs(middle_dash_between_digits)
-    document.prepare_footnotes(middle_dash_between_digits)
-    document.prepare_paragraphs(old_spell)
-    document.prepare_paragraphs(yoficator)
-    document.prepare_paragraphs(cut_soft_hyphen)
-    #document.prepare_footnotes(canonic_links)
-    document.write("out.odt")
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Post-process text from OCR")
+    arg_parser.add_argument('input', nargs='?',
+                            help="hOCR or ALTO file to read instead of current office document")
+    arg_parser.add_argument('-o', '--output', default="out.odt",
+                            help="file to write: .txt, .md and .epub are exported without office")
+    arg_parser.add_argument('--title', help="book title for .epub output, file name by default")
+    arg_parser.add_argument('--selection', action='store_true', help="process only selected paragraphs")
+    arg_parser.add_argument('--pages', metavar='FIRST-LAST', help="process only these pages, e.g. 10-20")
+    arg_parser.add_argument('--in-place', action='store_true',
+                            help="replace changed words in current document instead of writing a new one")
+    arg_parser.add_argument('--checkpoint-dir', help="save document after each stage to this directory")
+    arg_parser.add_argument('--resume', help="resume from checkpoint: 'last', stage name or number, or file")
+    arg_parser.add_argument('--until', help="stop after this stage ('read' to only read), don't write")
+    arg_parser.add_argument('--trace-uno', metavar='FILE', nargs='?', const='',
+                            help="count UNO calls, print summary and save every call to FILE (JSON lines)")
+    arg_parser.add_argument('--record-uno', metavar='FILE', help="record UNO session to FILE for --replay-uno")
+    arg_parser.add_argument('--replay-uno', metavar='FILE', help="replay recorded UNO session instead of office")
+    arg_parser.add_argument('--replay-scale', type=float, default=1.0,
+                            help="multiplier of recorded latencies when replaying, 0 for no delays")
+    arg_parser.add_argument('--optimize', action='store_true',
+                            help="plan stages by parser properties: fuse, reorder, cache, run in processes")
+    arg_parser.add_argument('--workers', type=int, default=1, help="processes for parsers with --optimize")
+    arg_parser.add_argument('--plan', action='store_true', help="print planned stages and exit")
+    arg_parser.add_argument('--journal', metavar='FILE',
+                            help="write changes to FILE (JSON lines) instead of log, query with journal.py")
+    arg_parser.add_argument('--paragraph-budget', type=float, metavar='SECONDS',
+                            help="quarantine paragraphs a parser spends longer on, pass them through unchanged")
+    arg_parser.add_argument('--stage-budget', type=float, metavar='SECONDS',
+                            help="pass the rest of paragraphs through unchanged once a stage spends this long")
+    arg_parser.add_argument('--quarantine', metavar='FILE', help="save quarantined paragraphs to reproduce them")
+    arg_parser.add_argument('--progress', metavar='FILE', nargs='?', const='',
+                            help="print progress (stage, paragraphs, ETA) and rewrite FILE with it as JSON")
+    args = arg_parser.parse_args()
+
+    if args.paragraph_budget or args.stage_budget:
+        watchdog.enable(args.paragraph_budget, args.stage_budget, args.quarantine)
+
+    if args.journal:
+        journal.enable(args.journal)
+
+    if args.record_uno:
+        unoreplay.record(args.record_uno)
+    elif args.trace_uno is not None:
+        unotrace.enable(args.trace_uno or None)
+
+    if args.replay_uno:
+        office.use(unoreplay.Replayer(args.replay_uno, args.replay_scale).root())
+
+    pipeline = Pipeline(PIPELINE, checkpoint_dir=args.checkpoint_dir, optimize=args.optimize, workers=args.workers)
+    if args.plan:
+        print(pipeline.describe())
+        raise SystemExit()
+
+    progress.enable(callback=(lambda status: print(progress.describe(status), file=sys.stderr))
+                    if args.progress is not None else None, filename=args.progress or None)
+    cancelled = None
+    document = None
+    try:
+        if not args.resume:
+            with unotrace.stage('read'), progress.stage('read'):
+                document = read_document(args.input, selection=args.selection, pages=parse_pages(args.pages))
+
+        document = pipeline.run(document, resume=args.resume, until=args.until)
+
+        if not args.until:
+            with unotrace.stage('write'), progress.stage('write', len(document.paragraphs)):
+                if args.in_place:
+                    document.write_in_place()  # only changed words are replaced in source document
+                elif exporters.supports(args.output):
+                    exporters.export(document, args.output, title=args.title)
+                else:
+                    document.write(args.output)
+    except progress.Cancelled as exc:
+        cancelled = exc  # reports below still go out, journal is flushed
+    except BaseException:
+        progress.disable('failed')
+        raise
+    progress.disable()
+
+    if args.trace_uno is not None or args.record_uno:
+        print(unotrace.disable())
+
+    if watchdog.WATCHDOG is not None:
+        print(watchdog.disable().report())
+
+    if args.journal:
+        print("%s changes written to %s" % (journal.disable().recorded, args.journal))
+
+    if cancelled is not None:
+        raise SystemExit(str(cancelled))
@@ -0,0 +1,326 @@
+"""
+Sharded processing of one book: page ranges are processed independently and joined back
+with the same result as one run over the whole document
+
+Stages are split by what they need to see:
+    global          strip_running_headers counts recurrences over all pages, index_words counts words
+                    of all pages, they run before splitting (and stages before them too)
+    whole book      check and validate judge limits and document rules (footnote count) on all pages:
+                    before merge_paragraphs they are global, after it they may only end the pipeline
+                    and run once on the joined document
+    page-local      strip_footnotes, replace_footnotes, strip_* , prepare_* see one page at a time
+    merge           merge_paragraphs looks across paragraph (and so shard) boundaries
+
+A shard runs its stages up to merge_paragraphs, holds back its edge paragraphs unprocessed (the first one
+if it would be merged into the previous shard, and the last one, which the next shard may merge into)
+and runs the rest of stages on the others. Reduce adds footnote numbers of previous shards to {{N}} links,
+merges edge paragraphs across shard boundaries, runs stages after merge_paragraphs on them, concatenates
+and runs the final whole book stages.
+Footnote links are renumbered after parsers ran on them, which is the same as long as parsers leave
+{{N}} tags alone (registered parsers are tag_safe).
+
+Shards are checkpoint files (checkpoint.py), so they may be processed on other hosts:
+
+    python sharding.py split book.jsonl.gz WORKDIR --shards 8
+    python sharding.py map WORKDIR/shard-003.jsonl.gz    (on any host, writes shard-003.done.jsonl.gz)
+    python sharding.py reduce WORKDIR -o out.jsonl.gz
+    python sharding.py run book.jsonl.gz WORKDIR --shards 8 --workers 4 -o out.jsonl.gz
+
+Input is the read checkpoint (script.py --until read --checkpoint-dir DIR), output can be written
+with script.py --resume out.jsonl.gz.
+"""
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import re
+from functools import partial
+
+import checkpoint
+import journal
+from elements import Document
+from pipeline import Pipeline
+
+GLOBAL_METHODS = ('strip_running_headers', 'index_words')
+WHOLE_BOOK_METHODS = ('check', 'validate')
+PAGE_LOCAL_METHODS = ('strip_empty', 'strip_custom', 'strip_footnotes', 'replace_footnotes', 'prepare_paragraphs',
+                      'prepare_footnotes')
+PARAGRAPH_LOCAL_METHODS = ('strip_empty', 'strip_custom', 'prepare_paragraphs', 'prepare_footnotes')
+MERGE_METHOD = 'merge_paragraphs'
+
+FOOTNOTE_LINK_RE = re.compile(r'{{(\d+)}}')
+
+_stages = None  # stages of worker process, set before fork
+
+
+def split_stages(stages):
+    """
+    :param stages: list of Stage
+    :return: (global stages, shard stages up to merge_paragraphs including it, stages after it,
+              whole book stages ending pipeline, run on joined shards)
+    """
+    merge = next((i for i, stage in enumerate(stages) if stage.method == MERGE_METHOD), len(stages))
+    last_global = max([i for i, stage in enumerate(stages) if stage.method in GLOBAL_METHODS
+                       or (stage.method in WHOLE_BOOK_METHODS and i < merge)], default=-1)
+    end = len(stages)
+    while end > last_global + 1 and stages[end - 1].method in WHOLE_BOOK_METHODS:
+        end -= 1
+    global_stages, pre, post, final = stages[:last_global + 1], [], [], stages[end:]
+
+    current, allowed = pre, PAGE_LOCAL_METHODS
+    for stage in stages[last_global + 1:end]:
+        if stage.method == MERGE_METHOD and current is pre:
+            pre.append(stage)
+            current, allowed = post, PARAGRAPH_LOCAL_METHODS
+        elif stage.method in allowed:
+            current.append(stage)
+        elif stage.method in WHOLE_BOOK_METHODS:
+            raise Exception("Stage %s needs the whole book, in shards it can run before merge_paragraphs "
+                            "or at the end of pipeline" % stage.name)
+        else:
+            raise Exception("Stage %s can't run in shards" % stage.name)
+
+    return global_stages, pre, post, final
+
+
+def split(document, shards):
+    """
+    Split document into page ranges with about the same number of paragraphs
+
+    :param shards: number of shards
+    :return: list of ((first page, last page), Document)
+    """
+    target = len(document.paragraphs) / shards
+    groups = []
+
+    for paragraph in document.paragraphs:
+        if not groups or (paragraph.page_num != groups[-1][-1].page_num and len(groups) < shards and
+                          sum(map(len, groups)) >= target * len(groups)):
+            groups.append([])
+        groups[-1].append(paragraph)
+
+    starts = [group[0].page_num for group in groups]
+    result = []
+    for k, group in enumerate(groups):
+        low = starts[k] if k else float('-inf')  # pages between ranges, if any, go to the previous shard
+        high = starts[k + 1] if k + 1 < len(groups) else float('inf')
+        shard = Document()
+        shard.paragraphs = group
+        shard.footnotes = [footnote for footnote in document.footnotes if low <= footnote.page_num < high]
+        shard.footnote_links = document.footnote_links  # numbered by global stages
+        result.append(((group[0].page_num, group[-1].page_num), shard))
+
+    return result
+
+
+def process_shard(document, stages, optimize=False):
+    """
+    Run shard stages, leaving edge paragraphs as merge_paragraphs left them
+
+    :param stages: all stages of pipeline
+    :return: (document, meta) - meta tells whether first (head) and last (tail) paragraphs are held back,
+        footnote links numbered in shard and before splitting
+    """
+    pre, post = split_stages(stages)[1:3]
+    numbered = document.footnote_links  # by global stages, links of shards are counted from 0
+    document.footnote_links = 0
+    Pipeline(pre, optimize=optimize).run(document)
+
+    head = tail = None
+    body = document.paragraphs
+    if pre and pre[-1].method == MERGE_METHOD and body:
+        if body[0].text_untagged[:1].islower():
+            head, body = body[0], body[1:]
+        if body:
+            tail, body = body[-1], body[:-1]
+
+    document.paragraphs = body
+    Pipeline(post, optimize=optimize).run(document)
+    document.paragraphs = [x for x in (head,) if x] + document.paragraphs + [x for x in (tail,) if x]
+
+    return document, dict(head=head is not None, tail=tail is not None, footnote_links=document.footnote_links,
+                          numbered=numbered)
+
+
+def renumber_links(document, offset):
+    """
+    Add offset to {{N}} footnote links of document paragraphs
+    """
+    if not offset:
+        return
+
+    def replacer(match):
+        return '{{%s}}' % (int(match.group(1)) + offset)
+
+    for paragraph in document.paragraphs:
+        paragraph.text = FOOTNOTE_LINK_RE.sub(replacer, paragraph.text)
+
+
+def reduce(shards, stages, optimize=False):
+    """
+    Join processed shards
+
+    :param shards: list of (Document, meta from process_shard) in page order
+    :param stages: all stages of pipeline
+    :return: Document
+    """
+    post, final = split_stages(stages)[2:]
+    document = Document()
+    edges = Document()
+    offset = 0
+    pending = None  # edge paragraph later shards may still merge into
+
+    for shard, meta in shards:
+        renumber_links(shard, offset)
+        offset += meta.get('footnote_links', 0)
+        document.footnotes.extend(shard.footnotes)
+
+        paragraphs = list(shard.paragraphs)
+        head = paragraphs.pop(0) if meta.get('head') else None
+        tail = paragraphs.pop() if meta.get('tail') else None
+
+        if head is not None:
+            if pending is None:
+                pending = head
+            else:
+                journal.record('merge_paragraphs', pending.id, pending.page_num, len(pending.text_untagged), '\n', ' ',
+                               "[CHANGED] Merging paragraphs %s and %s across shards", pending, head)
+                pending += head
+
+        if paragraphs or tail is not None:
+            if pending is not None:
+                document.paragraphs.append(pending)
+                edges.paragraphs.append(pending)
+            document.paragraphs.extend(paragraphs)
+            pending = tail
+
+    if pending is not None:
+        document.paragraphs.append(pending)
+        edges.paragraphs.append(pending)
+
+    if edges.paragraphs:  # stages after merge may also strip some of them
+        held = set(map(id, edges.paragraphs))
+        Pipeline(post, optimize=optimize).run(edges)
+        kept = set(map(id, edges.paragraphs))
+        document.paragraphs = [x for x in document.paragraphs if id(x) not in held or id(x) in kept]
+    document.footnote_links = offset + (shards[0][1].get('numbered', 0) if shards else 0)
+    Pipeline(final, optimize=optimize).run(document)
+
+    return document
+
+
+def _shard_name(workdir, index, done=False):
+    return os.path.join(workdir, 'shard-%03d%s.jsonl.gz' % (index, '.done' if done else ''))
+
+
+def split_file(filename, workdir, shards, stages):
+    """
+    Run global stages on saved document and save shards of it
+
+    :return: list of shard files
+    """
+    document = Pipeline(split_stages(stages)[0]).run(checkpoint.load(filename))
+    os.makedirs(workdir, exist_ok=True)
+
+    files = []
+    for index, (pages, shard) in enumerate(split(document, shards)):
+        files.append(_shard_name(workdir, index))
+        checkpoint.dump(shard, files[-1], meta=dict(shard=index, pages=pages))
+        logging.info("[INFO] Shard %s: pages %s-%s, %s paragraphs", index, pages[0], pages[1], len(shard.paragraphs))
+
+    return files
+
+
+def map_file(filename, stages=None, optimize=False):
+    """
+    Process saved shard, result goes next to it as shard-N.done.jsonl.gz
+
+    :return: result file
+    """
+    meta = checkpoint.read_meta(filename)
+    document, result_meta = process_shard(checkpoint.load(filename), stages or _stages, optimize)
+    meta.update(result_meta)
+
+    output = _shard_name(os.path.dirname(filename), meta['shard'], done=True)
+    checkpoint.dump(document, output, meta=meta)
+
+    return output
+
+
+def reduce_files(workdir, output, stages, optimize=False):
+    """
+    Join processed shards of workdir into one saved document
+    """
+    files = sorted(glob.glob(os.path.join(workdir, 'shard-*.done.jsonl.gz')))
+    inputs = glob.glob(os.path.join(workdir, 'shard-[0-9][0-9][0-9].jsonl.gz'))
+    if len(files) != len(inputs):
+        raise Exception("%s of %s shards are processed in %s" % (len(files), len(inputs), workdir))
+
+    document = reduce([(checkpoint.load(x), checkpoint.read_meta(x)) for x in files], stages, optimize)
+    checkpoint.dump(document, output, meta=dict(stage=stages[-1].name, index=len(stages)))
+
+    return document
+
+
+def _init_worker(stages):
+    global _stages
+    _stages = stages
+
+
+def run(filename, workdir, output, stages, shards, workers=1, optimize=False):
+    """
+    Local coordinator: split, process shards in processes, reduce
+
+    Each shard gets a fresh process forked from this one, so stages with state (footnote generators)
+    start from the beginning in every shard.
+    """
+    files = split_file(filename, workdir, shards, stages)
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(workers, initializer=_init_worker, initargs=(stages,), maxtasksperchild=1) as pool:
+        pool.map(partial(map_file, optimize=optimize), files, chunksize=1)
+
+    return reduce_files(workdir, output, stages, optimize)
+
+
+def get_stages(spec=None):
+    """
+    :param spec: list of 'method[:parser]' like daemon takes, None for script.PIPELINE
+    """
+    if spec:
+        return Pipeline.from_spec(spec).stages
+
+    import script
+    return script.PIPELINE
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    arg_parser = argparse.ArgumentParser(description="Process one book in page range shards")
+    arg_parser.add_argument('command', choices=['split', 'map', 'reduce', 'run'])
+    arg_parser.add_argument('paths', nargs='+', help="split, run: INPUT WORKDIR; map: SHARD; reduce: WORKDIR")
+    arg_parser.add_argument('-o', '--output', default='out.jsonl.gz', help="saved document to write")
+    arg_parser.add_argument('--shards', type=int, default=4)
+    arg_parser.add_argument('--workers', type=int, default=1)
+    arg_parser.add_argument('--optimize', action='store_true', help="plan stages by parser properties")
+    arg_parser.add_argument('--pipeline', nargs='+', help="stages like 'prepare_paragraphs:old_spell', "
+                                                          "script.py pipeline by default")
+    args = arg_parser.parse_args()
+    if len(args.paths) < dict(split=2, run=2).get(args.command, 1):
+        arg_parser.error("%s needs INPUT and WORKDIR" % args.command)
+    pipeline_stages = get_stages(args.pipeline)
+
+    if args.command == 'split':
+        print('\n'.join(split_file(args.paths[0], args.paths[1], args.shards, pipeline_stages)))
+    elif args.command == 'map':
+        for shard_file in args.paths:
+            print(map_file(shard_file, pipeline_stages, args.optimize))
+    elif args.command == 'reduce':
+        print("%s paragraphs written to %s" % (
+            len(reduce_files(args.paths[0], args.output, pipeline_stages, args.optimize).paragraphs), args.output))
+    else:
+        result = run(args.paths[0], args.paths[1], args.output, pipeline_stages, args.shards, args.workers,
+                     args.optimize)
+        print("%s paragraphs written to %s" % (len(result.paragraphs), args.output))
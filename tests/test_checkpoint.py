@@ -0,0 +1,22 @@
+import checkpoint
+from elements import Document, Footnote, Paragraph
+
+
+def test_resume_keeps_ids_and_state(tmp_path):
+    document = Document()
+    document.paragraphs = [Paragraph(1, 'Первый', 'Первый', None), Paragraph(2, 'второй', 'второй', None)]
+    document.discarded = [Paragraph(2, '12', '12', None)]
+    document.footnotes = [Footnote(2, '1 Сноска', '1 Сноска', None, 1)]
+    document.footnote_links = 1
+    document.headers_report = {'глава': dict(position='top', pages=3, example='Глава')}
+
+    filename = str(tmp_path / 'document.jsonl.gz')
+    checkpoint.dump(document, filename)
+    loaded = checkpoint.load(filename)
+
+    assert [x.id for x in loaded.paragraphs + loaded.discarded + loaded.footnotes] == \
+        [x.id for x in document.paragraphs + document.discarded + document.footnotes]
+    assert [x.text for x in loaded.discarded] == ['12']
+    assert loaded.footnote_links == 1
+    assert loaded.headers_report == document.headers_report
+    assert Paragraph(3, 'новый', 'новый', None).id > max(x.id for x in document.footnotes + document.discarded)
@@ -0,0 +1,25 @@
+import daemon
+import wordindex
+from parsers import registry
+
+HOCR = """<html><body><div class="ocr_page" title="ppageno 0">
+<p class="ocr_par"><span class="ocr_line"><span class="ocrx_word">Зеленая</span> <span class="ocrx_word">елка.</span>
+</span></p></div></body></html>
+"""
+
+
+def test_job_doesnt_see_index_of_previous_job(tmp_path):
+    source = tmp_path / 'page.hocr'
+    source.write_text(HOCR, encoding='utf-8')
+    output = tmp_path / 'out.txt'
+    server = daemon.Daemon()
+    job = daemon.Job(1, dict(input=str(source), output=str(output), pipeline=['prepare_paragraphs:consistency']))
+
+    wordindex.use(wordindex.WordIndex({'ёлка': 40}))  # left by a job before in this worker thread
+    registry.add_usage({'consistency': (10, 5)})
+    server.process(job, None)
+
+    assert job.state == 'done'
+    assert 'елка' in output.read_text(encoding='utf-8')
+    assert wordindex.get_index() is None
+    assert registry.get_usage() == {}
@@ -0,0 +1,16 @@
+import pytest
+
+from parsers.dehyphenate import dehyphenate
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('двух- и трёхэтажные', 'двух- и трёхэтажные'),
+    ('пред- и послевоенный', 'пред- и послевоенный'),
+    ('аудио- или видеозапись', 'аудио- или видеозапись'),
+    ('что- то', 'что-то'),
+    ('кто- нибудь', 'кто-нибудь'),
+    ('кое- как', 'кое-как'),
+    ('ме­дведь', 'медведь'),
+])
+def test_dehyphenate(text, expected):
+    assert dehyphenate(text) == expected
@@ -0,0 +1,31 @@
+import headers
+from elements import Paragraph
+
+
+def _paragraphs(pages):
+    return [Paragraph(page_num, text, text, None) for page_num, texts in pages for text in texts]
+
+
+def test_running_heads_and_folios():
+    paragraphs = _paragraphs([(page, ['Глава 1. О вере' if page % 2 else 'О ВЕРЕ', 'Текст страницы.', str(page)])
+                              for page in range(1, 21)])
+    remove, report = headers.detect(paragraphs)
+
+    assert sorted(report) == ['0', 'глава 0 о вере', 'о вере']
+    assert all(paragraphs[i].text_untagged != 'Текст страницы.' for i in remove)
+
+
+def test_dialogue_is_not_a_header():
+    paragraphs = _paragraphs([(page, ['— Да.' if page in (2, 3, 4) else 'Начало %s-й страницы' % page, 'Текст.'])
+                              for page in range(1, 11)])
+    remove, report = headers.detect(paragraphs)
+
+    assert 'да' not in report
+
+
+def test_scattered_line_is_not_a_header():
+    paragraphs = _paragraphs([(page, ['Аминь' if page in (10, 400, 900) else 'Строка %s' % ('а' * (page % 7)),
+                                      'Текст.']) for page in range(1, 1001)])
+    remove, report = headers.detect(paragraphs)
+
+    assert 'аминь' not in report
@@ -0,0 +1,33 @@
+"""
+Optimized pipeline (--optimize) gives the same output as stages run in their order
+"""
+import corpus
+from elements import Document, Paragraph
+from parsers.cut_soft_hyphen import cut_soft_hyphen
+from parsers.homoglyphs import homoglyphs
+from parsers.middle_dash_between_digits import middle_dash_between_digits
+from parsers.ocr_fix import ocr_fix
+from parsers.old_spell import old_spell
+from parsers.yoficator import yoficator
+from pipeline import Pipeline, Stage
+
+STAGES = [Stage('prepare_paragraphs', parser) for parser in
+          (homoglyphs, middle_dash_between_digits, old_spell, ocr_fix, yoficator, cut_soft_hyphen)]
+TEXTS = ['Купил е­лку и еще одну', 'Он ещ­е не при­шел, 1-2 раза', 'Свет мiра']
+
+
+def _document():
+    document = Document()
+    for index, text in enumerate(TEXTS + corpus.load()[:300]):
+        document.paragraphs.append(Paragraph(index // 10 + 1, text, text, None))
+    return document
+
+
+def _texts(document):
+    return [(paragraph.text, paragraph.text_untagged) for paragraph in document.paragraphs]
+
+
+def test_optimized_same_as_plain():
+    expected = _texts(Pipeline(STAGES).run(_document()))
+    assert _texts(Pipeline(STAGES, optimize=True).run(_document())) == expected
+    assert expected[0][0] == 'Купил елку и ещё одну'
@@ -0,0 +1,35 @@
+"""
+A parser must leave every text its prefilter rejects unchanged (texts are made by bench/prefilters.py)
+"""
+import pytest
+
+import corpus
+import parsers
+from parsers import old_spell, registry
+from prefilters import old_spell_reference, texts
+from stages import PARSERS
+
+
+@pytest.fixture(scope='module')
+def checked():
+    parsers.warm_up()
+    return texts(corpus.load(), 5000)
+
+
+def _call(func, text):
+    try:
+        return func(text)
+    except Exception:  # counts as changed
+        return None
+
+
+@pytest.mark.parametrize('name', [name for name in PARSERS if registry.properties(parsers.get(name)).prefilter])
+def test_rejected_texts_unchanged(name, checked):
+    func = parsers.get(name)
+    prefilter = registry.properties(func).prefilter
+
+    assert [text for text in checked if not prefilter(text) and _call(func, text) != text] == []
+
+
+def test_old_spell_literals(checked):
+    assert [text for text in checked if old_spell_reference(text) != old_spell.old_spell(text)] == []
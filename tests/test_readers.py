@@ -0,0 +1,18 @@
+import readers
+
+HOCR = """<html><body><div class="ocr_page" title="ppageno 0">
+<p class="ocr_par"><span class="ocr_line"><span class="ocrx_word">Привет</span> <b><span class="ocrx_word">мир</span>
+</b><br/><span class="ocrx_word">второй</span></span><br>
+<span class="ocr_line"><span class="ocrx_word">строка</span></span></p></span>
+<p class="ocr_par"><span class="ocr_line"><span class="ocrx_word">Третий</span></span></p>
+</div></body></html>
+"""
+
+
+def test_hocr_line_breaks(tmp_path):
+    filename = tmp_path / 'page.hocr'
+    filename.write_text(HOCR, encoding='utf-8')
+
+    paragraphs = [(page_num, ''.join(string for string, fmt in runs)) for page_num, runs in
+                  readers.read_hocr(str(filename))]
+    assert paragraphs == [(1, 'Привет мир второй строка'), (1, 'Третий')]
@@ -0,0 +1,69 @@
+import pytest
+
+import sharding
+import validation
+from elements import Document, Paragraph
+from generators import star_footnotes
+from pipeline import Pipeline, Stage
+
+
+def _document():
+    document = Document()
+    for page in range(1, 21):
+        for text in ['Текст страницы %s *' % page, 'продолжение %s' % page, 'Сѣверъ', '* сноска %s' % page]:
+            document.paragraphs.append(Paragraph(page, text, text, None))
+    document.paragraphs[-1].text = document.paragraphs[-1].text_untagged = 'Последний'  # a footnote is missing
+    return document
+
+
+def _stages(limit=None):
+    return [Stage('validate', [validation.min_length(10)], name='validate:min_length'),
+            Stage('strip_footnotes', star_footnotes()),
+            Stage('replace_footnotes', star_footnotes()),
+            Stage('merge_paragraphs'),
+            Stage('validate', [validation.regex('pre_reform', validation.PRE_REFORM, "Pre-reform", limit=limit),
+                               validation.document_rule('footnote_count', validation.footnote_count, "Footnotes")],
+                  name='validate:gates')]
+
+
+def _sharded(shards, limit=None):
+    """
+    Shards in this process, every one with stages of its own as in a fresh worker (footnote generators)
+    """
+    document = Pipeline(sharding.split_stages(_stages(limit))[0]).run(_document())
+    return sharding.reduce([sharding.process_shard(shard, _stages(limit)) for pages, shard in
+                            sharding.split(document, shards)], _stages(limit))
+
+
+def test_split_stages():
+    stages = _stages()
+    global_stages, pre, post, final = sharding.split_stages(stages)
+
+    assert (global_stages, pre, post, final) == ([stages[0]], stages[1:4], [], [stages[4]])
+    with pytest.raises(Exception):
+        sharding.split_stages(stages[:4] + [stages[4], Stage('strip_empty')])
+
+
+def test_validation_of_whole_book():
+    expected = Pipeline(_stages()).run(_document())
+    document = _sharded(4)
+
+    assert document.validation_report.pages == expected.validation_report.pages
+    assert document.validation_report.counts == {'pre_reform': 20, 'footnote_count': 1}
+
+
+def test_limit_of_whole_book():
+    with pytest.raises(validation.ValidationError):
+        Pipeline(_stages(limit=10)).run(_document())
+    with pytest.raises(validation.ValidationError):
+        _sharded(4, limit=10)  # 5 findings in every shard
+    assert _sharded(4, limit=20).validation_report.counts['pre_reform'] == 20
+
+
+def test_same_paragraphs():
+    expected = Pipeline(_stages()).run(_document())
+    document = _sharded(3)
+
+    assert [(x.page_num, x.text) for x in document.paragraphs] == [(x.page_num, x.text) for x in expected.paragraphs]
+    assert document.footnote_links == expected.footnote_links
+    assert [x.text for x in document.footnotes] == [x.text for x in expected.footnotes]
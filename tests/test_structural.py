@@ -0,0 +1,62 @@
+import itertools
+
+import pytest
+
+import columns
+import validation
+from elements import Document, Paragraph
+
+
+def _document(pages):
+    document = Document()
+    document.paragraphs = [Paragraph(page_num, text, text, None) for page_num, texts in pages for text in texts]
+    return document
+
+
+def _pages():
+    return [(page, ['Текст страницы %s и' % page, 'продолжение', '', '*сноска', 'её конец', '12'])
+            for page in range(1, 6)]
+
+
+def _run(document):
+    document.strip_empty()
+    document.check(columns.longer_than(5), "short")
+    document.strip_footnotes(itertools.cycle(['*', '**']))
+    document.merge_paragraphs()
+    document.validate([validation.min_length(5)])
+    return ([(paragraph.page_num, paragraph.text) for paragraph in document.paragraphs],
+            [(footnote.page_num, footnote.text) for footnote in document.footnotes],
+            document.validation_report.counts)
+
+
+def test_table_follows_text_assignment():
+    document = _document([(1, ['Один', 'два', 'Три'])])
+    document.paragraphs[1].text_untagged = 'Два'
+    document.merge_paragraphs()
+    document.paragraphs[1].text = document.paragraphs[1].text_untagged = 'два'
+    document.merge_paragraphs()
+
+    assert [paragraph.text_untagged for paragraph in document.paragraphs] == ['Один два', 'Три']
+
+
+def test_table_kept_when_other_document_changes():
+    if not columns.available():
+        pytest.skip("NumPy is not installed")
+
+    document, other = _document([(1, ['Один', 'два'])]), _document([(1, ['Три'])])
+    table = document.table()
+    other.paragraphs[0].text = 'три'
+
+    assert document.table() is table
+    document.paragraphs[0].text = 'Раз'
+    assert document.table() is not table
+
+
+def test_without_numpy(monkeypatch):
+    if not columns.available():
+        pytest.skip("NumPy is not installed")
+
+    expected = _run(_document(_pages()))
+    monkeypatch.setattr(columns, 'numpy', None)
+
+    assert _run(_document(_pages())) == expected
@@ -0,0 +1,90 @@
+"""
+parsers.tokenizer against nltk.word_tokenize it replaced: parsers using it give the same output with both
+"""
+import pytest
+
+import corpus
+from parsers import canonic_links, yoficator
+from parsers.tokenizer import tokenize
+
+nltk = pytest.importorskip('nltk')
+
+CITATIONS = [
+    "(Рим. 8,28)",
+    "(Ис. 53:5)",
+    "(Лк. 1, 1—4; 2, 3)",
+    "(Деян. гл. 2, 4)",
+    "(2 Цар. 7, 12-16)",
+    "(1 Паралип. 28, 5–7)",
+    "(Мф. 5, 3 и 10; Ин. 3, 16)",
+    "Рим 5, 1",
+    "как сказано в Рим.",
+    "как сказано в 2 Цар.",
+    "(см. Рим.)",
+    "Ин. гл. 3, ст. 16 и далее",
+    "Рим... и дальше",
+    "Рим",
+]
+
+
+def _nltk_tokenize(text):
+    try:
+        return nltk.word_tokenize(text)
+    except LookupError:  # no punkt models
+        return nltk.word_tokenize(text, preserve_line=True)
+
+
+def _nltk_spans(text, dotted=False):
+    """
+    Tokens with offsets, as canonic_links found them before parsers.tokenizer
+    """
+    offset = 0
+    for token in _nltk_tokenize(text):
+        offset = text.find(token, offset)
+        yield token, offset, offset + len(token)
+        offset += len(token)
+
+
+def _texts():
+    paragraphs = corpus.load()
+    texts = CITATIONS + paragraphs
+    texts += ['%s %s %s' % (paragraph, citation, paragraph) for paragraph in paragraphs[:50] for citation in CITATIONS]
+    return texts
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return _texts()
+
+
+def test_spans_are_slices(texts):
+    for text in texts:
+        for dotted in (False, True):
+            for token, start, end in tokenize(text, dotted):
+                assert text[start:end] == token
+
+
+def test_canonic_links_citations():
+    for text in CITATIONS:
+        canonic_links.canonic_links(text)  # used to raise IndexError
+    assert canonic_links.canonic_links("(2 Цар. 7, 12-16)") == "(2 Цар. 7, 12-16)"
+
+
+def test_canonic_links_same_as_nltk(texts, monkeypatch):
+    expected = []
+    with monkeypatch.context() as patch:
+        patch.setattr(canonic_links, 'tokenize', _nltk_spans)
+        for text in texts:
+            expected.append(canonic_links.canonic_links(text))
+
+    assert [canonic_links.canonic_links(text) for text in texts] == expected
+
+
+def test_yoficator_same_as_nltk(texts, monkeypatch):
+    expected = []
+    with monkeypatch.context() as patch:
+        patch.setattr(yoficator, 'words', _nltk_tokenize)
+        for text in texts:
+            expected.append(yoficator.yoficator(text))
+
+    assert [yoficator.yoficator(text) for text in texts] == expected
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+import validation
+from elements import Document, Paragraph
+
+
+def _document(texts):
+    document = Document()
+    document.paragraphs = [Paragraph(1, text, text, None) for text in texts]
+    return document
+
+
+def _counts(rules, texts):
+    return dict(_document(texts).validate(rules).validation_report.counts)
+
+
+TEXTS = ['Abc и Сѣверъ', 'abc', 'мир', 'слово слово', 'x1 y2']
+
+
+def test_inline_global_flags():
+    rules = [validation.regex('a', 'x', "x"), validation.regex('abc', '(?i)abc', "abc")]
+
+    assert _counts(rules, TEXTS) == {'a': 1, 'abc': 2}
+
+
+def test_same_group_names():
+    rules = [validation.regex('repeat', r'(?P<w>слово) слово', "repeated word"),
+             validation.regex('digit', r'(?P<w>[a-z])\d', "letter with digit")]
+
+    assert _counts(rules, TEXTS) == {'repeat': 1, 'digit': 1}
+
+
+def test_verbose_comment():
+    rules = [validation.regex('abc', 'abc  # lowercase only', "abc", flags=re.VERBOSE),
+             validation.regex('pre_reform', validation.PRE_REFORM, "pre-reform")]
+
+    assert _counts(rules, TEXTS) == {'abc': 1, 'pre_reform': 1}
+
+
+def test_combined_as_separate():
+    rules = [validation.regex('pre_reform', validation.PRE_REFORM, "pre-reform"),
+             validation.regex('case', 'abc', "abc", flags=re.IGNORECASE),
+             validation.regex('tagged', '{{b}}', "bold", tagged=True)]
+    validator = validation.Validator(rules)
+
+    assert validator.regex_rules[False][1] == rules[:2]
+    assert _counts(rules, TEXTS + ['{{b}}мир{{/b}}']) == {'pre_reform': 1, 'case': 2, 'tagged': 1}
+
+
+def test_limit():
+    with pytest.raises(validation.ValidationError) as exc:
+        _document(TEXTS).validate([validation.regex('letters', '[a-z]', "Latin", limit=2)])
+
+    assert exc.value.report.failed == 'letters'
@@ -0,0 +1,30 @@
+from elements import Document
+from fakeuno import FakeDesktop, FakeDocument
+
+
+def _model(texts):
+    desktop = FakeDesktop(FakeDocument([(1, [(text, {})] if text else []) for text in texts]))
+    return desktop.getCurrentComponent()
+
+
+def test_merge_across_stripped_paragraphs(tmp_path):
+    model = _model(['', 'Начало', '', 'продолжение', 'Конец', '', '', 'хвост.', 'Последний'])
+    document = Document().from_model(model)
+    document.strip_empty()
+    document.merge_paragraphs()
+    document.write_in_place(str(tmp_path / 'out.json'))
+
+    assert model.Text.String == 'Начало продолжение\rКонец хвост.\rПоследний'
+    assert document.discarded == []
+
+
+def test_changed_words_of_merged_paragraphs(tmp_path):
+    model = _model(['Сѣверъ и', '', 'югъ.'])
+    document = Document().from_model(model)
+    document.strip_empty()
+    document.merge_paragraphs()
+    paragraph = document.paragraphs[0]
+    paragraph.text_untagged = paragraph.text_untagged.replace('ѣ', 'е').replace('ъ', '')
+    document.write_in_place(str(tmp_path / 'out.json'))
+
+    assert model.Text.String == 'Север и юг.'
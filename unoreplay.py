@@ -0,0 +1,198 @@
+"""
+Record UNO sessions and replay them offline
+
+Recorder is a unotrace.Tracer which also saves objects, arguments and results of every call
+to a gzipped JSON lines file: [object id, op, name, args, result, latency in microseconds].
+Replayer serves the same responses later, keyed by (object, op, name, args), so reading and writing
+code may be changed (calls reordered or dropped) and still be benchmarked against real documents.
+
+Objects not received as a result of another call (desktop, model passed from outside) are all roots,
+they get id 0.
+"""
+import gzip
+import json
+import time
+from collections import deque
+
+import unotrace
+
+ROOT_ID = 0
+
+
+class Recorder(unotrace.Tracer):
+    def __init__(self, filename):
+        """
+        :param filename: trace file to write (gzipped)
+        """
+        super().__init__()
+        self.ids = {}  # id(object) -> recorded id
+        self.objects = []  # keep recorded objects alive, so id() is not reused
+        self.record_h = gzip.open(filename, 'wt', encoding='utf-8')
+
+    def _id(self, obj, new=False):
+        key = id(obj)
+        if key not in self.ids:
+            self.ids[key] = len(self.objects) + 1 if new else ROOT_ID
+            self.objects.append(obj)
+
+        return self.ids[key]
+
+    def _encode(self, value):
+        if isinstance(value, unotrace.PRIMITIVE_TYPES):
+            return value
+        if isinstance(value, (tuple, list)):
+            return dict(tuple=[self._encode(x) for x in value])
+        if unotrace._is_remote(value):
+            return dict(ref=self._id(value, new=True))
+        if hasattr(value, 'value'):  # uno.Enum
+            return dict(enum=value.value)
+
+        return dict(repr=repr(value))
+
+    def record(self, op, name, started, elapsed, target=None, args=(), result=None, depth=2):
+        super().record(op, name, started, elapsed, depth=depth + 1)
+
+        event = [self._id(target), op, name, [self._encode(x) for x in args], self._encode(result),
+                 round(elapsed * 1e6, 1)]
+        self.record_h.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def close(self):
+        super().close()
+        if self.record_h:
+            self.record_h.close()
+            self.record_h = None
+
+
+def record(filename):
+    """
+    Start recording UNO calls (through unotrace), stop with unotrace.disable()
+    """
+    return unotrace.enable(tracer=Recorder(filename))
+
+
+class ReplayEnum:
+    def __init__(self, value):
+        self.value = value
+
+
+class ReplayObject:
+    __uno_remote__ = True
+
+    def __init__(self, replayer, obj_id):
+        object.__setattr__(self, '_replayer', replayer)
+        object.__setattr__(self, '_id', obj_id)
+
+    def __getattr__(self, name):
+        replayer = object.__getattribute__(self, '_replayer')
+        obj_id = object.__getattribute__(self, '_id')
+
+        if replayer.kinds.get(name) == 'call':
+            return lambda *args: replayer.respond(obj_id, 'call', name, args)
+
+        return replayer.respond(obj_id, 'get', name, ())
+
+    def __setattr__(self, name, value):
+        object.__getattribute__(self, '_replayer').respond(object.__getattribute__(self, '_id'), 'set', name,
+                                                           (value,))
+
+    def __repr__(self):
+        return "<ReplayObject %s>" % object.__getattribute__(self, '_id')
+
+
+class Replayer:
+    def __init__(self, filename, scale=1.0):
+        """
+        :param filename: trace file written by Recorder
+        :param scale: multiplier of recorded latencies, 0 to replay as fast as possible
+        """
+        self.scale = scale
+        self.responses = {}  # (object id, op, name, args) -> deque of (result, latency)
+        self.kinds = {}  # name -> op, to know whether attribute is a method
+        self.latencies = {}  # (op, name) -> list of latencies, for calls missing from recording
+        self.calls = 0
+        self.missing = 0
+        self._void = None
+
+        with gzip.open(filename, 'rt', encoding='utf-8') as file_h:
+            for line in file_h:
+                obj_id, op, name, args, result, latency = json.loads(line)
+                key = (obj_id, op, name, json.dumps(args, ensure_ascii=False))
+                self.responses.setdefault(key, deque()).append((result, latency))
+                self.kinds.setdefault(name, op)
+                self.latencies.setdefault((op, name), []).append(latency)
+
+    def root(self):
+        """
+        :return: object standing for desktop (and other roots) of recorded session
+        """
+        return ReplayObject(self, ROOT_ID)
+
+    def _encode(self, value):
+        if isinstance(value, ReplayObject):
+            return dict(ref=object.__getattribute__(value, '_id'))
+        if isinstance(value, ReplayEnum):
+            return dict(enum=value.value)
+        if isinstance(value, (tuple, list)):
+            return dict(tuple=[self._encode(x) for x in value])
+        if isinstance(value, unotrace.PRIMITIVE_TYPES):
+            return value
+        if hasattr(value, 'value'):
+            return dict(enum=value.value)
+
+        return dict(repr=repr(value))
+
+    def _decode(self, value):
+        if isinstance(value, dict):
+            if 'ref' in value:
+                return ReplayObject(self, value['ref'])
+            if 'tuple' in value:
+                return tuple(self._decode(x) for x in value['tuple'])
+            if 'enum' in value:
+                return ReplayEnum(value['enum'])
+
+            return None
+
+        return value
+
+    def _wait(self, latency):
+        if not self.scale or not latency:
+            return
+
+        seconds = latency * self.scale / 1e6
+        if seconds >= 0.001:
+            time.sleep(seconds)
+        else:  # sleep() is too coarse for microseconds
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                pass
+
+    def respond(self, obj_id, op, name, args):
+        self.calls += 1
+        key = (obj_id, op, name, json.dumps([self._encode(x) for x in args], ensure_ascii=False))
+        queue = self.responses.get(key)
+
+        if queue:
+            result, latency = queue.popleft() if len(queue) > 1 else queue[0]  # last response repeats
+            self._wait(latency)
+            return self._decode(result)
+
+        # code changed since recording makes a new call, fine if it never returns anything
+        latencies = self.latencies.get((op, name))
+        if op == 'set' or (latencies and name in self._void_names()):
+            self.missing += 1
+            self._wait(sorted(latencies)[len(latencies) // 2] if latencies else 0)
+            return None
+
+        raise LookupError("Call %s %s.%s%s is not in recording" % (op, obj_id, name, key[3]))
+
+    def _void_names(self):
+        """
+        :return: names of calls which never returned anything in recording
+        """
+        if self._void is None:
+            self._void = set(self.kinds)
+            for (obj_id, op, name, args), queue in self.responses.items():
+                if any(result is not None for result, latency in queue):
+                    self._void.discard(name)
+
+        return self._void
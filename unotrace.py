@@ -0,0 +1,214 @@
+"""
+Opt-in accounting of UNO bridge calls
+
+Objects passed through wrap() are replaced with proxies counting every method call and property get/set,
+attributed to pipeline stage and code site, with latency histograms (log2 buckets of microseconds)
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+TRACER = None
+
+PRIMITIVE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _is_remote(value):
+    return type(value).__name__ == 'pyuno' or getattr(type(value), '__uno_remote__', False)
+
+
+class Stat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.histogram = {}  # bucket (bit length of microseconds) -> count
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        bucket = int(elapsed * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def percentile(self, fraction):
+        """
+        :return: upper bound of bucket where fraction of calls is, in microseconds
+        """
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= fraction * self.count:
+                return 2 ** bucket
+
+        return 0
+
+
+class Tracer:
+    def __init__(self, trace_file=None):
+        """
+        :param trace_file: file to write every call to (JSON lines), None to keep only stats
+        """
+        self.stats = {}  # (stage, op, name) -> Stat
+        self.sites = {}  # (stage, site) -> Stat
+        self.current_stage = 'main'
+        self.started = time.perf_counter()
+        self.trace_h = open(trace_file, 'w', encoding='utf-8') if trace_file else None
+
+    @contextmanager
+    def stage(self, name):
+        previous = self.current_stage
+        self.current_stage = name
+        try:
+            yield
+        finally:
+            self.current_stage = previous
+
+    def record(self, op, name, started, elapsed, target=None, args=(), result=None, depth=2):
+        """
+        Account one call
+
+        :param op: 'call', 'get' or 'set'
+        :param name: method or property name
+        :param started: perf_counter() at start
+        :param elapsed: seconds
+        :param target: unwrapped object, args and result of call (not used here, for subclasses)
+        :param depth: stack depth of code site
+        """
+        frame = sys._getframe(depth)
+        site = "%s:%s %s" % (os.path.basename(frame.f_code.co_filename), frame.f_lineno, frame.f_code.co_name)
+
+        self.stats.setdefault((self.current_stage, op, name), Stat()).add(elapsed)
+        self.sites.setdefault((self.current_stage, site), Stat()).add(elapsed)
+
+        if self.trace_h:
+            self.trace_h.write(json.dumps(dict(t=round(started - self.started, 6), stage=self.current_stage,
+                                               site=site, op=op, name=name, us=round(elapsed * 1e6, 1))) + '\n')
+
+    def summary(self, top=20):
+        """
+        :return: summary table as string
+        """
+        lines = ["%-40s %-4s %-28s %8s %10s %8s %8s" % ('stage', 'op', 'name', 'calls', 'total, ms',
+                                                        'p50, us', 'p99, us')]
+        for (stage, op, name), stat in sorted(self.stats.items(), key=lambda x: -x[1].total):
+            lines.append("%-40s %-4s %-28s %8s %10.1f %8s %8s" % (stage, op, name, stat.count, stat.total * 1e3,
+                                                                 stat.percentile(0.5), stat.percentile(0.99)))
+
+        lines.append("")
+        lines.append("%-40s %-50s %8s %10s" % ('stage', 'code site', 'calls', 'total, ms'))
+        for (stage, site), stat in sorted(self.sites.items(), key=lambda x: -x[1].total)[:top]:
+            lines.append("%-40s %-50s %8s %10.1f" % (stage, site, stat.count, stat.total * 1e3))
+
+        total = sum(stat.count for stat in self.stats.values())
+        lines.append("")
+        lines.append("Total: %s calls, %.1f ms" % (total, sum(stat.total for stat in self.stats.values()) * 1e3))
+
+        return "\n".join(lines)
+
+    def close(self):
+        if self.trace_h:
+            self.trace_h.close()
+            self.trace_h = None
+
+
+def _unwrap(value):
+    if isinstance(value, Proxy):
+        return object.__getattribute__(value, '_target')
+    if isinstance(value, tuple):
+        return tuple(_unwrap(x) for x in value)
+
+    return value
+
+
+class Proxy:
+    __slots__ = ('_target', '_tracer')
+
+    def __init__(self, target, tracer):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_tracer', tracer)
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, '_target')
+        tracer = object.__getattribute__(self, '_tracer')
+
+        started = time.perf_counter()
+        value = getattr(target, name)
+
+        if callable(value) and not _is_remote(value):  # method, remote call happens when it's called
+            def call(*args, **kwargs):
+                call_started = time.perf_counter()
+                unwrapped = _unwrap(args)
+                result = value(*unwrapped, **kwargs)
+                tracer.record('call', name, call_started, time.perf_counter() - call_started,
+                              target=target, args=unwrapped, result=result)
+                return _wrap(result, tracer)
+
+            return call
+
+        tracer.record('get', name, started, time.perf_counter() - started, target=target, result=value)
+
+        return _wrap(value, tracer)
+
+    def __setattr__(self, name, value):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        started = time.perf_counter()
+        value = _unwrap(value)
+        setattr(target, name, value)
+        tracer.record('set', name, started, time.perf_counter() - started, target=target, args=(value,))
+
+    def __repr__(self):
+        return "<Proxy %r>" % object.__getattribute__(self, '_target')
+
+
+def _wrap(value, tracer):
+    if isinstance(value, PRIMITIVE_TYPES) or isinstance(value, Proxy) or not _is_remote(value):
+        return value
+
+    return Proxy(value, tracer)
+
+
+def wrap(value):
+    """
+    Wrap UNO object for accounting if tracing is enabled
+    """
+    if TRACER is None:
+        return value
+
+    return _wrap(value, TRACER)
+
+
+def enable(trace_file=None, tracer=None):
+    """
+    :param trace_file: file to write every call to
+    :param tracer: Tracer (or subclass) instance to use instead of a new one
+    """
+    global TRACER
+    TRACER = tracer or Tracer(trace_file)
+    return TRACER
+
+
+def disable():
+    """
+    :return: summary of traced calls
+    """
+    global TRACER
+    if TRACER is None:
+        return ""
+
+    tracer, TRACER = TRACER, None
+    tracer.close()
+    return tracer.summary()
+
+
+@contextmanager
+def stage(name):
+    """
+    Attribute calls inside to pipeline stage
+    """
+    if TRACER is None:
+        yield
+    else:
+        with TRACER.stage(name):
+            yield
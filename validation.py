@@ -0,0 +1,259 @@
+"""
+Quality gates for a processed document: a set of declarative rules checked in one pass over paragraphs
+
+Rules are made with:
+    regex           finding where pattern matches text; regex rules of a pass are compiled into one
+                    combined pattern, a text it doesn't match is clean for all of them at once
+    predicate       finding where func(text) is false, as Document.check takes it; columns predicates
+                    (columns.longer_than...) are evaluated on all paragraphs at once
+    document_rule   finding for each (page, excerpt) func(document) returns, for book-wide counts
+
+Findings are counted per rule and page in a Report, with a few examples per rule. A rule with limit
+fails validation as soon as it has more findings than limit: the pass stops and ValidationError is raised.
+
+    Stage('validate', validation.quality_gates())
+"""
+import re
+import textwrap
+from collections import Counter, defaultdict, namedtuple
+
+import columns
+
+Rule = namedtuple('Rule', 'name kind message pattern test tagged footnotes limit')
+Finding = namedtuple('Finding', 'rule element page excerpt')
+
+SCOPED_FLAGS = dict(i=re.IGNORECASE, m=re.MULTILINE, s=re.DOTALL, x=re.VERBOSE)
+BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=')
+GLOBAL_FLAGS_RE = re.compile(r'\(\?[aiLmsux]+\)')  # (?i) applies to the whole pattern, not only to its part
+STYLE_TAG_RE = re.compile(r'{{(/?)([biu])}}')
+
+PRE_REFORM = r'[ѣѢіІѳѲѵѴ]|[ъЪ](?![^\W\d_])'  # and hard sign at the end of word
+MIXED_SCRIPT = r'[а-яёА-ЯЁ][a-zA-Z]|[a-zA-Z][а-яёА-ЯЁ]'
+
+
+class ValidationError(Exception):
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def regex(name, pattern, message, flags=0, tagged=False, footnotes=False, limit=None):
+    """
+    :param pattern: regular expression of what shouldn't be in text
+    :param flags: re flags, rules with flags other than IGNORECASE, MULTILINE, DOTALL and VERBOSE, with inline
+        global flags (?i) or named groups are checked one by one, others through one combined pattern
+    :param tagged: match tagged text instead of untagged
+    :param footnotes: check footnotes too
+    :param limit: findings allowed before validation fails, None for no limit
+    """
+    return Rule(name, 'regex', message, re.compile(pattern, flags), None, tagged, footnotes, limit)
+
+
+def predicate(name, func, message, tagged=True, footnotes=False, limit=None):
+    """
+    :param func: function(text) -> true if text is fine, or columns.Predicate
+    """
+    return Rule(name, 'predicate', message, None, func, tagged, footnotes, limit)
+
+
+def document_rule(name, func, message, limit=None):
+    """
+    :param func: function(document) -> list of (page, excerpt) findings
+    """
+    return Rule(name, 'document', message, None, func, False, False, limit)
+
+
+def tags_balanced(text):
+    """
+    :return: whether every {{b}}, {{i}}, {{u}} is closed and closing tags have opening ones
+    """
+    if '{{' not in text:
+        return True
+
+    opened = set()
+    for closing, kind in STYLE_TAG_RE.findall(text):
+        if closing:
+            if kind not in opened:
+                return False
+            opened.remove(kind)
+        elif kind in opened:
+            return False
+        else:
+            opened.add(kind)
+
+    return not opened
+
+
+def footnote_count(document):
+    """
+    :return: finding if number of footnote links differs from number of footnotes
+    """
+    if document.footnote_links == len(document.footnotes):
+        return []
+
+    page = document.footnotes[0].page_num if document.footnotes else None
+    return [(page, "%s links, %s footnotes" % (document.footnote_links, len(document.footnotes)))]
+
+
+def min_length(length, limit=None):
+    return predicate('min_length', columns.longer_than(length), "Too short paragraph", limit=limit)
+
+
+def quality_gates():
+    """
+    :return: rules run on processed books
+    """
+    return [
+        predicate('unbalanced_tags', tags_balanced, "Unbalanced style tags", footnotes=True),
+        regex('pre_reform', PRE_REFORM, "Pre-reform letters left", footnotes=True),
+        regex('mixed_script', MIXED_SCRIPT, "Latin letters inside Cyrillic word", footnotes=True),
+        document_rule('footnote_count', footnote_count, "Footnote links and footnotes differ"),
+    ]
+
+
+def _combinable(rule):
+    pattern = rule.pattern
+    flags = pattern.flags & ~re.UNICODE
+    return (not flags & ~sum(SCOPED_FLAGS.values()) and not pattern.groupindex
+            and not BACKREFERENCE_RE.search(pattern.pattern) and not GLOBAL_FLAGS_RE.search(pattern.pattern))
+
+
+def _combined(rules):
+    """
+    :return: one pattern matching where any of rules matches, None if there are no such rules
+    """
+    parts = []
+    for rule in rules:
+        letters = ''.join(letter for letter, flag in SCOPED_FLAGS.items() if rule.pattern.flags & flag)
+        parts.append('(?%s:%s)' % (letters, rule.pattern.pattern) if letters else '(?:%s)' % rule.pattern.pattern)
+
+    return re.compile('|'.join(parts)) if parts else None
+
+
+def _excerpt(text, start=0):
+    return textwrap.shorten(text[max(start - 20, 0):start + 40], width=60) or repr(text)
+
+
+class Report:
+    def __init__(self, examples=5):
+        """
+        :param examples: findings kept per rule as examples
+        """
+        self.examples = examples
+        self.counts = Counter()  # rule -> findings
+        self.pages = defaultdict(Counter)  # rule -> page -> findings
+        self.found = defaultdict(list)  # rule -> first findings
+        self.messages = {}
+        self.checked = 0  # texts
+        self.failed = None  # rule over its limit
+
+    def add(self, rule, element, page, excerpt):
+        self.counts[rule.name] += 1
+        self.pages[rule.name][page] += 1
+        self.messages[rule.name] = rule.message
+        if len(self.found[rule.name]) < self.examples:
+            self.found[rule.name].append(Finding(rule.name, element, page, excerpt))
+
+        if rule.limit is not None and self.counts[rule.name] > rule.limit:
+            self.failed = rule.name
+            raise ValidationError("Validation failed: %s (%s findings, %s allowed)" % (
+                rule.message, self.counts[rule.name], rule.limit), self)
+
+    def __bool__(self):
+        """
+        :return: true if there are no findings
+        """
+        return not self.counts
+
+    def as_dict(self):
+        return dict(checked=self.checked, failed=self.failed, rules={
+            name: dict(message=self.messages[name], count=count, pages=dict(self.pages[name]),
+                       examples=[finding._asdict() for finding in self.found[name]])
+            for name, count in self.counts.items()})
+
+    def summary(self):
+        """
+        :return: one line per rule with findings: count, pages with most findings, example
+        """
+        lines = []
+        for name, count in self.counts.most_common():
+            pages = ', '.join('%s (%s)' % x for x in self.pages[name].most_common(5))
+            lines.append("%s: %s findings on %s pages, most on %s; e.g. '%s'" % (
+                self.messages[name], count, len(self.pages[name]), pages, self.found[name][0].excerpt))
+
+        return '\n'.join(lines)
+
+
+class Validator:
+    def __init__(self, rules, examples=5):
+        """
+        :param rules: list of Rule
+        :param examples: findings kept per rule as examples
+        """
+        self.rules = rules
+        self.examples = examples
+        self.predicates = [rule for rule in rules if rule.kind == 'predicate']
+        self.document_rules = [rule for rule in rules if rule.kind == 'document']
+
+        # regex rules by text they look at: (gate, rules behind it, rules checked one by one)
+        self.regex_rules = {}
+        for tagged in (False, True):
+            found = [rule for rule in rules if rule.kind == 'regex' and rule.tagged == tagged]
+            combined = [rule for rule in found if _combinable(rule)]
+            try:
+                gate = _combined(combined)
+            except re.error:  # patterns don't go together (verbose comment...), check them one by one
+                gate, combined = None, []
+            if found:
+                self.regex_rules[tagged] = (gate, combined, [rule for rule in found if rule not in combined])
+
+    def _check_regex(self, report, element, text, tagged, footnote):
+        gate, combined, separate = self.regex_rules[tagged]
+        rules = combined + separate if gate is not None and gate.search(text) else separate
+
+        for rule in rules:
+            if footnote and not rule.footnotes:
+                continue
+            match = rule.pattern.search(text)
+            if match:
+                report.add(rule, element.id, element.page_num, _excerpt(text, match.start()))
+
+    def _check(self, report, element, footnote=False, index=None, failing=None):
+        """
+        :param index: paragraph index in failing masks of columns predicates
+        """
+        report.checked += 1
+        for tagged in self.regex_rules:
+            self._check_regex(report, element, element.text if tagged else element.text_untagged, tagged, footnote)
+
+        for rule in self.predicates:
+            if footnote and not rule.footnotes:
+                continue
+            text = element.text if rule.tagged else element.text_untagged
+            if failing[rule.name][index] if index is not None and rule.name in failing else not rule.test(text):
+                report.add(rule, element.id, element.page_num, _excerpt(text))
+
+    def run(self, document):
+        """
+        Check all rules on document in one pass over paragraphs and footnotes
+
+        :return: Report
+        :raise ValidationError: a rule has more findings than its limit
+        """
+        report = Report(self.examples)
+        table = document.table()
+        failing = {rule.name: ~rule.test.mask(table, rule.tagged) for rule in self.predicates
+                   if isinstance(rule.test, columns.Predicate) and table is not None}
+
+        for index, paragraph in enumerate(document.paragraphs):
+            self._check(report, paragraph, index=index, failing=failing)
+
+        if any(rule.footnotes for rule in self.rules):
+            for footnote in document.footnotes:
+                self._check(report, footnote, footnote=True)
+
+        for rule in self.document_rules:
+            for page, excerpt in rule.test(document):
+                report.add(rule, None, page, excerpt)
+
+        return report
@@ -0,0 +1,213 @@
+"""
+Time budgets for parsers against pathological inputs (OCR garbage making regexes crawl)
+
+A parser call running longer than the paragraph budget, or than what is left of the stage budget,
+is interrupted with SIGALRM. The paragraph is quarantined: it goes through this and all later parsers
+unchanged, and a reproducer (stage, parser, text) is logged and appended to quarantine file. Once a stage
+is over its budget the rest of its paragraphs are passed through unchanged, the run goes on.
+
+Interruption works only in the main thread, elsewhere (daemon workers) slow calls are quarantined after
+they finish, which still spares later stages.
+
+    python watchdog.py repro quarantine.jsonl [--index N]
+"""
+import argparse
+import json
+import logging
+import signal
+import textwrap
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import parsers
+
+WATCHDOG = None
+
+Quarantined = namedtuple('Quarantined', 'stage parser paragraph page elapsed text')
+
+
+class Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise Timeout()
+
+
+class Watchdog:
+    def __init__(self, paragraph_budget=1.0, stage_budget=None, filename=None):
+        """
+        :param paragraph_budget: seconds one parser may spend on one text, None for no limit
+        :param stage_budget: seconds one stage may spend on all paragraphs, None for no limit
+        :param filename: JSON lines file to append reproducers of quarantined paragraphs to
+        """
+        self.paragraph_budget = paragraph_budget
+        self.stage_budget = stage_budget
+        self.filename = filename
+        self.quarantined = []
+        self.quarantined_ids = set()
+        self.slowest = {}  # parser name -> (seconds, paragraph id)
+        self.local = threading.local()  # stage of this thread: [name, deadline, passed through]
+        self.previous_handler = None
+        if filename:
+            open(filename, 'w').close()
+        if hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread():
+            self.previous_handler = signal.signal(signal.SIGALRM, _alarm)
+
+    @contextmanager
+    def stage(self, name):
+        deadline = None if self.stage_budget is None else time.perf_counter() + self.stage_budget
+        previous = getattr(self.local, 'stage', None)
+        current = self.local.stage = [name, deadline, 0]
+        try:
+            yield current
+        finally:
+            self.local.stage = previous
+            if current[2]:
+                logging.warning("[WARNING] Stage %s is over its budget of %s s, %s texts passed through unchanged",
+                                name, self.stage_budget, current[2])
+
+    def _budget(self, current):
+        budget = self.paragraph_budget
+        if current is not None and current[1] is not None:
+            left = current[1] - time.perf_counter()
+            budget = left if budget is None else min(budget, left)
+
+        return budget
+
+    def call(self, func, element, text, call):
+        """
+        Run call() - func on text of element - within budget
+
+        :return: its result, or text if element is quarantined or the budget is spent
+        """
+        if element.id in self.quarantined_ids:
+            return text
+
+        current = getattr(self.local, 'stage', None)
+        budget = self._budget(current)
+        if budget is not None and budget <= 0:
+            current[2] += 1
+            return text
+
+        interrupt = budget is not None and self.previous_handler is not None and \
+            threading.current_thread() is threading.main_thread()
+        result = timeout = None
+        started = time.perf_counter()
+        try:
+            if interrupt:
+                signal.setitimer(signal.ITIMER_REAL, budget)
+            try:
+                result = call()
+            finally:
+                if interrupt:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        except Timeout as exc:
+            timeout = exc
+        elapsed = time.perf_counter() - started
+
+        name = func.__name__
+        if elapsed > self.slowest.get(name, (0,))[0]:
+            self.slowest[name] = (elapsed, element.id)
+
+        if timeout is not None or (not interrupt and budget is not None and elapsed > budget):
+            if current is not None and current[1] is not None and time.perf_counter() >= current[1] and \
+                    (self.paragraph_budget is None or elapsed <= self.paragraph_budget):
+                current[2] += 1  # stage budget ran out, paragraph itself is not to blame
+            else:
+                self.quarantine(current[0] if current else name, name, element, elapsed, text)
+            return text
+
+        return result
+
+    def quarantine(self, stage, parser, element, elapsed, text):
+        entry = Quarantined(stage, parser, element.id, element.page_num, elapsed, text)
+        self.quarantined.append(entry)
+        self.quarantined_ids.add(element.id)
+
+        if self.filename:
+            with open(self.filename, 'a', encoding='utf-8') as file_h:
+                file_h.write(json.dumps(entry._asdict(), ensure_ascii=False) + '\n')
+            reproducer = "python watchdog.py repro %s --index %s" % (self.filename, len(self.quarantined) - 1)
+        else:
+            reproducer = "parsers.get(%r)(%r)" % (parser, textwrap.shorten(text, width=200))
+
+        logging.warning("[WARNING] %s spent %.2f s on paragraph %s (page %s, %s chars), quarantined: "
+                        "passed through unchanged. Reproduce: %s", parser, elapsed, element.id, element.page_num,
+                        len(text), reproducer)
+
+    def close(self):
+        if self.previous_handler is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self.previous_handler)
+            self.previous_handler = None
+
+    def report(self):
+        """
+        :return: lines on slowest parser calls and quarantined paragraphs
+        """
+        lines = ["%-28s slowest %8.3f s (paragraph %s)" % (name, elapsed, paragraph)
+                 for name, (elapsed, paragraph) in sorted(self.slowest.items(), key=lambda x: -x[1][0])]
+        lines.extend("quarantined paragraph %s (page %s) in %s after %.2f s" % (x.paragraph, x.page, x.stage,
+                                                                                 x.elapsed) for x in self.quarantined)
+
+        return '\n'.join(lines)
+
+
+def enable(paragraph_budget=1.0, stage_budget=None, filename=None):
+    global WATCHDOG
+    WATCHDOG = Watchdog(paragraph_budget, stage_budget, filename)
+    return WATCHDOG
+
+
+def disable():
+    """
+    :return: closed watchdog with its findings
+    """
+    global WATCHDOG
+    watchdog, WATCHDOG = WATCHDOG, None
+    if watchdog is not None:
+        watchdog.close()
+
+    return watchdog
+
+
+@contextmanager
+def stage(name):
+    if WATCHDOG is None:
+        yield None
+    else:
+        with WATCHDOG.stage(name) as current:
+            yield current
+
+
+def read(filename):
+    """
+    :return: list of Quarantined from quarantine file
+    """
+    with open(filename, encoding='utf-8') as file_h:
+        return [Quarantined(**json.loads(line)) for line in file_h if line.strip()]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Reproduce quarantined paragraphs")
+    arg_parser.add_argument('command', choices=['repro', 'list'])
+    arg_parser.add_argument('file')
+    arg_parser.add_argument('--index', type=int, help="entry to reproduce, all by default")
+    args = arg_parser.parse_args()
+
+    entries = read(args.file)
+    for index, entry in enumerate(entries):
+        if args.index is not None and index != args.index:
+            continue
+        if args.command == 'list':
+            print("%s\t%s\t%s\tparagraph %s\tpage %s\t%.2f s\t%s chars" % (
+                index, entry.stage, entry.parser, entry.paragraph, entry.page, entry.elapsed, len(entry.text)))
+            continue
+
+        started = time.perf_counter()
+        parsers.get(entry.parser)(entry.text)
+        print("%s on paragraph %s: %.3f s (%.3f s when quarantined)" % (
+            entry.parser, entry.paragraph, time.perf_counter() - started, entry.elapsed))
@@ -0,0 +1,196 @@
+"""
+Book-wide word frequency index for corrections by consistency of the whole book (parsers.consistency)
+
+Words are counted lower-cased in one pass over paragraphs and footnotes (Document.index_words). Forms
+differing only in ё/е share a normalized key, so 'how often is this word written with ё' takes a couple
+of dict lookups. Index of a volume is saved as sorted gzipped 'form<TAB>count' lines, indexes of volumes
+are merged into one for a multi-volume collection reading each of them line by line:
+
+    python wordindex.py build vol1.jsonl.gz -o vol1.words.gz    (saved document, see checkpoint.py)
+    python wordindex.py merge vol1.words.gz vol2.words.gz -o all.words.gz
+    python wordindex.py show all.words.gz елка
+"""
+import argparse
+import gzip
+import heapq
+import itertools
+import re
+import threading
+from collections import Counter
+
+WORD_RE = re.compile(r'[^\W\d_]+')
+
+_local = threading.local()  # index parsers query, per thread: each daemon job runs in a thread of its own
+
+
+def normalize(word):
+    return word.lower().replace('ё', 'е')
+
+
+class WordIndex:
+    def __init__(self, counts=None):
+        """
+        :param counts: lower-cased form -> count
+        """
+        self.counts = Counter(counts or {})
+        self._keys = None  # normalized form -> form, or tuple of forms if there are several
+
+    def add_text(self, text):
+        self.counts.update(WORD_RE.findall(text.lower()))
+        self._keys = None
+
+    def merge(self, other):
+        """
+        Add counts of other index (another volume)
+        """
+        self.counts.update(other.counts)
+        self._keys = None
+        return self
+
+    def _get_keys(self):
+        if self._keys is None:
+            keys = {}
+            for form in self.counts:
+                key = normalize(form)
+                known = keys.get(key)
+                if known is None:
+                    keys[key] = form
+                else:
+                    keys[key] = (known if isinstance(known, tuple) else (known,)) + (form,)
+            self._keys = keys
+
+        return self._keys
+
+    def __len__(self):
+        return len(self.counts)
+
+    def count(self, word):
+        """
+        :return: occurrences of word as it is written (case aside)
+        """
+        return self.counts.get(word.lower(), 0)
+
+    def variants(self, word):
+        """
+        :return: {form: count} of forms of word differing only in ё/е
+        """
+        forms = self._get_keys().get(normalize(word), ())
+        if isinstance(forms, str):
+            forms = (forms,)
+
+        return {form: self.counts[form] for form in forms}
+
+    def total(self, word):
+        """
+        :return: occurrences of word in any of its ё/е forms
+        """
+        return sum(self.variants(word).values())
+
+    def dominant(self, word):
+        """
+        :return: (form, count) of the most frequent ё/е form of word, (None, 0) if word isn't in index
+        """
+        variants = self.variants(word)
+        if not variants:
+            return None, 0
+
+        return max(variants.items(), key=lambda x: (x[1], x[0]))
+
+    def save(self, filename):
+        write(sorted(self.counts.items()), filename)
+        return filename
+
+
+def index_document(document, index=None):
+    """
+    Count words of document paragraphs and footnotes
+
+    :param index: WordIndex to add to, new one if None
+    :return: WordIndex
+    """
+    index = WordIndex() if index is None else index
+    for element in itertools.chain(document.paragraphs, document.footnotes):
+        index.add_text(element.text_untagged)
+
+    return index
+
+
+def write(items, filename):
+    """
+    :param items: (form, count) sorted by form
+    :return: number of forms written
+    """
+    forms = 0
+    with gzip.open(filename, 'wt', encoding='utf-8') as file_h:
+        for form, count in items:
+            file_h.write('%s\t%s\n' % (form, count))
+            forms += 1
+
+    return forms
+
+
+def read(filename):
+    """
+    :return: generator of (form, count) in file order (sorted by form)
+    """
+    with gzip.open(filename, 'rt', encoding='utf-8') as file_h:
+        for line in file_h:
+            form, _, count = line.rstrip('\n').partition('\t')
+            yield form, int(count)
+
+
+def load(filename):
+    return WordIndex(dict(read(filename)))
+
+
+def merge_files(filenames, output):
+    """
+    Merge saved indexes into one, reading them side by side, so memory doesn't depend on their size
+
+    :return: number of forms in merged index
+    """
+    merged = heapq.merge(*[read(filename) for filename in filenames], key=lambda x: x[0])
+    items = ((form, sum(count for _, count in group)) for form, group in itertools.groupby(merged, lambda x: x[0]))
+
+    return write(items, output)
+
+
+def use(index):
+    """
+    Make index the one parsers query in this thread, None to disable
+
+    :param index: WordIndex or saved index file
+    """
+    _local.index = load(index) if isinstance(index, str) else index
+    return _local.index
+
+
+def get_index():
+    """
+    :return: WordIndex parsers query in this thread (set by Document.index_words or use()), None if there is none
+    """
+    return getattr(_local, 'index', None)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build, merge and query word frequency indexes")
+    arg_parser.add_argument('command', choices=['build', 'merge', 'show'])
+    arg_parser.add_argument('paths', nargs='+', help="build: saved documents; merge: indexes; show: INDEX WORD...")
+    arg_parser.add_argument('-o', '--output', help="index file to write")
+    args = arg_parser.parse_args()
+    if args.command != 'show' and not args.output:
+        arg_parser.error("%s needs --output" % args.command)
+
+    if args.command == 'build':
+        import checkpoint
+
+        word_index = WordIndex()
+        for document_file in args.paths:
+            index_document(checkpoint.load(document_file), word_index)
+        print("%s forms written to %s" % (len(word_index), word_index.save(args.output)))
+    elif args.command == 'merge':
+        print("%s forms written to %s" % (merge_files(args.paths, args.output), args.output))
+    else:
+        word_index = load(args.paths[0])
+        for query in args.paths[1:]:
+            print("%s\t%s" % (query, '\t'.join('%s:%s' % x for x in sorted(word_index.variants(query).items()))))